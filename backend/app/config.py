@@ -13,14 +13,116 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str  # Service role key for backend
     SUPABASE_JWT_SECRET: str
+    QUERY_TIMEOUT_SECONDS: float = 10.0  # Per-query timeout for concurrent fan-out
+    
+    # Data backend for the metrics/server/anomaly repositories: "supabase"
+    # (PostgREST) or "postgres" (direct asyncpg pool, needs DATABASE_URL).
+    # Use a direct or session-mode connection string: the transaction pooler
+    # (port 6543) does not support prepared statements.
+    DATA_BACKEND: str = "supabase"
+    DATABASE_URL: str = ""
+    DATABASE_POOL_MIN_SIZE: int = 2
+    DATABASE_POOL_MAX_SIZE: int = 10
     
     # Security
     SECRET_KEY: str  # For additional JWT operations if needed
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Background notification queue
+    NOTIFICATION_QUEUE_SIZE: int = 10000
+    NOTIFICATION_WORKERS: int = 2
+    NOTIFICATION_BATCH_SIZE: int = 100
+    NOTIFICATION_BATCH_WAIT_SECONDS: float = 0.2
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS: float = 10.0
+    
+    # Supervised background tasks (alert emails, push fan-out, cache version bumps)
+    TASK_QUEUE_WORKERS: dict[str, int] = {"email": 2, "notifications": 4, "cache": 2}  # Workers per queue; queues left out keep these defaults
+    TASK_QUEUE_SIZE: int = 1000  # Pending tasks per queue before submissions are rejected
+    TASK_MAX_RETRIES: int = 2
+    TASK_RETRY_BACKOFF_SECONDS: float = 0.5
+    
+    # Batch submission endpoints (AI service)
+    BATCH_MAX_ITEMS: int = 5000
+    
+    # Notification retention (requires the notification_retention migration)
+    NOTIFICATION_RETENTION_ENABLED: bool = False
+    NOTIFICATION_RETENTION_INTERVAL_SECONDS: float = 3600.0
+    NOTIFICATION_READ_TTL_DAYS: int = 30  # Read notifications older than this are removed; 0 keeps them
+    NOTIFICATION_MAX_PER_USER: int = 1000  # Newest notifications kept per user; 0 means no cap
+    NOTIFICATION_RETENTION_ARCHIVE: bool = False  # Move removed rows to notifications_archive instead of deleting
+    NOTIFICATION_RETENTION_CHUNK_SIZE: int = 1000  # Rows per statement
+    
+    # Server/account deletion: soft delete, then a background purge in chunks
+    # (requires the soft_delete_purge migration)
+    PURGE_ENABLED: bool = True
+    PURGE_INTERVAL_SECONDS: float = 30.0  # Poll for jobs scheduled by other workers
+    PURGE_CHUNK_SIZE: int = 5000  # Rows per statement
+    PURGE_CHUNK_PAUSE_SECONDS: float = 0.05  # Pause between chunks to leave room for ingest
+    
+    # Notification push stream (WebSocket / SSE)
+    PUSH_QUEUE_SIZE: int = 100  # Events buffered per connection before it is told to resync
+    PUSH_KEEPALIVE_SECONDS: float = 25.0
+    PUSH_PRESENCE_TTL_SECONDS: float = 60.0  # Must exceed twice the keepalive interval
+    
+    # Bulk notification endpoints (ids are sent in one in_ filter)
+    NOTIFICATION_BULK_MAX_IDS: int = 200
+    
+    # Anomaly incident grouping (repeated detections of one type on one server)
+    INCIDENT_GROUPING_ENABLED: bool = True
+    INCIDENT_WINDOW_SECONDS: float = 300.0
+    INCIDENT_FLUSH_INTERVAL_SECONDS: float = 10.0
+    
     #Gmail
     GMAIL_USER: str
     GMAIL_PASSWORD: str
+    
+    # Outbound email dispatcher
+    SMTP_HOST: str = "smtp.gmail.com"
+    SMTP_PORT: int = 465
+    SMTP_USE_SSL: bool = True
+    SMTP_STARTTLS: bool = False
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+    SMTP_IDLE_TIMEOUT_SECONDS: float = 60.0  # Close the reused connection after this idle time
+    EMAIL_QUEUE_SIZE: int = 1000
+    EMAIL_MAX_RETRIES: int = 3
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 1.0
+    
+    # Alert email digests
+    EMAIL_DIGEST_ENABLED: bool = True
+    EMAIL_DIGEST_WINDOW_SECONDS: float = 300.0
+    EMAIL_MAX_PER_USER_PER_HOUR: int = 12
+    EMAIL_DIGEST_MAX_ITEMS: int = 50  # Alerts listed in one summary email
+
+    # Identical concurrent reads share one query (repository methods listed here)
+    SINGLE_FLIGHT_METHODS: list = [
+        "servers.get_server_by_id",
+        "metrics.get_latest_metrics",
+        "metrics.get_metrics_summary",
+        "anomalies.get_anomaly_stats",
+    ]
+
+    # Shared cache: "memory" (per process) or "redis" (shared by all workers)
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_KEY_PREFIX: str = "smartops:"
+    CACHE_LOCAL_TTL_SECONDS: float = 5.0  # Per-worker copy; bounds staleness if an invalidation is missed
+    API_KEY_CACHE_TTL_SECONDS: float = 300.0
+    ACTIVE_USER_CACHE_TTL_SECONDS: float = 300.0  # Cached "account exists" check for tokens; delete_account clears it
+
+    # Server status derived from heartbeats (last_seen)
+    SERVER_SWEEP_ENABLED: bool = True
+    SERVER_SWEEP_INTERVAL_SECONDS: float = 15.0
+    SERVER_WARNING_AFTER_SECONDS: float = 90.0
+    SERVER_OFFLINE_AFTER_SECONDS: float = 300.0
+
+    # Daily metrics partitions (requires the partition_metrics migration)
+    METRICS_PARTITION_MAINTENANCE_ENABLED: bool = False
+    METRICS_PARTITION_INTERVAL_SECONDS: float = 3600.0
+    METRICS_PARTITION_DAYS_AHEAD: int = 7
+    METRICS_RETENTION_DAYS: int = 90  # Older partitions are dropped; 0 keeps everything
+
+    # Responses larger than this (bytes) are gzip-compressed
+    GZIP_MINIMUM_SIZE: int = 1024
 
     # CORS
     ALLOWED_ORIGINS: list = ["http://localhost:3000", "http://localhost:5173"]
@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends
 from supabase import Client
-from app.schemas.anomaly import AnomalyCreate, AnomalyResponse
+from app.schemas.anomaly import AnomalyCreate, AnomalyResponse, AnomalyBatchResponse
 from app.services.anomaly_service import AnomalyService
-from app.repositories.anomaly_repository import AnomalyRepository
-from app.repositories.server_repository import ServerRepository
+from app.repositories.factory import anomaly_repository, server_repository
 from app.database.supabase import get_supabase
 from app.repositories.notification_repository import NotificationRepository
 from app.services.email_service import EmailService  
@@ -15,8 +14,8 @@ router = APIRouter()
 
 def get_anomaly_service(supabase: Client = Depends(get_supabase)) -> AnomalyService:
     """Dependency to get AnomalyService instance"""
-    anomaly_repo = AnomalyRepository(supabase)
-    server_repo = ServerRepository(supabase)
+    anomaly_repo = anomaly_repository(supabase)
+    server_repo = server_repository(supabase)
     notification_repo = NotificationRepository(supabase)  
     user_repo = UserRepository(supabase)
     return AnomalyService(anomaly_repo, server_repo, notification_repo,user_repo)  # ADD notification_repo
@@ -41,4 +40,22 @@ async def create_anomaly(
     
     ⚠️ In production, this should require AI service authentication token
     """
-    return await anomaly_service.create_anomaly(anomaly_data)
\ No newline at end of file
+    return await anomaly_service.create_anomaly(anomaly_data)
+
+
+@router.post("/batch", response_model=AnomalyBatchResponse, status_code=201)
+async def create_anomalies_batch(
+    anomalies: list[AnomalyCreate],
+    anomaly_service: AnomalyService = Depends(get_anomaly_service)
+):
+    """
+    **Create many anomalies at once (AI Service endpoint)**
+    
+    Send a JSON array of anomalies (same fields as POST /api/anomalies).
+    Servers are checked with one query and new rows are written with one insert.
+    Repeated detections are grouped into open incidents like the single endpoint.
+    Anomalies for unknown servers are skipped and listed in **unknown_server_ids**.
+    
+    ⚠️ In production, this should require AI service authentication token
+    """
+    return await anomaly_service.create_anomalies(anomalies)
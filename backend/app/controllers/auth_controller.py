@@ -12,6 +12,9 @@ from app.schemas.user import (
 )
 from app.services.auth_service import AuthService
 from app.repositories.user_repository import UserRepository
+from app.repositories.purge_repository import PurgeRepository
+from app.repositories.factory import server_repository
+from app.schemas.purge import PurgeJobResponse
 from app.database.supabase import get_supabase
 from app.core.dependencies import get_current_user_id
 from app.core.exceptions import BadRequestException
@@ -22,7 +25,9 @@ router = APIRouter()
 def get_auth_service(supabase: Client = Depends(get_supabase)) -> AuthService:
     """Dependency to get AuthService instance"""
     user_repo = UserRepository(supabase)
-    return AuthService(user_repo)
+    server_repo = server_repository(supabase)
+    purge_repo = PurgeRepository(supabase)
+    return AuthService(user_repo, server_repo, purge_repo)
 
 
 # ==================== AUTHENTICATION ====================
@@ -97,7 +102,7 @@ async def update_my_profile(
     return await auth_service.update_user_profile(user_id, update_data)
 
 
-@router.delete("/me")
+@router.delete("/me", response_model=PurgeJobResponse, status_code=202)
 async def delete_my_account(
     delete_request: DeleteAccountRequest,
     user_id: str = Depends(get_current_user_id),
@@ -109,11 +114,28 @@ async def delete_my_account(
     Send: `{"password": "your_password"}`
     
     This action cannot be undone! All your data will be permanently deleted.
+    The account is closed right away; servers, metrics and notifications are
+    then deleted in the background (follow the returned job with GET /me/purge).
     
     Requires authentication token
     """
-    await auth_service.delete_account(user_id, delete_request.password)
-    return {"message": "Account deleted successfully"}
+    return await auth_service.delete_account(user_id, delete_request.password)
+
+
+@router.get("/me/purge", response_model=PurgeJobResponse)
+async def get_my_account_purge(
+    user_id: str = Depends(get_current_user_id),
+    auth_service: AuthService = Depends(get_auth_service)
+):
+    """
+    **Progress of your account deletion**
+    
+    - **status**: pending, running or done
+    - **progress**: rows removed so far, per table
+    
+    Requires the authentication token used to delete the account
+    """
+    return await auth_service.get_account_purge(user_id)
 
 
 # ==================== PASSWORD MANAGEMENT ====================
@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends
 from supabase import Client
-from app.schemas.metrics import MetricsIngest, MetricsResponse
+from app.schemas.metrics import MetricsIngest, MetricsResponse, MetricsBatchIngest, MetricsBatchResponse
 from app.services.metrics_service import MetricsService
-from app.repositories.metrics_repository import MetricsRepository
-from app.repositories.server_repository import ServerRepository
+from app.repositories.factory import metrics_repository, server_repository
 from app.database.supabase import get_supabase
 
 router = APIRouter()
@@ -11,8 +10,8 @@ router = APIRouter()
 
 def get_metrics_service(supabase: Client = Depends(get_supabase)) -> MetricsService:
     """Dependency to get MetricsService instance"""
-    metrics_repo = MetricsRepository(supabase)
-    server_repo = ServerRepository(supabase)
+    metrics_repo = metrics_repository(supabase)
+    server_repo = server_repository(supabase)
     return MetricsService(metrics_repo, server_repo)
 
 
@@ -37,4 +36,21 @@ async def ingest_metrics(
     
     This endpoint is called by the monitoring agent every 30 seconds
     """
-    return await metrics_service.ingest_metrics(metrics_data)
\ No newline at end of file
+    return await metrics_service.ingest_metrics(metrics_data)
+
+
+@router.post("/ingest/batch", response_model=MetricsBatchResponse, status_code=201)
+async def ingest_metrics_batch(
+    batch: MetricsBatchIngest,
+    metrics_service: MetricsService = Depends(get_metrics_service)
+):
+    """
+    **Agent endpoint to send many samples at once**
+    
+    Authentication: Uses server API key (not JWT token)
+    
+    Send **api_key** and a list of **samples** (same fields as POST /api/metrics/ingest,
+    plus an optional **timestamp**). Useful for agents that buffer while offline.
+    All samples are written with one bulk insert (binary COPY with DATA_BACKEND=postgres).
+    """
+    return await metrics_service.ingest_metrics_batch(batch)
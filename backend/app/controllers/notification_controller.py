@@ -1,17 +1,26 @@
-from fastapi import APIRouter, Depends, Query
+import asyncio
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from supabase import Client
 from app.schemas.notification import (
     NotificationResponse,
     NotificationListResponse,
+    NotificationBulkIds,
     NotificationStats
 )
 from app.services.notification_service import NotificationService
 from app.repositories.notification_repository import NotificationRepository
 from app.database.supabase import get_supabase
-from app.core.dependencies import get_current_user_id
-from typing import Optional
+from app.core.dependencies import get_current_user_id, get_stream_user_id, user_id_from_token
+from app.core.push import push_hub, unread_count_event
+from app.config import get_settings
+from typing import AsyncIterator, Optional
+import logging
+import orjson
 
 router = APIRouter()
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 def get_notification_service(supabase: Client = Depends(get_supabase)) -> NotificationService:
@@ -61,8 +70,101 @@ async def get_unread_count(
     
     Requires authentication token
     """
-    result = await notification_service.get_user_notifications(user_id=user_id, limit=1)
-    return {"unread_count": result.unread_count}
+    return {"unread_count": await notification_service.get_unread_count(user_id)}
+
+
+async def _next_event(queue: asyncio.Queue, user_id: str) -> Optional[dict]:
+    """Next pushed event, or None when the keepalive interval passes first"""
+    await push_hub.refresh_presence(user_id)
+    try:
+        return await asyncio.wait_for(queue.get(), settings.PUSH_KEEPALIVE_SECONDS)
+    except asyncio.TimeoutError:
+        return None
+
+
+@router.get("/stream")
+async def stream_notifications(
+    user_id: str = Depends(get_stream_user_id),
+    notification_service: NotificationService = Depends(get_notification_service)
+):
+    """
+    **Live notifications (Server-Sent Events)**
+    
+    Replaces polling /api/notifications and /api/notifications/unread/count.
+    Each `data:` line is a JSON event:
+    - `{"type": "unread_count", "unread_count": N}` - sent first, then on every change
+    - `{"type": "notification", "notification": {...}}` - a new notification
+    - `{"type": "resync"}` - events were missed; refetch the list and count
+    
+    Authentication: Authorization header, or `?token=<access token>` for EventSource
+    """
+    unread = await notification_service.get_unread_count(user_id)
+    
+    async def events() -> AsyncIterator[bytes]:
+        async with push_hub.connect(user_id) as queue:
+            yield b"data: " + orjson.dumps(unread_count_event(unread)) + b"\n\n"
+            while True:
+                event = await _next_event(queue, user_id)
+                if event is None:
+                    yield b": keepalive\n\n"
+                else:
+                    yield b"data: " + orjson.dumps(event) + b"\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            # Keeps GZipMiddleware from buffering the stream
+            "Content-Encoding": "identity",
+        }
+    )
+
+
+@router.websocket("/ws")
+async def notifications_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    notification_service: NotificationService = Depends(get_notification_service)
+):
+    """
+    Live notifications over WebSocket (`?token=<access token>`).
+    Sends the same JSON events as /stream, plus `{"type": "keepalive"}`.
+    """
+    user_id = user_id_from_token(token)
+    if not user_id:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    
+    async def send_events(queue: asyncio.Queue) -> None:
+        await websocket.send_json(unread_count_event(await notification_service.get_unread_count(user_id)))
+        while True:
+            event = await _next_event(queue, user_id)
+            await websocket.send_json(event or {"type": "keepalive"})
+    
+    async def wait_for_close() -> None:
+        # Client messages are ignored; this returns when the socket closes
+        while True:
+            await websocket.receive_text()
+    
+    async with push_hub.connect(user_id) as queue:
+        tasks = [
+            asyncio.create_task(send_events(queue)),
+            asyncio.create_task(wait_for_close()),
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(result, WebSocketDisconnect):
+            logger.warning("Notification websocket for user %s closed: %s", user_id, result)
 
 
 @router.get("/stats", response_model=NotificationStats)
@@ -107,6 +209,56 @@ async def mark_all_as_read(
     return await notification_service.mark_all_as_read(user_id)
 
 
+@router.put("/read")
+async def mark_notifications_as_read(
+    body: NotificationBulkIds,
+    user_id: str = Depends(get_current_user_id),
+    notification_service: NotificationService = Depends(get_notification_service)
+):
+    """
+    **Mark several notifications as read**
+    
+    Send **ids**: a list of notification ids. Only your own unread
+    notifications are changed; returns how many were marked.
+    
+    Requires authentication token
+    """
+    return await notification_service.mark_many_as_read(body.ids, user_id)
+
+
+@router.post("/delete")
+async def delete_notifications(
+    body: NotificationBulkIds,
+    user_id: str = Depends(get_current_user_id),
+    notification_service: NotificationService = Depends(get_notification_service)
+):
+    """
+    **Delete several notifications**
+    
+    Send **ids**: a list of notification ids. Ids that are not yours are
+    ignored; returns how many were deleted.
+    
+    Requires authentication token
+    """
+    return await notification_service.delete_many(body.ids, user_id)
+
+
+@router.delete("/read")
+async def delete_read_notifications(
+    older_than_days: int = Query(default=30, ge=0, le=3650),
+    user_id: str = Depends(get_current_user_id),
+    notification_service: NotificationService = Depends(get_notification_service)
+):
+    """
+    **Delete read notifications older than N days**
+    
+    - **older_than_days**: Age in days (default: 30, 0 deletes every read notification)
+    
+    Requires authentication token
+    """
+    return await notification_service.delete_read_older_than(user_id, older_than_days)
+
+
 @router.delete("/{notification_id}")
 async def delete_notification(
     notification_id: str,
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends
 from supabase import Client
-from app.schemas.prediction import PredictionCreate, PredictionResponse
+from app.schemas.prediction import PredictionCreate, PredictionResponse, PredictionBatchResponse
 from app.services.prediction_service import PredictionService
 from app.repositories.prediction_repository import PredictionRepository
-from app.repositories.server_repository import ServerRepository
+from app.repositories.factory import server_repository
 from app.database.supabase import get_supabase
 
 router = APIRouter()
@@ -12,7 +12,7 @@ router = APIRouter()
 def get_prediction_service(supabase: Client = Depends(get_supabase)) -> PredictionService:
     """Dependency to get PredictionService instance"""
     prediction_repo = PredictionRepository(supabase)
-    server_repo = ServerRepository(supabase)
+    server_repo = server_repository(supabase)
     return PredictionService(prediction_repo, server_repo)
 
 
@@ -32,4 +32,21 @@ async def create_prediction(
     
     ⚠️ In production, this should require AI service authentication token
     """
-    return await prediction_service.create_prediction(prediction_data)
\ No newline at end of file
+    return await prediction_service.create_prediction(prediction_data)
+
+
+@router.post("/batch", response_model=PredictionBatchResponse, status_code=201)
+async def create_predictions_batch(
+    predictions: list[PredictionCreate],
+    prediction_service: PredictionService = Depends(get_prediction_service)
+):
+    """
+    **Create many predictions at once (AI Service endpoint)**
+    
+    Send a JSON array of predictions (same fields as POST /api/predictions).
+    Servers are checked with one query and rows are written with one insert.
+    Predictions for unknown servers are skipped and listed in **unknown_server_ids**.
+    
+    ⚠️ In production, this should require AI service authentication token
+    """
+    return await prediction_service.create_predictions(predictions)
@@ -1,41 +1,55 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from supabase import Client
-from app.schemas.server import ServerCreate, ServerUpdate, ServerResponse, ServerListResponse
+from app.schemas.server import ServerCreate, ServerUpdate, ServerResponse, ServerListResponse, ServerDetailResponse
 from app.services.server_service import ServerService
-from app.repositories.server_repository import ServerRepository
+from app.repositories.factory import server_repository, metrics_repository, anomaly_repository
 from app.database.supabase import get_supabase
 from app.core.dependencies import get_current_user_id
+from app.core.etag import compute_etag, conditional_get, server_scope, user_scope
+from app.core.layout import to_columnar
+from app.repositories.metrics_repository import ROW_COLUMNS as METRICS_COLUMNS
 from app.schemas.metrics import MetricsListResponse, MetricsResponse, MetricsSummary
 from app.services.metrics_service import MetricsService
-from app.repositories.metrics_repository import MetricsRepository
 from datetime import datetime
 from typing import Optional
-from app.schemas.anomaly import AnomalyListResponse, AnomalyStats
+from app.schemas.anomaly import AnomalyListResponse, AnomalyStats, AnomalyHistogram, AnomalyHistogramBucket
 from app.schemas.prediction import PredictionResponse, PredictionListResponse
 from app.services.anomaly_service import AnomalyService
 from app.services.prediction_service import PredictionService
-from app.repositories.anomaly_repository import AnomalyRepository
 from app.repositories.prediction_repository import PredictionRepository
+from app.repositories.purge_repository import PurgeRepository
+from app.schemas.purge import PurgeJobResponse
+from app.services.server_detail_service import ServerDetailService, parse_include
 
 router = APIRouter()
 
+# Longest anomaly stats window, on /anomalies/stats and /detail alike
+STATS_MAX_DAYS = 30
+
+
+def stats_window_tag() -> str:
+    """ETag part for anomaly stats: they cover whole UTC days, so the window moves at midnight"""
+    return f"day:{datetime.utcnow().date()}"
+
 
 def get_server_service(supabase: Client = Depends(get_supabase)) -> ServerService:
     """Dependency to get ServerService instance"""
-    server_repo = ServerRepository(supabase)
-    return ServerService(server_repo)
+    server_repo = server_repository(supabase)
+    purge_repo = PurgeRepository(supabase)
+    return ServerService(server_repo, purge_repo)
 def get_metrics_service(supabase: Client = Depends(get_supabase)) -> MetricsService:
     """Dependency to get MetricsService instance"""
-    metrics_repo = MetricsRepository(supabase)
-    server_repo = ServerRepository(supabase)
+    metrics_repo = metrics_repository(supabase)
+    server_repo = server_repository(supabase)
     return MetricsService(metrics_repo, server_repo)
 def get_anomaly_service(supabase: Client = Depends(get_supabase)) -> AnomalyService:
     """Dependency to get AnomalyService instance"""
     from app.repositories.notification_repository import NotificationRepository
     from app.repositories.user_repository import UserRepository
     
-    anomaly_repo = AnomalyRepository(supabase)
-    server_repo = ServerRepository(supabase)
+    anomaly_repo = anomaly_repository(supabase)
+    server_repo = server_repository(supabase)
     notification_repo = NotificationRepository(supabase)
     user_repo = UserRepository(supabase)
     return AnomalyService(anomaly_repo, server_repo, notification_repo, user_repo)
@@ -43,9 +57,18 @@ def get_anomaly_service(supabase: Client = Depends(get_supabase)) -> AnomalyServ
 def get_prediction_service(supabase: Client = Depends(get_supabase)) -> PredictionService:
     """Dependency to get PredictionService instance"""
     prediction_repo = PredictionRepository(supabase)
-    server_repo = ServerRepository(supabase)
+    server_repo = server_repository(supabase)
     return PredictionService(prediction_repo, server_repo)
 
+def get_server_detail_service(supabase: Client = Depends(get_supabase)) -> ServerDetailService:
+    """Dependency to get ServerDetailService instance"""
+    return ServerDetailService(
+        server_repository(supabase),
+        metrics_repository(supabase),
+        anomaly_repository(supabase),
+        PredictionRepository(supabase)
+    )
+
 
 @router.post("", response_model=ServerResponse, status_code=201)
 async def create_server(
@@ -68,6 +91,8 @@ async def create_server(
 
 @router.get("", response_model=ServerListResponse)
 async def get_my_servers(
+    request: Request,
+    response: Response,
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
     user_id: str = Depends(get_current_user_id),
@@ -78,9 +103,16 @@ async def get_my_servers(
     
     Returns paginated list of all servers owned by current user
     
+    Supports conditional requests: send the returned ETag in `If-None-Match`
+    to get `304 Not Modified` when nothing changed
+    
     Requires authentication token
     """
-    return await server_service.get_user_servers(user_id, limit, offset)
+    etag = await compute_etag(request, user_id, user_scope(user_id))
+    return await conditional_get(
+        request, response, etag,
+        lambda: server_service.get_user_servers(user_id, limit, offset)
+    )
 
 
 @router.get("/{server_id}", response_model=ServerResponse)
@@ -119,7 +151,7 @@ async def update_server(
     return await server_service.update_server(server_id, user_id, update_data)
 
 
-@router.delete("/{server_id}")
+@router.delete("/{server_id}", response_model=PurgeJobResponse, status_code=202)
 async def delete_server(
     server_id: str,
     user_id: str = Depends(get_current_user_id),
@@ -128,12 +160,85 @@ async def delete_server(
     """
     **Delete server (PERMANENT)**
     
-    This will also delete all associated metrics, anomalies, and predictions
+    The server is removed right away (its API key stops working). All
+    associated metrics, anomalies, and predictions are then deleted in the
+    background; follow the returned job with GET /{server_id}/purge
+    
+    Requires authentication token
+    """
+    return await server_service.delete_server(server_id, user_id)
+
+
+@router.get("/{server_id}/purge", response_model=PurgeJobResponse)
+async def get_server_purge(
+    server_id: str,
+    user_id: str = Depends(get_current_user_id),
+    server_service: ServerService = Depends(get_server_service)
+):
+    """
+    **Progress of a server deletion**
+    
+    - **status**: pending, running or done
+    - **progress**: rows removed so far, per table
     
     Requires authentication token
     """
-    await server_service.delete_server(server_id, user_id)
-    return {"message": "Server deleted successfully"}
+    return await server_service.get_server_purge(server_id, user_id)
+
+
+@router.get("/{server_id}/detail", response_model=ServerDetailResponse)
+async def get_server_detail(
+    server_id: str,
+    request: Request,
+    response: Response,
+    include: Optional[str] = Query(None, description="Comma-separated sections (default: all)"),
+    metrics_limit: int = Query(default=100, ge=1, le=1000),
+    anomalies_limit: int = Query(default=20, ge=1, le=100),
+    predictions_limit: int = Query(default=10, ge=1, le=100),
+    summary_hours: int = Query(default=24, ge=1, le=168),
+    stats_days: int = Query(default=7, ge=1, le=STATS_MAX_DAYS),
+    horizon: Optional[int] = Query(None, ge=1, description="Forecast points per prediction"),
+    user_id: str = Depends(get_current_user_id),
+    detail_service: ServerDetailService = Depends(get_server_detail_service)
+):
+    """
+    **Get everything the server details page needs in one request**
+    
+    Checks ownership once and fetches all sections concurrently
+    
+    - **include**: Sections to return - metrics, latest_metrics, metrics_summary,
+      anomalies, anomaly_stats, latest_prediction, predictions (default: all)
+    - **metrics_limit** / **anomalies_limit** / **predictions_limit**: Rows per list section
+    - **summary_hours**: Window of the metrics summary (default: 24)
+    - **stats_days**: Window of the anomaly stats (default: 7, max: 30)
+    - **horizon**: Number of forecast points to return (compact forecasts)
+    
+    Supports conditional requests (ETag / If-None-Match)
+    
+    Requires authentication token
+    """
+    sections = parse_include(include)
+    etag = await compute_etag(request, user_id, server_scope(server_id), stats_window_tag())
+    
+    async def produce():
+        result = await detail_service.get_server_detail(
+            server_id=server_id,
+            user_id=user_id,
+            sections=sections,
+            metrics_limit=metrics_limit,
+            anomalies_limit=anomalies_limit,
+            predictions_limit=predictions_limit,
+            summary_hours=summary_hours,
+            stats_days=stats_days,
+            horizon=horizon
+        )
+        # A returned response does not inherit headers set on `response`
+        return ORJSONResponse(result, headers={
+            "ETag": response.headers["ETag"],
+            "Cache-Control": response.headers["Cache-Control"]
+        })
+    
+    return await conditional_get(request, response, etag, produce)
 # ==================== SERVER METRICS ====================
 
 @router.get("/{server_id}/metrics", response_model=MetricsListResponse)
@@ -143,6 +248,7 @@ async def get_server_metrics(
     to_time: Optional[datetime] = Query(None, description="End time filter"),
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
+    layout: str = Query(default="rows", pattern="^(rows|columnar)$"),
     user_id: str = Depends(get_current_user_id),
     metrics_service: MetricsService = Depends(get_metrics_service)
 ):
@@ -154,10 +260,13 @@ async def get_server_metrics(
     - **to_time**: End time (ISO format)
     - **limit**: Number of results
     - **offset**: Pagination offset
+    - **layout**: rows (list of objects, default) or columnar
+      (`metrics` becomes `{"timestamp": [...], "cpu_percent": [...], ...}`)
     
     Requires authentication token
     """
-    return await metrics_service.get_server_metrics(
+    # Rows are serialized straight from the DB shape with orjson
+    result = await metrics_service.get_server_metrics_rows(
         server_id=server_id,
         user_id=user_id,
         from_time=from_time,
@@ -165,11 +274,52 @@ async def get_server_metrics(
         limit=limit,
         offset=offset
     )
+    if layout == "columnar":
+        # server_id is the same on every row and already in the envelope
+        result["metrics"] = to_columnar(
+            result["metrics"], [c for c in METRICS_COLUMNS.split(",") if c != "server_id"]
+        )
+    return ORJSONResponse(result)
+
+
+@router.get("/{server_id}/metrics/export")
+async def export_server_metrics(
+    server_id: str,
+    from_time: Optional[datetime] = Query(None, alias="from", description="Start time (ISO format)"),
+    to_time: Optional[datetime] = Query(None, alias="to", description="End time (ISO format)"),
+    format: str = Query(default="csv", pattern="^(csv|ndjson|parquet)$"),
+    user_id: str = Depends(get_current_user_id),
+    metrics_service: MetricsService = Depends(get_metrics_service)
+):
+    """
+    **Export metrics history for a server**
+    
+    Streams every metrics row in the time range, oldest first, as a file download
+    
+    - **from** / **to**: Time range (ISO format, both optional)
+    - **format**: csv, ndjson or parquet (parquet requires pyarrow on the server)
+    
+    Requires authentication token
+    """
+    stream, media_type, filename = await metrics_service.export_metrics(
+        server_id=server_id,
+        user_id=user_id,
+        format=format,
+        from_time=from_time,
+        to_time=to_time
+    )
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/{server_id}/metrics/latest", response_model=MetricsResponse)
 async def get_latest_metrics(
     server_id: str,
+    request: Request,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
     metrics_service: MetricsService = Depends(get_metrics_service)
 ):
@@ -178,9 +328,15 @@ async def get_latest_metrics(
     
     Returns the most recent metrics data point
     
+    Supports conditional requests (ETag / If-None-Match)
+    
     Requires authentication token
     """
-    return await metrics_service.get_latest_metrics(server_id, user_id)
+    etag = await compute_etag(request, user_id, server_scope(server_id))
+    return await conditional_get(
+        request, response, etag,
+        lambda: metrics_service.get_latest_metrics(server_id, user_id)
+    )
 
 
 @router.get("/{server_id}/metrics/summary", response_model=MetricsSummary)
@@ -223,7 +379,8 @@ async def get_server_anomalies(
     
     Requires authentication token
     """
-    return await anomaly_service.get_server_anomalies(
+    # Rows are serialized straight from the DB shape with orjson
+    result = await anomaly_service.get_server_anomaly_rows(
         server_id=server_id,
         user_id=user_id,
         severity=severity,
@@ -232,12 +389,15 @@ async def get_server_anomalies(
         limit=limit,
         offset=offset
     )
+    return ORJSONResponse(result)
 
 
 @router.get("/{server_id}/anomalies/stats", response_model=AnomalyStats)
 async def get_anomaly_stats(
     server_id: str,
-    days: int = Query(default=7, ge=1, le=30),
+    request: Request,
+    response: Response,
+    days: int = Query(default=7, ge=1, le=STATS_MAX_DAYS),
     user_id: str = Depends(get_current_user_id),
     anomaly_service: AnomalyService = Depends(get_anomaly_service)
 ):
@@ -248,9 +408,44 @@ async def get_anomaly_stats(
     
     - **days**: Number of days to look back (default: 7, max: 30)
     
+    Supports conditional requests (ETag / If-None-Match)
+    
     Requires authentication token
     """
-    return await anomaly_service.get_anomaly_stats(server_id, user_id, days)
+    etag = await compute_etag(request, user_id, server_scope(server_id), stats_window_tag())
+    return await conditional_get(
+        request, response, etag,
+        lambda: anomaly_service.get_anomaly_stats(server_id, user_id, days)
+    )
+
+
+@router.get("/{server_id}/anomalies/histogram", response_model=AnomalyHistogram)
+async def get_anomaly_histogram(
+    server_id: str,
+    bucket: str = Query(default="1h", pattern="^(1h|1d|1w)$", description="Bucket size"),
+    days: int = Query(default=7, ge=1, le=90),
+    layout: str = Query(default="rows", pattern="^(rows|columnar)$"),
+    user_id: str = Depends(get_current_user_id),
+    anomaly_service: AnomalyService = Depends(get_anomaly_service)
+):
+    """
+    **Get anomaly counts over time for a server**
+    
+    Returns one entry per time bucket with counts by severity (for timelines)
+    
+    - **bucket**: Bucket size - 1h, 1d or 1w (default: 1h)
+    - **days**: Number of days to look back (default: 7, max: 90; max 10 for 1h buckets)
+    - **layout**: rows (default) or columnar
+      (`buckets` becomes `{"bucket_start": [...], "critical": [...], ...}`)
+    
+    Requires authentication token
+    """
+    histogram = await anomaly_service.get_anomaly_histogram(server_id, user_id, bucket, days)
+    if layout == "columnar":
+        result = histogram.model_dump(mode="json")
+        result["buckets"] = to_columnar(result["buckets"], AnomalyHistogramBucket.model_fields)
+        return ORJSONResponse(result)
+    return histogram
 
 
 # ==================== SERVER PREDICTIONS ====================
@@ -258,6 +453,11 @@ async def get_anomaly_stats(
 @router.get("/{server_id}/predictions/latest", response_model=PredictionResponse)
 async def get_latest_prediction(
     server_id: str,
+    request: Request,
+    response: Response,
+    metrics: Optional[str] = Query(None, description="Comma-separated metrics to include"),
+    horizon: Optional[int] = Query(None, ge=1, description="Number of forecast points to return"),
+    encoding: str = Query(default="json", pattern="^(json|packed)$"),
     user_id: str = Depends(get_current_user_id),
     prediction_service: PredictionService = Depends(get_prediction_service)
 ):
@@ -266,9 +466,22 @@ async def get_latest_prediction(
     
     Returns the most recent forecast generated by AI
     
+    For compact forecasts:
+    - **metrics**: Only return these metrics (e.g. cpu_percent,ram_percent)
+    - **horizon**: Only return the first N points
+    - **encoding**: json (float lists) or packed (base64 float32 arrays)
+    
+    Supports conditional requests (ETag / If-None-Match)
+    
     Requires authentication token
     """
-    return await prediction_service.get_latest_prediction(server_id, user_id)
+    etag = await compute_etag(request, user_id, server_scope(server_id))
+    return await conditional_get(
+        request, response, etag,
+        lambda: prediction_service.get_latest_prediction(
+            server_id, user_id, metrics, horizon, packed=encoding == "packed"
+        )
+    )
 
 
 @router.get("/{server_id}/predictions", response_model=PredictionListResponse)
@@ -276,6 +489,9 @@ async def get_prediction_history(
     server_id: str,
     limit: int = Query(default=10, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    metrics: Optional[str] = Query(None, description="Comma-separated metrics to include"),
+    horizon: Optional[int] = Query(None, ge=1, description="Number of forecast points to return"),
+    encoding: str = Query(default="json", pattern="^(json|packed)$"),
     user_id: str = Depends(get_current_user_id),
     prediction_service: PredictionService = Depends(get_prediction_service)
 ):
@@ -284,11 +500,16 @@ async def get_prediction_history(
     
     Returns past predictions with pagination
     
+    **metrics**, **horizon** and **encoding** work as for the latest prediction
+    
     Requires authentication token
     """
     return await prediction_service.get_prediction_history(
         server_id=server_id,
         user_id=user_id,
         limit=limit,
-        offset=offset
+        offset=offset,
+        metrics=metrics,
+        horizon=horizon,
+        packed=encoding == "packed"
     )
\ No newline at end of file
@@ -0,0 +1,365 @@
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import orjson
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "invalidate"
+
+# Called with each decoded pub/sub message, or None when messages may have
+# been missed (e.g. after a reconnect)
+MessageHandler = Callable[[Any], None]
+
+# Entries that expire without being read again are removed on the first
+# write after this many seconds, so in-process caches stay bounded
+SWEEP_INTERVAL_SECONDS = 60.0
+
+
+def _drop_expired(entries: Dict[str, Tuple[Optional[float], Any]], now: float) -> None:
+    """Remove (expires_at, value) entries whose expiry has passed"""
+    expired = [key for key, (expires_at, _) in entries.items() if expires_at is not None and expires_at <= now]
+    for key in expired:
+        del entries[key]
+
+
+class CacheBackend(ABC):
+    """
+    Storage and pub/sub behind SharedCache. Values are bytes; keys arrive
+    already prefixed.
+    """
+
+    async def connect(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    async def set_if_absent(self, key: str, value: bytes) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def publish(self, channel: str, message: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """Single-process backend (default); pub/sub only reaches this process"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._handlers: Dict[str, list[MessageHandler]] = {}
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            _drop_expired(self._data, now)
+            self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+        self._data[key] = (now + ttl if ttl else None, value)
+
+    async def set_if_absent(self, key: str, value: bytes) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        expires_at = self._data.get(key, (None, b""))[0]
+        self._data[key] = (expires_at, str(value).encode())
+        return value
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        decoded = orjson.loads(message)
+        for handler in self._handlers.get(channel, []):
+            handler(decoded)
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis-protocol backend shared by every worker (needs the optional
+    `redis` package). Invalidations are broadcast over pub/sub.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._redis = None
+        self._listeners: list[asyncio.Task] = []
+
+    async def connect(self) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        self._redis = redis.from_url(self.url)
+
+    async def close(self) -> None:
+        for task in self._listeners:
+            task.cancel()
+        await asyncio.gather(*self._listeners, return_exceptions=True)
+        self._listeners = []
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self._redis.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def set_if_absent(self, key: str, value: bytes) -> bool:
+        return bool(await self._redis.set(key, value, nx=True))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return await self._redis.incr(key)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self._redis.publish(channel, message)
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(channel)
+        self._listeners.append(
+            asyncio.create_task(self._listen(pubsub, channel, handler), name=f"cache-listen:{channel}")
+        )
+
+    async def _listen(self, pubsub, channel: str, handler: MessageHandler) -> None:
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        handler(orjson.loads(message["data"]))
+            except asyncio.CancelledError:
+                await pubsub.aclose()
+                raise
+            except Exception as e:
+                logger.warning("Cache pub/sub connection lost: %s", e)
+            # Messages may have been missed while disconnected
+            handler(None)
+            await asyncio.sleep(1.0)
+            try:
+                await pubsub.subscribe(channel)
+            except Exception as e:
+                logger.warning("Cache pub/sub resubscribe failed: %s", e)
+
+
+class SharedCache:
+    """
+    JSON cache shared by all workers, with a short-lived local copy in each.
+
+    Reads check the local copy first, then the backend. invalidate() and
+    incr() delete or change the backend value and broadcast the key, so
+    every worker drops its local copy. The local TTL bounds staleness if a
+    broadcast is missed. Backend errors are logged and treated as misses,
+    so the cache never fails a request.
+    """
+
+    def __init__(self, backend: CacheBackend, prefix: str, local_ttl: float):
+        self.backend = backend
+        self.prefix = prefix
+        self.local_ttl = local_ttl
+        self._local: Dict[str, Tuple[float, Any]] = {}
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+        self._stats = {
+            "local_hits": 0,
+            "hits": 0,
+            "misses": 0,
+            "errors": 0,
+            "invalidations": 0,
+        }
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def start(self) -> None:
+        """Connect and listen for invalidations (called from the app lifespan)"""
+        await self.backend.connect()
+        await self.subscribe(INVALIDATION_CHANNEL, self._on_invalidate)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def _on_invalidate(self, keys: Optional[list[str]]) -> None:
+        if keys is None:
+            self._local.clear()
+            return
+        for key in keys:
+            self._local.pop(key, None)
+
+    def _remember(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        local_ttl = min(ttl, self.local_ttl) if ttl else self.local_ttl
+        if local_ttl > 0:
+            now = time.monotonic()
+            if now >= self._next_sweep:
+                _drop_expired(self._local, now)
+                self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+            self._local[key] = (now + local_ttl, value)
+
+    async def get(self, key: str) -> Any:
+        entry = self._local.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._stats["local_hits"] += 1
+                return entry[1]
+            del self._local[key]
+
+        try:
+            data = await self.backend.get(self._key(key))
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning("Cache get %s failed: %s", key, e)
+            return None
+
+        if data is None:
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        value = orjson.loads(data)
+        self._remember(key, value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        try:
+            await self.backend.set(self._key(key), orjson.dumps(value), ttl)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning("Cache set %s failed: %s", key, e)
+            return
+        self._remember(key, value, ttl)
+
+    async def set_if_absent(self, key: str, value: Any) -> bool:
+        try:
+            return await self.backend.set_if_absent(self._key(key), orjson.dumps(value))
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning("Cache set %s failed: %s", key, e)
+            return False
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """Cached value for key, calling loader() on a miss. None results are not cached."""
+        value = await self.get(key)
+        if value is None:
+            value = await loader()
+            if value is not None:
+                await self.set(key, value, ttl)
+        return value
+
+    async def incr(self, key: str) -> int:
+        value = await self.backend.incr(self._key(key))
+        self._local.pop(key, None)
+        await self._broadcast([key])
+        return value
+
+    async def invalidate(self, *keys: str) -> None:
+        """Remove keys from the backend and from every worker's local copy"""
+        if not keys:
+            return
+        for key in keys:
+            self._local.pop(key, None)
+        self._stats["invalidations"] += len(keys)
+        try:
+            await self.backend.delete(*(self._key(key) for key in keys))
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning("Cache delete failed: %s", e)
+        await self._broadcast(list(keys))
+
+    async def _broadcast(self, keys: list[str]) -> None:
+        await self.publish(INVALIDATION_CHANNEL, keys)
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        """Call handler with every message published on channel by any worker"""
+        await self.backend.subscribe(self._key(channel), handler)
+
+    async def publish(self, channel: str, message: Any) -> bool:
+        """Send a JSON message to every worker's subscribers; False if it could not be sent"""
+        try:
+            await self.backend.publish(self._key(channel), orjson.dumps(message))
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning("Cache publish on %s failed: %s", channel, e)
+            return False
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "local_entries": len(self._local),
+            **self._stats,
+        }
+
+
+def _create_shared_cache() -> SharedCache:
+    settings = get_settings()
+    if settings.CACHE_BACKEND == "redis":
+        backend = RedisBackend(settings.REDIS_URL)
+    else:
+        backend = MemoryBackend()
+    return SharedCache(backend, settings.CACHE_KEY_PREFIX, settings.CACHE_LOCAL_TTL_SECONDS)
+
+
+# Global instance
+shared_cache = _create_shared_cache()
+
+
+def active_user_cache_key(user_id: str) -> str:
+    """Cache key for whether a token's account still exists (not soft-deleted)"""
+    return f"user-active:{user_id}"
+
+
+def api_key_cache_key(api_key: str) -> str:
+    """Cache key for the server behind an API key (the key itself is not stored)"""
+    return f"apikey:{hashlib.sha256(api_key.encode()).hexdigest()}"
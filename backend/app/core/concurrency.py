@@ -0,0 +1,28 @@
+import asyncio
+from typing import Any, Awaitable, Optional
+from app.config import get_settings
+from app.core.exceptions import GatewayTimeoutException
+
+settings = get_settings()
+
+
+async def gather_with_timeout(
+    *aws: Awaitable[Any],
+    timeout: Optional[float] = None
+) -> list:
+    """
+    Run independent awaitables concurrently, each bounded by its own timeout.
+    If one fails or times out, the others are cancelled and the error is raised.
+    """
+    if timeout is None:
+        timeout = settings.QUERY_TIMEOUT_SECONDS
+    
+    tasks = [asyncio.ensure_future(asyncio.wait_for(aw, timeout)) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except asyncio.TimeoutError:
+        raise GatewayTimeoutException(detail="Database query timed out")
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -1,10 +1,29 @@
-from fastapi import Depends, Header
+from fastapi import Depends, Header, Query
 from typing import Optional
+from app.config import get_settings
+from app.core.cache import shared_cache, active_user_cache_key
 from app.core.security import decode_access_token
 from app.core.exceptions import UnauthorizedException
 from app.database.supabase import get_supabase
+from app.repositories.user_repository import UserRepository
 from supabase import Client
 
+settings = get_settings()
+
+
+async def _require_active_user(supabase: Client, user_id: str) -> None:
+    """
+    Reject tokens of deleted accounts. The lookup is cached; delete_account
+    invalidates it, so a deleted account's token stops working at once.
+    """
+    active = await shared_cache.get_or_load(
+        active_user_cache_key(user_id),
+        lambda: UserRepository(supabase).is_active(user_id),
+        ttl=settings.ACTIVE_USER_CACHE_TTL_SECONDS
+    )
+    if not active:
+        raise UnauthorizedException(detail="Account no longer exists")
+
 
 async def get_current_user_id(
     authorization: Optional[str] = Header(None),
@@ -33,6 +52,7 @@ async def get_current_user_id(
     if not user_id:
         raise UnauthorizedException(detail="Invalid token payload")
     
+    await _require_active_user(supabase, user_id)
     return user_id
 
 
@@ -56,4 +76,33 @@ async def get_optional_user_id(
     if not payload:
         return None
     
-    return payload.get("sub")
\ No newline at end of file
+    return payload.get("sub")
+
+
+def user_id_from_token(token: Optional[str]) -> Optional[str]:
+    """user_id from a raw access token, or None if it is missing or invalid"""
+    if not token:
+        return None
+    
+    payload = decode_access_token(token)
+    if not payload:
+        return None
+    
+    return payload.get("sub")
+
+
+async def get_stream_user_id(
+    token: Optional[str] = Query(None, description="Access token (browsers cannot set headers on EventSource)"),
+    authorization: Optional[str] = Header(None),
+    supabase: Client = Depends(get_supabase)
+) -> str:
+    """
+    Authentication for streaming endpoints: Authorization header, or the
+    token in the query string
+    """
+    user_id = await get_optional_user_id(authorization) or user_id_from_token(token)
+    if not user_id:
+        raise UnauthorizedException(detail="Invalid or missing token")
+    
+    await _require_active_user(supabase, user_id)
+    return user_id
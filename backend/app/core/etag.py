@@ -0,0 +1,101 @@
+import hashlib
+import hmac
+import logging
+import secrets
+from typing import Any, Awaitable, Callable
+from fastapi import Request, Response, status
+from app.config import get_settings
+from app.core.cache import SharedCache, shared_cache
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def server_scope(server_id: str) -> str:
+    """Version scope for data that belongs to one server (metrics, anomalies, predictions)"""
+    return f"server:{server_id}"
+
+
+def user_scope(user_id: str) -> str:
+    """Version scope for a user's server list"""
+    return f"user:{user_id}"
+
+
+class VersionStore:
+    """
+    Version stamps per scope, bumped on every write to that scope.
+
+    Stamps live in the shared cache, so all workers agree on them and a
+    bump in one worker changes the ETag served by every other. The epoch is
+    created when the cache has none (new process with the memory backend,
+    or an emptied Redis), so ETags from before never match.
+    """
+
+    EPOCH_KEY = "etag:epoch"
+
+    def __init__(self, cache: SharedCache):
+        self.cache = cache
+
+    async def _epoch(self) -> str:
+        epoch = await self.cache.get(self.EPOCH_KEY)
+        if epoch is None:
+            await self.cache.set_if_absent(self.EPOCH_KEY, secrets.token_hex(4))
+            epoch = await self.cache.get(self.EPOCH_KEY)
+        # Cache unreachable: a fresh value never matches, so clients get a 200
+        return epoch or secrets.token_hex(4)
+
+    async def get(self, scope: str) -> str:
+        version = await self.cache.get(f"etag:{scope}")
+        return f"{await self._epoch()}.{version or 0}"
+
+    async def bump(self, *scopes: str) -> None:
+        for scope in scopes:
+            try:
+                await self.cache.incr(f"etag:{scope}")
+            except Exception as e:
+                logger.warning("Failed to bump version of %s: %s", scope, e)
+
+
+# Global instance
+version_store = VersionStore(shared_cache)
+
+
+async def compute_etag(request: Request, user_id: str, *scopes: str) -> str:
+    """
+    ETag for a read endpoint: the request path and query, the caller and the
+    current version of every scope the response depends on. It is an HMAC,
+    so a client cannot forge the ETag of a resource it was never served.
+    """
+    versions = ",".join([f"{scope}={await version_store.get(scope)}" for scope in scopes])
+    key = f"{user_id}|{request.url.path}|{request.url.query}|{versions}"
+    digest = hmac.new(settings.SECRET_KEY.encode(), key.encode(), hashlib.sha256).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # "*" is not honoured: a 304 must never be served without a prior 200
+    return etag in (tag.strip() for tag in header.split(","))
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    etag: str,
+    producer: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Answer 304 Not Modified when the client already has this version,
+    otherwise run the producer and attach the ETag to its response.
+    """
+    if _matches(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+        )
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return await producer()
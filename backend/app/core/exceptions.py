@@ -27,4 +27,9 @@ class BadRequestException(HTTPException):
 
 class ConflictException(HTTPException):
     def __init__(self, detail: str = "Resource already exists"):
-        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
\ No newline at end of file
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class GatewayTimeoutException(HTTPException):
+    def __init__(self, detail: str = "Upstream request timed out"):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=detail)
@@ -0,0 +1,91 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator
+import orjson
+from app.core.exceptions import BadRequestException
+
+# Streaming encoders for bulk exports. Each takes an async iterator of row
+# pages (lists of dicts) and yields encoded bytes page by page, so memory use
+# does not depend on the size of the export.
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+async def encode_csv(pages: AsyncIterator[list[dict]], columns: list[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    async for rows in pages:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def encode_ndjson(pages: AsyncIterator[list[dict]], columns: list[str]) -> AsyncIterator[bytes]:
+    async for rows in pages:
+        # Same fields, in the same order, as the CSV columns
+        yield b"".join(
+            orjson.dumps({column: row.get(column) for column in columns}, option=orjson.OPT_APPEND_NEWLINE)
+            for row in rows
+        )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last take()"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def require_parquet() -> None:
+    """Parquet export needs the optional pyarrow dependency"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise BadRequestException(detail="Parquet export is not available (pyarrow is not installed)")
+
+
+async def encode_parquet(pages: AsyncIterator[list[dict]], schema) -> AsyncIterator[bytes]:
+    """Write one Parquet row group per page; `schema` is a pyarrow schema"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    timestamp_columns = [f.name for f in schema if pa.types.is_timestamp(f.type)]
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for rows in pages:
+            for row in rows:
+                for column in timestamp_columns:
+                    if isinstance(row.get(column), str):
+                        row[column] = datetime.fromisoformat(row[column])
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
@@ -0,0 +1,107 @@
+import base64
+import sys
+from array import array
+from datetime import datetime
+from typing import Iterable, Optional
+
+# Stored forecast layout:
+# {
+#   "format": "compact/v1",
+#   "start": "<ISO timestamp of the first point>",
+#   "step": <seconds between points>,
+#   "length": <points per series>,
+#   "metrics": {"<metric>": {"yhat": "<b64>", "lower": "<b64>", "upper": "<b64>"}}
+# }
+# Each series is a little-endian float32 array encoded as base64.
+COMPACT_FORMAT = "compact/v1"
+SERIES_FIELDS = ("yhat", "lower", "upper")
+
+# 3 float32 values = 12 bytes = 16 base64 chars, so series can be sliced
+# on the encoded string without decoding the rest
+_VALUES_PER_CHUNK = 3
+_CHARS_PER_CHUNK = 16
+
+
+def is_compact(forecast) -> bool:
+    return isinstance(forecast, dict) and forecast.get("format") == COMPACT_FORMAT
+
+
+def _pack(values: Iterable[float]) -> str:
+    data = array("f", values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return base64.b64encode(data.tobytes()).decode("ascii")
+
+
+def _unpack(encoded: str, horizon: Optional[int] = None) -> list[float]:
+    if horizon is not None:
+        chunks = -(-horizon // _VALUES_PER_CHUNK)
+        encoded = encoded[:chunks * _CHARS_PER_CHUNK]
+    data = array("f")
+    data.frombytes(base64.b64decode(encoded))
+    if sys.byteorder == "big":
+        data.byteswap()
+    values = data.tolist()
+    return values[:horizon] if horizon is not None else values
+
+
+def encode_forecast(start: datetime, step: int, metrics: dict) -> dict:
+    """Pack {metric: {"yhat": [...], "lower": [...], "upper": [...]}} into the stored layout"""
+    length = 0
+    packed = {}
+    for name, series in metrics.items():
+        packed[name] = {
+            field: _pack(series[field])
+            for field in SERIES_FIELDS
+            if series.get(field) is not None
+        }
+        length = max(length, len(series["yhat"]))
+
+    return {
+        "format": COMPACT_FORMAT,
+        "start": start.isoformat(),
+        "step": step,
+        "length": length,
+        "metrics": packed,
+    }
+
+
+def slice_forecast(
+    forecast: dict,
+    metrics: Optional[list[str]] = None,
+    horizon: Optional[int] = None,
+    decode: bool = True
+) -> dict:
+    """
+    Select metrics and the first `horizon` points of a compact forecast.
+    With decode=False the series stay base64-encoded float32 (smallest payload).
+    """
+    selected = forecast["metrics"]
+    if metrics:
+        selected = {name: selected[name] for name in metrics if name in selected}
+
+    length = forecast.get("length", 0)
+    if horizon is not None:
+        length = min(length, horizon)
+
+    if decode:
+        series = {
+            name: {field: _unpack(encoded, horizon) for field, encoded in fields.items()}
+            for name, fields in selected.items()
+        }
+    elif horizon is not None:
+        series = {
+            name: {field: _pack(_unpack(encoded, horizon)) for field, encoded in fields.items()}
+            for name, fields in selected.items()
+        }
+    else:
+        series = selected
+
+    return {
+        "format": COMPACT_FORMAT,
+        "encoding": "json" if decode else "float32-base64",
+        "start": forecast["start"],
+        "step": forecast["step"],
+        "length": length,
+        "metrics": series,
+    }
@@ -0,0 +1,12 @@
+from typing import Iterable, Optional
+
+
+def to_columnar(rows: list[dict], columns: Optional[Iterable[str]] = None) -> dict[str, list]:
+    """
+    Pivot a list of row objects into one list per column:
+    [{"a": 1, "b": 2}, {"a": 3, "b": 4}] -> {"a": [1, 3], "b": [2, 4]}
+    Field names are sent once instead of on every row.
+    """
+    if columns is None:
+        columns = rows[0].keys() if rows else []
+    return {column: [row.get(column) for row in rows] for column in columns}
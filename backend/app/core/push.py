@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+from app.config import get_settings
+from app.core.cache import SharedCache, shared_cache
+
+logger = logging.getLogger(__name__)
+
+PUSH_CHANNEL = "push"
+
+# Sent instead of the events a slow or disconnected listener missed; the
+# client should refetch its notifications and unread count
+RESYNC_EVENT = {"type": "resync"}
+
+
+def presence_key(user_id: str) -> str:
+    return f"push:online:{user_id}"
+
+
+def notification_event(notification: dict) -> dict:
+    return {"type": "notification", "notification": notification}
+
+
+def unread_count_event(unread_count: int) -> dict:
+    return {"type": "unread_count", "unread_count": unread_count}
+
+
+class PushHub:
+    """
+    Per-user event fan-out for the notification stream endpoints.
+
+    Each open WebSocket/SSE connection gets a bounded queue. publish() sends
+    the event over the shared cache pub/sub, so it reaches the user's
+    connections on every worker (with the memory backend, only this one).
+    A connection that falls behind has its queue replaced by one resync
+    event instead of blocking the publisher.
+
+    Connections also keep a presence key alive in the shared cache, so
+    writers can skip building events (e.g. an unread count query) for
+    users that have no stream open anywhere.
+    """
+
+    def __init__(self, cache: SharedCache, queue_size: int, presence_ttl: float):
+        self.cache = cache
+        self.queue_size = queue_size
+        self.presence_ttl = presence_ttl
+        self._subscribers: Dict[str, set[asyncio.Queue]] = {}
+        self._marked_online: Dict[str, float] = {}
+        self._stats = {
+            "published": 0,
+            "delivered": 0,
+            "resyncs": 0,
+        }
+
+    async def start(self) -> None:
+        """Listen for events from all workers (called from the app lifespan, after the cache)"""
+        await self.cache.subscribe(PUSH_CHANNEL, self._on_message)
+
+    @asynccontextmanager
+    async def connect(self, user_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Register a connection for user_id; yields the queue its events arrive on"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        await self.mark_online(user_id)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+                    self._marked_online.pop(user_id, None)
+
+    async def mark_online(self, user_id: str) -> None:
+        """Refresh the user's presence key"""
+        await self.cache.set(presence_key(user_id), True, ttl=self.presence_ttl)
+        self._marked_online[user_id] = time.monotonic()
+    
+    async def refresh_presence(self, user_id: str) -> None:
+        """
+        Refresh the presence key once half its TTL has passed. Connections
+        call this before every wait for an event, so presence stays alive
+        during a steady event stream as well as on idle keepalives.
+        """
+        marked = self._marked_online.get(user_id)
+        if marked is None or time.monotonic() - marked >= self.presence_ttl / 2:
+            await self.mark_online(user_id)
+
+    async def is_online(self, user_id: str) -> bool:
+        """Whether the user may have a stream open on any worker"""
+        if user_id in self._subscribers:
+            return True
+        return bool(await self.cache.get(presence_key(user_id)))
+
+    async def publish(self, user_id: str, *events: dict) -> None:
+        """Send events to every open connection of user_id, on all workers"""
+        if not events:
+            return
+        self._stats["published"] += len(events)
+        message = {"user_id": user_id, "events": list(events)}
+        if not await self.cache.publish(PUSH_CHANNEL, message):
+            # Backend unavailable - at least reach this worker's connections
+            self._on_message(message)
+
+    def _on_message(self, message: Optional[Dict[str, Any]]) -> None:
+        if message is None:
+            # Events may have been missed while the pub/sub link was down
+            for queues in self._subscribers.values():
+                for queue in queues:
+                    self._resync(queue)
+            return
+
+        for queue in self._subscribers.get(message["user_id"], ()):
+            for event in message["events"]:
+                try:
+                    queue.put_nowait(event)
+                    self._stats["delivered"] += 1
+                except asyncio.QueueFull:
+                    self._resync(queue)
+                    break
+
+    def _resync(self, queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC_EVENT)
+        self._stats["resyncs"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._subscribers),
+            "connections": sum(len(queues) for queues in self._subscribers.values()),
+            **self._stats,
+        }
+
+
+def _create_push_hub() -> PushHub:
+    settings = get_settings()
+    return PushHub(
+        shared_cache,
+        queue_size=settings.PUSH_QUEUE_SIZE,
+        presence_ttl=settings.PUSH_PRESENCE_TTL_SECONDS
+    )
+
+
+# Global instance
+push_hub = _create_push_hub()
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Tuple
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent reads.
+
+    While a call for (name, args) is in flight, further calls with the same
+    name and arguments await the same task instead of running their own
+    query. Nothing is cached: once the task finishes the next call runs a
+    fresh query. Only names listed in `enabled` are coalesced.
+    """
+
+    def __init__(self, enabled: Iterable[str]):
+        self.enabled = set(enabled)
+        self._inflight: Dict[Tuple[str, Tuple[Hashable, ...]], asyncio.Future] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, name: str, fn: Callable[..., Awaitable[Any]], *args: Hashable) -> Any:
+        """Run fn(*args), sharing the result with identical calls already in flight"""
+        if name not in self.enabled:
+            return await fn(*args)
+
+        stats = self._stats.setdefault(name, {"calls": 0, "collapsed": 0})
+        stats["calls"] += 1
+
+        key = (name, args)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            stats["collapsed"] += 1
+
+        # Shielded, so one caller disconnecting does not cancel the query for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("Coalesced call %s failed: %s", key[0], task.exception())
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "methods": {name: dict(counts) for name, counts in self._stats.items()},
+        }
+
+
+# Global instance
+single_flight = SingleFlight(get_settings().SINGLE_FLIGHT_METHODS)
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+Job = Tuple[Callable[..., Awaitable[Any]], tuple]
+
+# Queues the app submits to; TASK_QUEUE_WORKERS overrides their worker counts
+DEFAULT_QUEUE_WORKERS = {"email": 2, "notifications": 4, "cache": 2}
+
+
+class _TaskQueue:
+    """One named queue with its own workers and counters"""
+
+    def __init__(self, name: str, workers: int, max_size: int):
+        self.name = name
+        self.workers = workers
+        self.max_size = max_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: list[asyncio.Task] = []
+        self.running = 0
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retries": 0,
+            "rejected": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+        }
+
+
+class TaskSupervisor:
+    """
+    Bounded background work for request handlers.
+
+    Work is submitted to a named queue ("email", "notifications", "cache")
+    and run by that queue's fixed pool of workers, so a burst can never
+    start more than `workers` coroutines per queue. Failed tasks are retried
+    with exponential backoff and then logged; every queue counts
+    submissions, rejections, failures and task durations. Unlike a bare
+    asyncio.create_task(), pending work is awaited by drain() on shutdown.
+    """
+
+    def __init__(
+        self,
+        queues: Dict[str, int],
+        max_size: int,
+        max_retries: int,
+        retry_backoff: float
+    ):
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queues = {
+            name: _TaskQueue(name, workers, max_size)
+            for name, workers in queues.items()
+        }
+        self._accepting = False
+
+    def start(self) -> None:
+        """Start the worker pools (called from the app lifespan)"""
+        if self._accepting:
+            return
+        for queue in self._queues.values():
+            queue.queue = asyncio.Queue(maxsize=queue.max_size)
+            queue.tasks = [
+                asyncio.create_task(self._worker(queue), name=f"tasks-{queue.name}-{i}")
+                for i in range(queue.workers)
+            ]
+        self._accepting = True
+
+    def submit(self, queue_name: str, fn: Callable[..., Awaitable[Any]], *args: Any) -> bool:
+        """
+        Queue fn(*args) on the named queue.
+        Returns False if the supervisor is not running or the queue is full;
+        the caller decides whether to drop the work or run it itself.
+        """
+        queue = self._queues[queue_name]
+        if not self._accepting:
+            return False
+
+        try:
+            queue.queue.put_nowait((fn, args))
+        except asyncio.QueueFull:
+            queue.stats["rejected"] += 1
+            logger.warning("Task queue %s full, rejecting %s", queue_name, fn.__qualname__)
+            return False
+
+        queue.stats["submitted"] += 1
+        return True
+
+    async def submit_or_run(self, queue_name: str, fn: Callable[..., Awaitable[Any]], *args: Any) -> None:
+        """Queue fn(*args), or await it here when it cannot be queued (back-pressure)"""
+        if not self.submit(queue_name, fn, *args):
+            await fn(*args)
+
+    async def _run(self, queue: _TaskQueue, job: Job) -> None:
+        """Run one task, retrying with exponential backoff"""
+        fn, args = job
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                await fn(*args)
+                queue.stats["completed"] += 1
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    queue.stats["failed"] += 1
+                    logger.error(
+                        "Task %s on queue %s failed after %d attempts: %s",
+                        fn.__qualname__, queue.name, attempt + 1, e
+                    )
+                    break
+                queue.stats["retries"] += 1
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        queue.stats["total_ms"] += elapsed_ms
+        queue.stats["max_ms"] = max(queue.stats["max_ms"], elapsed_ms)
+
+    async def _worker(self, queue: _TaskQueue) -> None:
+        while True:
+            job = await queue.queue.get()
+            queue.running += 1
+            try:
+                await self._run(queue, job)
+            finally:
+                queue.running -= 1
+                queue.queue.task_done()
+
+    async def drain(self, timeout: float) -> None:
+        """Stop accepting work, wait for queued tasks (up to timeout in total), then stop the workers"""
+        if not self._accepting:
+            return
+
+        self._accepting = False
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        for queue in self._queues.values():
+            try:
+                await asyncio.wait_for(queue.queue.join(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Task queue %s drain timed out with %d tasks left",
+                    queue.name, queue.queue.qsize() + queue.running
+                )
+
+        for queue in self._queues.values():
+            for task in queue.tasks:
+                task.cancel()
+            await asyncio.gather(*queue.tasks, return_exceptions=True)
+            queue.tasks = []
+
+    def stats(self) -> dict:
+        """Depth, throughput and task duration per queue"""
+        stats = {}
+        for name, queue in self._queues.items():
+            counts = dict(queue.stats)
+            finished = counts["completed"] + counts["failed"]
+            total_ms = counts.pop("total_ms")
+            max_ms = counts.pop("max_ms")
+            stats[name] = {
+                "depth": queue.queue.qsize() if queue.queue else 0,
+                "running": queue.running,
+                "workers": len(queue.tasks),
+                "max_size": queue.max_size,
+                **counts,
+                "avg_ms": round(total_ms / finished, 1) if finished else 0.0,
+                "max_ms": round(max_ms, 1),
+            }
+        return stats
+
+
+def _create_task_supervisor() -> TaskSupervisor:
+    settings = get_settings()
+    return TaskSupervisor(
+        # An override that lists only some queues keeps the others at their defaults
+        queues={**DEFAULT_QUEUE_WORKERS, **settings.TASK_QUEUE_WORKERS},
+        max_size=settings.TASK_QUEUE_SIZE,
+        max_retries=settings.TASK_MAX_RETRIES,
+        retry_backoff=settings.TASK_RETRY_BACKOFF_SECONDS
+    )
+
+
+# Global instance
+task_supervisor = _create_task_supervisor()
@@ -0,0 +1,99 @@
+from datetime import date, datetime, timezone
+from typing import Optional
+from uuid import UUID
+import orjson
+from app.config import get_settings
+
+settings = get_settings()
+
+
+async def _init_connection(conn) -> None:
+    """Decode json/jsonb to Python objects, like PostgREST does"""
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            schema="pg_catalog",
+            encoder=lambda value: orjson.dumps(value).decode(),
+            decoder=orjson.loads
+        )
+
+
+class PostgresPool:
+    """
+    asyncpg connection pool for DATA_BACKEND=postgres (needs the optional
+    asyncpg package). Statements are prepared and cached per connection.
+    """
+    _pool = None
+
+    @classmethod
+    async def start(cls) -> None:
+        """Open the pool (called from the app lifespan)"""
+        if cls._pool is not None or settings.DATA_BACKEND != "postgres":
+            return
+        try:
+            import asyncpg
+        except ImportError:
+            raise RuntimeError("DATA_BACKEND=postgres requires the asyncpg package")
+        if not settings.DATABASE_URL:
+            raise RuntimeError("DATA_BACKEND=postgres requires DATABASE_URL")
+        cls._pool = await asyncpg.create_pool(
+            settings.DATABASE_URL,
+            min_size=settings.DATABASE_POOL_MIN_SIZE,
+            max_size=settings.DATABASE_POOL_MAX_SIZE,
+            command_timeout=settings.QUERY_TIMEOUT_SECONDS,
+            init=_init_connection
+        )
+
+    @classmethod
+    async def close(cls) -> None:
+        if cls._pool is not None:
+            await cls._pool.close()
+            cls._pool = None
+
+    @classmethod
+    def stats(cls) -> dict:
+        if cls._pool is None:
+            return {"backend": settings.DATA_BACKEND}
+        return {
+            "backend": settings.DATA_BACKEND,
+            "size": cls._pool.get_size(),
+            "idle": cls._pool.get_idle_size(),
+            "max_size": cls._pool.get_max_size(),
+        }
+
+    @classmethod
+    def get_pool(cls):
+        if cls._pool is None:
+            raise RuntimeError("Postgres pool is not started")
+        return cls._pool
+
+
+def _json_value(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def record_to_row(record) -> dict:
+    """A row in the PostgREST JSON shape (uuid and timestamps as strings)"""
+    return {key: _json_value(value) for key, value in record.items()}
+
+
+def parse_uuid(value) -> Optional[UUID]:
+    """UUID for a path/query id, or None if it is not one (PostgREST would reject it)"""
+    try:
+        return value if isinstance(value, UUID) else UUID(str(value))
+    except ValueError:
+        return None
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Timezone-aware datetime for a timestamptz parameter. asyncpg reads naive
+    datetimes in the server process's local time; naive values here are UTC.
+    """
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
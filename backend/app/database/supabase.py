@@ -1,3 +1,6 @@
+import asyncio
+from json import JSONDecodeError
+from postgrest import APIError
 from supabase import create_client, Client
 from app.config import get_settings
 
@@ -19,4 +22,40 @@ class SupabaseClient:
 
 def get_supabase() -> Client:
     """Dependency for FastAPI routes"""
-    return SupabaseClient.get_client()
\ No newline at end of file
+    return SupabaseClient.get_client()
+
+
+async def run_query(query):
+    """
+    Execute a PostgREST query builder without blocking the event loop.
+    The supabase client is synchronous, so the HTTP call runs in a worker thread.
+    """
+    return await asyncio.to_thread(query.execute)
+
+
+def _execute_for_count(query) -> int:
+    response = query.session.request(
+        query.http_method,
+        query.path,
+        json=query.json,
+        params=query.params,
+        headers=query.headers,
+    )
+    if not 200 <= response.status_code <= 299:
+        try:
+            raise APIError(response.json())
+        except JSONDecodeError:
+            raise APIError({"message": response.text, "code": str(response.status_code)})
+    content_range = response.headers.get("content-range", "")
+    total = content_range.rpartition("/")[2]
+    return int(total) if total.isdigit() else 0
+
+
+async def run_count_query(query) -> int:
+    """
+    Execute a write built with count=CountMethod.exact and
+    returning=ReturnMethod.minimal, and return the affected row count.
+    PostgREST sends the count in Content-Range with an empty body, which
+    query.execute() reports as count=0, so the request is sent directly.
+    """
+    return await asyncio.to_thread(_execute_for_count, query)
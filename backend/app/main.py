@@ -1,13 +1,61 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from app.config import get_settings
+from app.services.notification_queue import notification_queue
+from app.services.email_service import email_service
+from app.services.alert_digest import alert_digest
+from app.services.incident_grouper import incident_grouper
+from app.services.server_sweeper import server_sweeper
+from app.services.partition_maintainer import partition_maintainer
+from app.services.notification_retention import notification_retention
+from app.services.purge_worker import purge_worker
+from app.core.singleflight import single_flight
+from app.core.cache import shared_cache
+from app.core.push import push_hub
+from app.core.tasks import task_supervisor
+from app.database.postgres import PostgresPool
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: shared cache and database pool, then background workers
+    await shared_cache.start()
+    await push_hub.start()
+    await PostgresPool.start()
+    task_supervisor.start()
+    notification_queue.start()
+    email_service.start()
+    alert_digest.start()
+    incident_grouper.start()
+    server_sweeper.start()
+    partition_maintainer.start()
+    notification_retention.start()
+    purge_worker.start()
+    yield
+    # Shutdown: flush pending work before the process exits
+    await server_sweeper.drain()
+    await partition_maintainer.drain()
+    await notification_retention.drain()
+    await purge_worker.drain()
+    await incident_grouper.drain()
+    # Notification batches are written on the supervisor - hand them over first
+    await notification_queue.drain(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    await task_supervisor.drain(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    await alert_digest.drain()
+    await email_service.drain(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    await PostgresPool.close()
+    await shared_cache.close()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # CORS Middleware
@@ -19,6 +67,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses for clients that send Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
 
 @app.get("/")
 async def root():
@@ -34,6 +85,26 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/queues")
+async def queue_stats():
+    """Background queue depth and throughput counters"""
+    return {
+        "tasks": task_supervisor.stats(),
+        "notifications": notification_queue.stats(),
+        "email": email_service.stats(),
+        "alert_digest": alert_digest.stats(),
+        "incidents": incident_grouper.stats(),
+        "server_sweeper": server_sweeper.stats(),
+        "metrics_partitions": partition_maintainer.stats(),
+        "notification_retention": notification_retention.stats(),
+        "purge": purge_worker.stats(),
+        "single_flight": single_flight.stats(),
+        "cache": shared_cache.stats(),
+        "push": push_hub.stats(),
+        "database": PostgresPool.stats()
+    }
+
+
 # ==================== INCLUDE ALL ROUTERS ====================
 # Import all controllers
 from app.controllers import (
@@ -14,6 +14,8 @@ class Anomaly(BaseModel):
     explanation: str
     metrics: dict  # JSON data of metrics at time of anomaly
     created_at: datetime
+    occurrence_count: int = 1  # Detections grouped into this anomaly (incident)
+    last_seen: Optional[datetime] = None  # Most recent grouped detection
     
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,21 @@
+from datetime import datetime
+from pydantic import BaseModel
+from uuid import UUID
+from typing import Optional
+
+
+class PurgeJob(BaseModel):
+    """Domain model for the background purge of a deleted server or user"""
+    id: UUID
+    entity_type: str
+    entity_id: UUID
+    owner_id: UUID
+    status: str
+    progress: dict
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -1,14 +1,30 @@
 from typing import Optional, List
 from supabase import Client
+from postgrest.types import ReturnMethod
+from app.database.supabase import run_query
 from app.models.anomaly import Anomaly
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 
+SEVERITIES = ("critical", "high", "medium", "low")
+
+# Explicit column list matching the Anomaly model (fast serialization path)
+ROW_COLUMNS = ",".join(Anomaly.model_fields)
+
+# Histogram bucket sizes -> Postgres date_trunc field
+HISTOGRAM_BUCKETS = {"1h": "hour", "1d": "day", "1w": "week"}
+
+# Longest range for hourly buckets: the RPC returns one row per hour and
+# severity, which must stay under PostgREST's max-rows (1000) - 10 * 24 * 4 = 960
+HOURLY_HISTOGRAM_MAX_DAYS = 10
+
 
 class AnomalyRepository:
     def __init__(self, supabase: Client):
         self.supabase = supabase
         self.table = "anomalies"
+        # Per-(server, day, severity) counters kept in sync on insert
+        self.counts_table = "anomaly_daily_counts"
 
     def _parse_metrics(self, metrics):
         """Safely parse metrics - handles both dict and string"""
@@ -26,26 +42,71 @@ class AnomalyRepository:
         metrics: dict
     ) -> Anomaly:
         """Create a new anomaly record"""
-        response = self.supabase.table(self.table).insert({
+        response = await run_query(self.supabase.table(self.table).insert({
             "server_id": server_id,
             "timestamp": timestamp.isoformat(),
             "type": type,
             "severity": severity,
             "explanation": explanation,
             "metrics": metrics  # Send dict directly - Supabase handles JSONB
-        }).execute()
+        }))
         
         if not response.data:
             raise Exception("Failed to create anomaly")
         
         anomaly_data = response.data[0]
         anomaly_data["metrics"] = self._parse_metrics(anomaly_data.get("metrics"))
-        
         return Anomaly(**anomaly_data)
     
+    async def create_anomalies(self, anomalies: list) -> List[Anomaly]:
+        """
+        Create many anomalies with a single multi-row insert.
+        Accepts AnomalyCreate objects; the daily counters are kept by a trigger.
+        """
+        if not anomalies:
+            return []
+        
+        rows = [
+            {
+                "server_id": a.server_id,
+                "timestamp": a.timestamp.isoformat(),
+                "type": a.type,
+                "severity": a.severity,
+                "explanation": a.explanation,
+                "metrics": a.metrics
+            }
+            for a in anomalies
+        ]
+        
+        response = await run_query(self.supabase.table(self.table).insert(rows))
+        
+        if not response.data:
+            raise Exception("Failed to create anomalies")
+        
+        created = []
+        for anomaly_data in response.data:
+            anomaly_data["metrics"] = self._parse_metrics(anomaly_data.get("metrics"))
+            created.append(Anomaly(**anomaly_data))
+        
+        return created
+    
+    async def update_incident(
+        self,
+        anomaly_id: str,
+        occurrence_count: int,
+        last_seen: datetime,
+        severity: str
+    ) -> None:
+        """Write grouped-detection state back to an anomaly row"""
+        await run_query(self.supabase.table(self.table).update({
+            "occurrence_count": occurrence_count,
+            "last_seen": last_seen.isoformat(),
+            "severity": severity
+        }, returning=ReturnMethod.minimal).eq("id", anomaly_id))
+    
     async def get_anomaly_by_id(self, anomaly_id: str) -> Optional[Anomaly]:
         """Get specific anomaly by ID"""
-        response = self.supabase.table(self.table).select("*").eq("id", anomaly_id).execute()
+        response = await run_query(self.supabase.table(self.table).select("*").eq("id", anomaly_id))
         
         if not response.data:
             return None
@@ -65,7 +126,20 @@ class AnomalyRepository:
         offset: int = 0
     ) -> List[Anomaly]:
         """Get anomalies for a server with filters"""
-        query = self.supabase.table(self.table).select("*").eq("server_id", server_id)
+        rows = await self.get_anomaly_rows(server_id, severity, from_time, to_time, limit, offset)
+        return [Anomaly(**anomaly_data) for anomaly_data in rows]
+    
+    async def get_anomaly_rows(
+        self,
+        server_id: str,
+        severity: Optional[str] = None,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[dict]:
+        """Same as get_anomalies_by_server, but returns raw rows (fast serialization path)"""
+        query = self.supabase.table(self.table).select(ROW_COLUMNS).eq("server_id", server_id)
         
         if severity:
             query = query.eq("severity", severity)
@@ -74,19 +148,15 @@ class AnomalyRepository:
         if to_time:
             query = query.lte("timestamp", to_time.isoformat())
         
-        response = query.order("timestamp", desc=True).range(
+        response = await run_query(query.order("timestamp", desc=True).range(
             offset, offset + limit - 1
-        ).execute()
+        ))
         
-        if not response.data:
-            return []
-        
-        anomalies = []
-        for anomaly_data in response.data:
+        rows = response.data or []
+        for anomaly_data in rows:
             anomaly_data["metrics"] = self._parse_metrics(anomaly_data.get("metrics"))
-            anomalies.append(Anomaly(**anomaly_data))
         
-        return anomalies
+        return rows
     
     async def get_anomaly_count(
         self,
@@ -105,41 +175,90 @@ class AnomalyRepository:
         if to_time:
             query = query.lte("timestamp", to_time.isoformat())
         
-        response = query.execute()
+        response = await run_query(query)
         return response.count or 0
     
     async def get_anomaly_stats(self, server_id: str, days: int = 7) -> dict:
-        """Get anomaly statistics for a server"""
-        from_time = datetime.utcnow() - timedelta(days=days)
-        
-        anomalies = await self.get_anomalies_by_server(
-            server_id=server_id,
-            from_time=from_time,
-            limit=10000
-        )
+        """
+        Get anomaly statistics for a server from the daily counters.
+        Reads at most (days + 1) x 4 counter rows; the window is whole UTC days,
+        so the first day is counted in full.
+        """
+        from_day = (datetime.utcnow() - timedelta(days=days)).date()
         
-        if not anomalies:
-            return {
-                "server_id": server_id,
-                "total_anomalies": 0,
-                "critical_count": 0,
-                "high_count": 0,
-                "medium_count": 0,
-                "low_count": 0,
-                "most_recent": None
-            }
+        response = await run_query(self.supabase.table(self.counts_table).select(
+            "severity,count,last_at"
+        ).eq("server_id", server_id).gte("day", from_day.isoformat()))
         
-        severity_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0}
-        for anomaly in anomalies:
-            if anomaly.severity in severity_counts:
-                severity_counts[anomaly.severity] += 1
+        severity_counts = {severity: 0 for severity in SEVERITIES}
+        most_recent = None
+        for row in response.data or []:
+            if row["severity"] in severity_counts:
+                severity_counts[row["severity"]] += row["count"]
+            if row.get("last_at") and (most_recent is None or row["last_at"] > most_recent):
+                most_recent = row["last_at"]
         
         return {
             "server_id": server_id,
-            "total_anomalies": len(anomalies),
+            "total_anomalies": sum(severity_counts.values()),
             "critical_count": severity_counts["critical"],
             "high_count": severity_counts["high"],
             "medium_count": severity_counts["medium"],
             "low_count": severity_counts["low"],
-            "most_recent": anomalies[0].timestamp
-        }
\ No newline at end of file
+            "most_recent": most_recent
+        }
+    
+    async def get_anomaly_histogram(
+        self,
+        server_id: str,
+        bucket: str = "1h",
+        days: int = 7
+    ) -> dict:
+        """
+        Get anomaly counts per time bucket and severity.
+        Daily and weekly buckets are rolled up from the daily counters;
+        hourly buckets use the anomaly_histogram RPC (date_trunc group-by).
+        """
+        trunc = HISTOGRAM_BUCKETS[bucket]
+        from_time = datetime.utcnow() - timedelta(days=days)
+        
+        if trunc == "hour":
+            response = await run_query(self.supabase.rpc("anomaly_histogram", {
+                "p_server_id": server_id,
+                "p_bucket": trunc,
+                "p_from": from_time.isoformat()
+            }))
+            rows = [
+                (datetime.fromisoformat(row["bucket_start"]), row["severity"], row["count"])
+                for row in response.data or []
+            ]
+        else:
+            from_time = datetime.combine(from_time.date(), datetime.min.time())
+            response = await run_query(self.supabase.table(self.counts_table).select(
+                "day,severity,count"
+            ).eq("server_id", server_id).gte("day", from_time.date().isoformat()))
+            rows = []
+            for row in response.data or []:
+                day = datetime.fromisoformat(row["day"]).replace(tzinfo=timezone.utc)
+                if trunc == "week":
+                    # date_trunc('week') starts weeks on Monday
+                    day -= timedelta(days=day.weekday())
+                rows.append((day, row["severity"], row["count"]))
+        
+        buckets = {}
+        for bucket_start, severity, count in rows:
+            entry = buckets.setdefault(bucket_start, {
+                "bucket_start": bucket_start,
+                **{s: 0 for s in SEVERITIES},
+                "total": 0
+            })
+            if severity in SEVERITIES:
+                entry[severity] += count
+            entry["total"] += count
+        
+        return {
+            "server_id": server_id,
+            "bucket": bucket,
+            "from_time": from_time,
+            "buckets": [buckets[key] for key in sorted(buckets)]
+        }
@@ -0,0 +1,32 @@
+from supabase import Client
+from app.config import get_settings
+from app.database.postgres import PostgresPool
+from app.repositories.metrics_repository import MetricsRepository
+from app.repositories.server_repository import ServerRepository
+from app.repositories.anomaly_repository import AnomalyRepository
+
+settings = get_settings()
+
+# Repositories with a direct Postgres implementation follow DATA_BACKEND;
+# the rest always use PostgREST.
+
+
+def metrics_repository(supabase: Client) -> MetricsRepository:
+    if settings.DATA_BACKEND == "postgres":
+        from app.repositories.postgres.metrics_repository import PgMetricsRepository
+        return PgMetricsRepository(supabase, PostgresPool.get_pool())
+    return MetricsRepository(supabase)
+
+
+def server_repository(supabase: Client) -> ServerRepository:
+    if settings.DATA_BACKEND == "postgres":
+        from app.repositories.postgres.server_repository import PgServerRepository
+        return PgServerRepository(supabase, PostgresPool.get_pool())
+    return ServerRepository(supabase)
+
+
+def anomaly_repository(supabase: Client) -> AnomalyRepository:
+    if settings.DATA_BACKEND == "postgres":
+        from app.repositories.postgres.anomaly_repository import PgAnomalyRepository
+        return PgAnomalyRepository(supabase, PostgresPool.get_pool())
+    return AnomalyRepository(supabase)
@@ -1,9 +1,15 @@
-from typing import Optional, List
+from typing import Optional, List, AsyncIterator
 from supabase import Client
+from postgrest.types import ReturnMethod
+from app.database.supabase import run_query
 from app.models.metrics import Metrics
 from app.core.exceptions import NotFoundException
 from datetime import datetime, timedelta
 
+# Explicit column list matching the Metrics model, so raw rows can be
+# serialized directly without building a model per row
+ROW_COLUMNS = ",".join(Metrics.model_fields)
+
 
 class MetricsRepository:
     def __init__(self, supabase: Client):
@@ -21,7 +27,7 @@ class MetricsRepository:
         net_recv: int
     ) -> Metrics:
         """Insert new metrics data"""
-        response = self.supabase.table(self.table).insert({
+        response = await run_query(self.supabase.table(self.table).insert({
             "server_id": server_id,
             "timestamp": datetime.utcnow().isoformat(),
             "cpu_percent": cpu_percent,
@@ -30,13 +36,40 @@ class MetricsRepository:
             "disk_write": disk_write,
             "net_sent": net_sent,
             "net_recv": net_recv
-        }).execute()
+        }))
         
         if not response.data:
             raise Exception("Failed to insert metrics")
         
         return Metrics(**response.data[0])
     
+    async def insert_metrics_many(self, server_id: str, samples: list) -> int:
+        """
+        Insert many samples for one server with a single multi-row insert.
+        Accepts MetricsSample objects (timestamp defaults to now); returns
+        the number of rows written.
+        """
+        if not samples:
+            return 0
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                "server_id": server_id,
+                "timestamp": (s.timestamp or now).isoformat(),
+                "cpu_percent": s.cpu_percent,
+                "ram_percent": s.ram_percent,
+                "disk_read": s.disk_read,
+                "disk_write": s.disk_write,
+                "net_sent": s.net_sent,
+                "net_recv": s.net_recv
+            }
+            for s in samples
+        ]
+        
+        await run_query(self.supabase.table(self.table).insert(rows, returning=ReturnMethod.minimal))
+        return len(rows)
+    
     async def get_metrics_by_server(
         self,
         server_id: str,
@@ -46,7 +79,19 @@ class MetricsRepository:
         offset: int = 0
     ) -> List[Metrics]:
         """Get metrics for a server with optional time range"""
-        query = self.supabase.table(self.table).select("*").eq("server_id", server_id)
+        rows = await self.get_metrics_rows(server_id, from_time, to_time, limit, offset)
+        return [Metrics(**metric_data) for metric_data in rows]
+    
+    async def get_metrics_rows(
+        self,
+        server_id: str,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[dict]:
+        """Same as get_metrics_by_server, but returns raw rows (fast serialization path)"""
+        query = self.supabase.table(self.table).select(ROW_COLUMNS).eq("server_id", server_id)
         
         # Apply time filters if provided
         if from_time:
@@ -55,20 +100,53 @@ class MetricsRepository:
             query = query.lte("timestamp", to_time.isoformat())
         
         # Order by timestamp descending and apply pagination
-        response = query.order("timestamp", desc=True).range(
+        response = await run_query(query.order("timestamp", desc=True).range(
             offset, offset + limit - 1
-        ).execute()
+        ))
         
-        if not response.data:
-            return []
-        
-        return [Metrics(**metric_data) for metric_data in response.data]
+        return response.data or []
+    
+    async def iter_metrics_pages(
+        self,
+        server_id: str,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None,
+        page_size: int = 1000
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Yield raw metrics rows in ascending time order, one page at a time.
+        Uses keyset pagination on (timestamp, id), so every page is an index
+        range scan and no exact count is needed.
+        """
+        last = None
+        while True:
+            query = self.supabase.table(self.table).select(ROW_COLUMNS).eq("server_id", server_id)
+            
+            if from_time:
+                query = query.gte("timestamp", from_time.isoformat())
+            if to_time:
+                query = query.lte("timestamp", to_time.isoformat())
+            if last:
+                # Rows strictly after the last one seen
+                query = query.or_(
+                    f'timestamp.gt."{last["timestamp"]}",'
+                    f'and(timestamp.eq."{last["timestamp"]}",id.gt.{last["id"]})'
+                )
+            
+            # One order param with both keys: "timestamp,id" -> order=timestamp,id.asc
+            response = await run_query(query.order("timestamp,id").limit(page_size))
+            rows = response.data or []
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            last = rows[-1]
     
     async def get_latest_metrics(self, server_id: str) -> Optional[Metrics]:
         """Get the most recent metrics for a server"""
-        response = self.supabase.table(self.table).select("*").eq(
+        response = await run_query(self.supabase.table(self.table).select("*").eq(
             "server_id", server_id
-        ).order("timestamp", desc=True).limit(1).execute()
+        ).order("timestamp", desc=True).limit(1))
         
         if not response.data:
             return None
@@ -89,9 +167,28 @@ class MetricsRepository:
         if to_time:
             query = query.lte("timestamp", to_time.isoformat())
         
-        response = query.execute()
+        response = await run_query(query)
         return response.count if response.count else 0
     
+    async def create_partitions(self, days_ahead: int) -> List[str]:
+        """Create daily metrics partitions through today + days_ahead; returns the new partition names"""
+        response = await run_query(self.supabase.rpc("create_metrics_partitions", {
+            "p_days_ahead": days_ahead
+        }))
+        return response.data or []
+    
+    async def drop_partitions(self, retain_days: int) -> List[str]:
+        """Drop daily metrics partitions older than retain_days; returns the dropped partition names"""
+        response = await run_query(self.supabase.rpc("drop_metrics_partitions", {
+            "p_retain_days": retain_days
+        }))
+        return response.data or []
+    
+    async def backfill_legacy_day(self) -> Optional[dict]:
+        """Move the newest day left in metrics_legacy into metrics; None once the backfill is done"""
+        response = await run_query(self.supabase.rpc("backfill_legacy_metrics", {}))
+        return response.data[0] if response.data else None
+    
     async def get_metrics_summary(
         self,
         server_id: str,
@@ -1,7 +1,13 @@
 from typing import Optional, List
 from supabase import Client
+from postgrest.types import CountMethod, ReturnMethod
+from app.database.supabase import run_query, run_count_query
 from app.models.notification import Notification
 from app.core.exceptions import NotFoundException
+from app.core.push import push_hub, notification_event, unread_count_event
+from app.core.tasks import task_supervisor
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
 
 
 class NotificationRepository:
@@ -34,16 +40,64 @@ class NotificationRepository:
         if related_type:
             data["related_type"] = related_type
         
-        response = self.supabase.table(self.table).insert(data).execute()
+        response = await run_query(self.supabase.table(self.table).insert(data))
         
         if not response.data:
             raise Exception("Failed to create notification")
         
-        return Notification(**response.data[0])
+        notification = Notification(**response.data[0])
+        await self._push_created(response.data)
+        
+        return notification
+    
+    async def create_notifications(self, notifications: list) -> int:
+        """
+        Create many notifications with a single multi-row insert.
+        Accepts NotificationCreate objects; returns the number of rows written.
+        """
+        return await self.insert_notification_rows(self.build_notification_rows(notifications))
+    
+    @staticmethod
+    def build_notification_rows(notifications: list) -> List[dict]:
+        """
+        Rows for insert_notification_rows from NotificationCreate objects.
+        id and created_at are set here, so the rows can be pushed to open
+        streams without asking PostgREST to return them, and a retried
+        insert of the same rows cannot create duplicates.
+        """
+        # PostgREST bulk inserts require every row to have the same keys
+        created_at = datetime.now(timezone.utc).isoformat()
+        return [
+            {
+                "id": str(uuid4()),
+                "user_id": n.user_id,
+                "title": n.title,
+                "message": n.message,
+                "type": n.type,
+                "severity": n.severity,
+                "related_id": n.related_id,
+                "related_type": n.related_type,
+                "created_at": created_at,
+            }
+            for n in notifications
+        ]
+    
+    async def insert_notification_rows(self, rows: List[dict]) -> int:
+        """Insert prepared rows, skipping ids that already exist; returns the number of rows sent"""
+        if not rows:
+            return 0
+        
+        await run_query(self.supabase.table(self.table).upsert(
+            rows, ignore_duplicates=True, returning=ReturnMethod.minimal
+        ))
+        
+        await self._push_created([{**row, "is_read": False} for row in rows])
+        
+        return len(rows)
     
     async def get_notification_by_id(self, notification_id: str) -> Optional[Notification]:
         """Get specific notification by ID"""
-        response = self.supabase.table(self.table).select("*").eq("id", notification_id).execute()
+        response = await run_query(self.supabase.table(self.table).select("*").eq("id", notification_id))
         
         if not response.data:
             return None
@@ -68,9 +122,9 @@ class NotificationRepository:
             query = query.eq("type", type)
         
         # Order and paginate
-        response = query.order("created_at", desc=True).range(
+        response = await run_query(query.order("created_at", desc=True).range(
             offset, offset + limit - 1
-        ).execute()
+        ))
         
         if not response.data:
             return []
@@ -91,39 +145,141 @@ class NotificationRepository:
         if type:
             query = query.eq("type", type)
         
-        response = query.execute()
+        response = await run_query(query)
         return response.count if response.count else 0
     
     async def mark_as_read(self, notification_id: str, user_id: str) -> Notification:
         """Mark notification as read"""
-        response = self.supabase.table(self.table).update({
+        response = await run_query(self.supabase.table(self.table).update({
             "is_read": True
-        }).eq("id", notification_id).eq("user_id", user_id).execute()
+        }).eq("id", notification_id).eq("user_id", user_id))
         
         if not response.data:
             raise NotFoundException(detail="Notification not found")
         
+        await self._push_unread_count(user_id)
+        
         return Notification(**response.data[0])
     
     async def mark_all_as_read(self, user_id: str) -> int:
-        """Mark all user's notifications as read"""
-        response = self.supabase.table(self.table).update({
+        """Mark all user's notifications as read; returns how many changed"""
+        count = await run_count_query(self.supabase.table(self.table).update({
             "is_read": True
-        }).eq("user_id", user_id).eq("is_read", False).execute()
+        }, count=CountMethod.exact, returning=ReturnMethod.minimal).eq(
+            "user_id", user_id
+        ).eq("is_read", False))
         
-        return len(response.data) if response.data else 0
+        if count:
+            await self._push_unread_count(user_id)
+        return count
+    
+    async def mark_many_as_read(self, notification_ids: List[str], user_id: str) -> int:
+        """Mark the given notifications as read with one statement; returns how many changed"""
+        if not notification_ids:
+            return 0
+        
+        count = await run_count_query(self.supabase.table(self.table).update({
+            "is_read": True
+        }, count=CountMethod.exact, returning=ReturnMethod.minimal).in_(
+            "id", notification_ids
+        ).eq("user_id", user_id).eq("is_read", False))
+        
+        if count:
+            await self._push_unread_count(user_id)
+        return count
+    
+    async def delete_many(self, notification_ids: List[str], user_id: str) -> int:
+        """Delete the given notifications with one statement; returns how many were deleted"""
+        if not notification_ids:
+            return 0
+        
+        count = await run_count_query(self.supabase.table(self.table).delete(
+            count=CountMethod.exact, returning=ReturnMethod.minimal
+        ).in_("id", notification_ids).eq("user_id", user_id))
+        
+        if count:
+            await self._push_unread_count(user_id)
+        return count
+    
+    async def delete_read_older_than(self, user_id: str, days: int) -> int:
+        """Delete the user's read notifications created more than `days` ago"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        
+        return await run_count_query(self.supabase.table(self.table).delete(
+            count=CountMethod.exact, returning=ReturnMethod.minimal
+        ).eq("user_id", user_id).eq("is_read", True).lt("created_at", cutoff.isoformat()))
+    
+    async def expire_read(self, before: datetime, archive: bool, limit: int) -> int:
+        """Remove up to `limit` read notifications created before `before` (all users); returns the number removed"""
+        response = await run_query(self.supabase.rpc("expire_read_notifications", {
+            "p_before": before.isoformat(),
+            "p_archive": archive,
+            "p_limit": limit
+        }))
+        return response.data[0]["removed"] if response.data else 0
+    
+    async def get_over_cap_users(self, max_per_user: int) -> List[str]:
+        """
+        Users with more than `max_per_user` notifications, by id (one scan).
+        PostgREST returns at most max-rows of them; the rest show up on a
+        later call once these are capped.
+        """
+        response = await run_query(self.supabase.rpc("over_cap_notification_users", {
+            "p_max_per_user": max_per_user
+        }))
+        return [row["user_id"] for row in response.data or []]
+    
+    async def cap_user(self, user_id: str, max_per_user: int, archive: bool, limit: int) -> int:
+        """Remove up to `limit` of a user's notifications beyond their newest `max_per_user`; returns the number removed"""
+        response = await run_query(self.supabase.rpc("cap_user_notifications", {
+            "p_user_id": user_id,
+            "p_max_per_user": max_per_user,
+            "p_archive": archive,
+            "p_limit": limit
+        }))
+        return response.data[0]["removed"] if response.data else 0
     
     async def delete_notification(self, notification_id: str, user_id: str) -> bool:
         """Delete notification"""
-        response = self.supabase.table(self.table).delete().eq(
+        response = await run_query(self.supabase.table(self.table).delete().eq(
             "id", notification_id
-        ).eq("user_id", user_id).execute()
+        ).eq("user_id", user_id))
         
         if not response.data:
             raise NotFoundException(detail="Notification not found")
         
+        if not response.data[0].get("is_read"):
+            await self._push_unread_count(user_id)
+        
         return True
     
+    async def _push_created(self, rows: List[dict]) -> None:
+        """Send new notifications and the new unread count to users with an open stream"""
+        by_user = {}
+        for row in rows:
+            by_user.setdefault(str(row["user_id"]), []).append(row)
+        
+        for user_id, user_rows in by_user.items():
+            self._schedule_push(user_id, [notification_event(row) for row in user_rows])
+    
+    async def _push_unread_count(self, user_id: str) -> None:
+        self._schedule_push(user_id, [])
+    
+    def _schedule_push(self, user_id: str, events: List[dict]) -> None:
+        """
+        Hand the push to the supervised notification workers, so the unread
+        count query stays off the request path. Best effort: a push that
+        cannot be queued is dropped, and the client resyncs on reconnect.
+        """
+        task_supervisor.submit("notifications", self._push_to_user, user_id, events)
+    
+    async def _push_to_user(self, user_id: str, events: List[dict]) -> None:
+        """Publish events plus the current unread count (runs on the task supervisor)"""
+        if not await push_hub.is_online(user_id):
+            return
+        unread = await self.get_notification_count(user_id, is_read=False)
+        await push_hub.publish(user_id, *events, unread_count_event(unread))
+    
     async def get_notification_stats(self, user_id: str) -> dict:
         """Get notification statistics"""
         # Get all user notifications
@@ -0,0 +1,168 @@
+from typing import Optional, List
+from supabase import Client
+from app.database.postgres import record_to_row, parse_uuid, as_utc
+from app.models.anomaly import Anomaly
+from app.repositories.anomaly_repository import AnomalyRepository, SEVERITIES
+from datetime import datetime, timedelta, timezone
+
+COLUMNS = ", ".join(f'"{column}"' for column in Anomaly.model_fields)
+
+
+def _filters(
+    args: list,
+    severity: Optional[str],
+    from_time: Optional[datetime],
+    to_time: Optional[datetime]
+) -> str:
+    """Extra WHERE conditions; appends their parameters to args"""
+    sql = ""
+    if severity:
+        args.append(severity)
+        sql += f" and severity = ${len(args)}"
+    if from_time:
+        args.append(as_utc(from_time))
+        sql += f' and "timestamp" >= ${len(args)}'
+    if to_time:
+        args.append(as_utc(to_time))
+        sql += f' and "timestamp" <= ${len(args)}'
+    return sql
+
+
+class PgAnomalyRepository(AnomalyRepository):
+    """
+    AnomalyRepository over a direct asyncpg pool (DATA_BACKEND=postgres).
+    Batches are inserted with one unnest() statement; the histogram still
+    goes through PostgREST.
+    """
+
+    def __init__(self, supabase: Client, pool):
+        super().__init__(supabase)
+        self.pool = pool
+
+    async def create_anomaly(
+        self,
+        server_id: str,
+        timestamp: datetime,
+        type: str,
+        severity: str,
+        explanation: str,
+        metrics: dict
+    ) -> Anomaly:
+        """Create a new anomaly record"""
+        record = await self.pool.fetchrow(
+            'insert into anomalies (server_id, "timestamp", type, severity, explanation, metrics) '
+            f"values ($1, $2, $3, $4, $5, $6) returning {COLUMNS}",
+            server_id, as_utc(timestamp), type, severity, explanation, metrics
+        )
+        return Anomaly(**record)
+
+    async def create_anomalies(self, anomalies: list) -> List[Anomaly]:
+        """Create many anomalies with one insert ... select from unnest()"""
+        if not anomalies:
+            return []
+
+        records = await self.pool.fetch(
+            'insert into anomalies (server_id, "timestamp", type, severity, explanation, metrics) '
+            "select * from unnest($1::uuid[], $2::timestamptz[], $3::text[], $4::text[], $5::text[], $6::jsonb[]) "
+            f"returning {COLUMNS}",
+            [a.server_id for a in anomalies],
+            [as_utc(a.timestamp) for a in anomalies],
+            [a.type for a in anomalies],
+            [a.severity for a in anomalies],
+            [a.explanation for a in anomalies],
+            [a.metrics for a in anomalies]
+        )
+        return [Anomaly(**record) for record in records]
+
+    async def update_incident(
+        self,
+        anomaly_id: str,
+        occurrence_count: int,
+        last_seen: datetime,
+        severity: str
+    ) -> None:
+        """Write grouped-detection state back to an anomaly row"""
+        await self.pool.execute(
+            "update anomalies set occurrence_count = $2, last_seen = $3, severity = $4 where id = $1",
+            anomaly_id, occurrence_count, as_utc(last_seen), severity
+        )
+
+    async def get_anomaly_by_id(self, anomaly_id: str) -> Optional[Anomaly]:
+        """Get specific anomaly by ID"""
+        anomaly_uuid = parse_uuid(anomaly_id)
+        if anomaly_uuid is None:
+            return None
+
+        record = await self.pool.fetchrow(f"select {COLUMNS} from anomalies where id = $1", anomaly_uuid)
+        return Anomaly(**record) if record else None
+
+    async def get_anomaly_rows(
+        self,
+        server_id: str,
+        severity: Optional[str] = None,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[dict]:
+        """Same as get_anomalies_by_server, but returns raw rows (fast serialization path)"""
+        server_uuid = parse_uuid(server_id)
+        if server_uuid is None:
+            return []
+
+        args = [server_uuid]
+        filters = _filters(args, severity, from_time, to_time)
+        args += [limit, offset]
+        records = await self.pool.fetch(
+            f"select {COLUMNS} from anomalies where server_id = $1{filters} "
+            f'order by "timestamp" desc limit ${len(args) - 1} offset ${len(args)}',
+            *args
+        )
+        return [record_to_row(record) for record in records]
+
+    async def get_anomaly_count(
+        self,
+        server_id: str,
+        severity: Optional[str] = None,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None
+    ) -> int:
+        """Get total count of anomalies"""
+        server_uuid = parse_uuid(server_id)
+        if server_uuid is None:
+            return 0
+
+        args = [server_uuid]
+        filters = _filters(args, severity, from_time, to_time)
+        return await self.pool.fetchval(
+            f"select count(*) from anomalies where server_id = $1{filters}", *args
+        )
+
+    async def get_anomaly_stats(self, server_id: str, days: int = 7) -> dict:
+        """Get anomaly statistics for a server from the daily counters (summed in SQL)"""
+        severity_counts = {severity: 0 for severity in SEVERITIES}
+        most_recent = None
+
+        server_uuid = parse_uuid(server_id)
+        if server_uuid is not None:
+            from_day = (datetime.now(timezone.utc) - timedelta(days=days)).date()
+            records = await self.pool.fetch(
+                "select severity, sum(count)::bigint as count, max(last_at) as last_at "
+                "from anomaly_daily_counts where server_id = $1 and day >= $2 group by severity",
+                server_uuid, from_day
+            )
+            for record in records:
+                if record["severity"] in severity_counts:
+                    severity_counts[record["severity"]] += record["count"]
+                if record["last_at"] and (most_recent is None or record["last_at"] > most_recent):
+                    most_recent = record["last_at"]
+
+        return {
+            "server_id": server_id,
+            "total_anomalies": sum(severity_counts.values()),
+            "critical_count": severity_counts["critical"],
+            "high_count": severity_counts["high"],
+            "medium_count": severity_counts["medium"],
+            "low_count": severity_counts["low"],
+            "most_recent": most_recent.isoformat() if most_recent else None
+        }
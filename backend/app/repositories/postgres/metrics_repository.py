@@ -0,0 +1,219 @@
+from typing import Optional, List, AsyncIterator
+from supabase import Client
+from app.database.postgres import record_to_row, parse_uuid, as_utc
+from app.models.metrics import Metrics
+from app.repositories.metrics_repository import MetricsRepository
+from datetime import datetime, timedelta, timezone
+
+COLUMNS = ", ".join(f'"{column}"' for column in Metrics.model_fields)
+
+# Columns written by COPY; id and created_at come from the column defaults
+COPY_COLUMNS = [
+    "server_id", "timestamp", "cpu_percent", "ram_percent",
+    "disk_read", "disk_write", "net_sent", "net_recv"
+]
+
+
+def _time_filters(args: list, from_time: Optional[datetime], to_time: Optional[datetime]) -> str:
+    """Extra WHERE conditions for a time range; appends their parameters to args"""
+    sql = ""
+    if from_time:
+        args.append(as_utc(from_time))
+        sql += f' and "timestamp" >= ${len(args)}'
+    if to_time:
+        args.append(as_utc(to_time))
+        sql += f' and "timestamp" <= ${len(args)}'
+    return sql
+
+
+class PgMetricsRepository(MetricsRepository):
+    """
+    MetricsRepository over a direct asyncpg pool (DATA_BACKEND=postgres).
+    Bulk inserts use binary COPY and the summary is aggregated in SQL;
+    methods not overridden here still go through PostgREST.
+    """
+
+    def __init__(self, supabase: Client, pool):
+        super().__init__(supabase)
+        self.pool = pool
+
+    async def insert_metrics(
+        self,
+        server_id: str,
+        cpu_percent: float,
+        ram_percent: float,
+        disk_read: int,
+        disk_write: int,
+        net_sent: int,
+        net_recv: int
+    ) -> Metrics:
+        """Insert new metrics data"""
+        record = await self.pool.fetchrow(
+            'insert into metrics (server_id, "timestamp", cpu_percent, ram_percent, '
+            'disk_read, disk_write, net_sent, net_recv) '
+            f'values ($1, now(), $2, $3, $4, $5, $6, $7) returning {COLUMNS}',
+            server_id, cpu_percent, ram_percent, disk_read, disk_write, net_sent, net_recv
+        )
+        return Metrics(**record)
+
+    async def insert_metrics_many(self, server_id: str, samples: list) -> int:
+        """Insert many samples for one server with a binary COPY"""
+        if not samples:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        records = [
+            (
+                server_id,
+                as_utc(s.timestamp) or now,
+                s.cpu_percent,
+                s.ram_percent,
+                s.disk_read,
+                s.disk_write,
+                s.net_sent,
+                s.net_recv
+            )
+            for s in samples
+        ]
+
+        await self.pool.copy_records_to_table(self.table, records=records, columns=COPY_COLUMNS)
+        return len(records)
+
+    async def get_metrics_rows(
+        self,
+        server_id: str,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[dict]:
+        """Same as get_metrics_by_server, but returns raw rows (fast serialization path)"""
+        server_uuid = parse_uuid(server_id)
+        if server_uuid is None:
+            return []
+
+        args = [server_uuid]
+        filters = _time_filters(args, from_time, to_time)
+        args += [limit, offset]
+        records = await self.pool.fetch(
+            f"select {COLUMNS} from metrics where server_id = $1{filters} "
+            f'order by "timestamp" desc limit ${len(args) - 1} offset ${len(args)}',
+            *args
+        )
+        return [record_to_row(record) for record in records]
+
+    async def iter_metrics_pages(
+        self,
+        server_id: str,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None,
+        page_size: int = 1000
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Yield raw metrics rows in ascending time order, one page at a time
+        (keyset pagination on (timestamp, id))
+        """
+        server_uuid = parse_uuid(server_id)
+        if server_uuid is None:
+            return
+
+        last = None
+        while True:
+            args = [server_uuid]
+            filters = _time_filters(args, from_time, to_time)
+            if last:
+                # Rows strictly after the last one seen; the plain bound
+                # lets the (server_id, timestamp) index start the scan there
+                args += [last["timestamp"], last["id"]]
+                n = len(args)
+                filters += f' and "timestamp" >= ${n - 1} and ("timestamp", id) > (${n - 1}, ${n})'
+            args.append(page_size)
+
+            records = await self.pool.fetch(
+                f"select {COLUMNS} from metrics where server_id = $1{filters} "
+                f'order by "timestamp", id limit ${len(args)}',
+                *args
+            )
+            if records:
+                yield [record_to_row(record) for record in records]
+            if len(records) < page_size:
+                return
+            last = records[-1]
+
+    async def get_latest_metrics(self, server_id: str) -> Optional[Metrics]:
+        """Get the most recent metrics for a server"""
+        server_uuid = parse_uuid(server_id)
+        if server_uuid is None:
+            return None
+
+        record = await self.pool.fetchrow(
+            f'select {COLUMNS} from metrics where server_id = $1 order by "timestamp" desc limit 1',
+            server_uuid
+        )
+        return Metrics(**record) if record else None
+
+    async def get_metrics_count(
+        self,
+        server_id: str,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None
+    ) -> int:
+        """Get total count of metrics for a server"""
+        server_uuid = parse_uuid(server_id)
+        if server_uuid is None:
+            return 0
+
+        args = [server_uuid]
+        filters = _time_filters(args, from_time, to_time)
+        return await self.pool.fetchval(
+            f"select count(*) from metrics where server_id = $1{filters}", *args
+        )
+
+    async def create_partitions(self, days_ahead: int) -> List[str]:
+        """Create daily metrics partitions through today + days_ahead; returns the new partition names"""
+        records = await self.pool.fetch("select * from create_metrics_partitions($1)", days_ahead)
+        return [record[0] for record in records]
+
+    async def drop_partitions(self, retain_days: int) -> List[str]:
+        """Drop daily metrics partitions older than retain_days; returns the dropped partition names"""
+        records = await self.pool.fetch("select * from drop_metrics_partitions($1)", retain_days)
+        return [record[0] for record in records]
+
+    async def backfill_legacy_day(self) -> Optional[dict]:
+        """Move the newest day left in metrics_legacy into metrics; None once the backfill is done"""
+        record = await self.pool.fetchrow("select day, moved from backfill_legacy_metrics()")
+        return dict(record) if record else None
+
+    async def get_metrics_summary(
+        self,
+        server_id: str,
+        hours: int = 24
+    ) -> dict:
+        """Get aggregated metrics summary for the last N hours (one aggregate query)"""
+        server_uuid = parse_uuid(server_id)
+        if server_uuid is None:
+            return None
+
+        from_time = datetime.now(timezone.utc) - timedelta(hours=hours)
+        record = await self.pool.fetchrow(
+            "select count(*) as samples, avg(cpu_percent) as avg_cpu, avg(ram_percent) as avg_ram, "
+            "max(cpu_percent) as max_cpu, max(ram_percent) as max_ram, "
+            "coalesce(sum(disk_read), 0)::bigint as total_disk_read, "
+            "coalesce(sum(disk_write), 0)::bigint as total_disk_write, "
+            "coalesce(sum(net_sent), 0)::bigint as total_net_sent, "
+            "coalesce(sum(net_recv), 0)::bigint as total_net_recv "
+            'from metrics where server_id = $1 and "timestamp" >= $2',
+            server_uuid, from_time
+        )
+
+        if not record["samples"]:
+            return None
+
+        summary = dict(record)
+        del summary["samples"]
+        return {
+            "server_id": server_id,
+            **summary,
+            "period_start": from_time,
+            "period_end": datetime.now(timezone.utc)
+        }
@@ -0,0 +1,71 @@
+from typing import Optional
+from supabase import Client
+from app.database.postgres import record_to_row, parse_uuid
+from app.models.server import Server
+from app.repositories.server_repository import ServerRepository
+
+COLUMNS = ", ".join(Server.model_fields)
+
+
+class PgServerRepository(ServerRepository):
+    """
+    ServerRepository over a direct asyncpg pool (DATA_BACKEND=postgres),
+    for the per-request lookups, the heartbeat writes and the status sweep. Creating, updating
+    and deleting servers still go through PostgREST.
+    """
+
+    def __init__(self, supabase: Client, pool):
+        super().__init__(supabase)
+        self.pool = pool
+
+    async def get_server_by_id(self, server_id: str) -> Optional[Server]:
+        """Get server by ID"""
+        server_uuid = parse_uuid(server_id)
+        if server_uuid is None:
+            return None
+
+        record = await self.pool.fetchrow(f"select {COLUMNS} from servers where id = $1 and deleted_at is null", server_uuid)
+        return Server(**record) if record else None
+
+    async def get_servers_by_ids(self, server_ids: list[str]) -> list[Server]:
+        """Get several servers with a single = any() query"""
+        server_uuids = [u for u in map(parse_uuid, server_ids) if u is not None]
+        if not server_uuids:
+            return []
+
+        records = await self.pool.fetch(
+            f"select {COLUMNS} from servers where id = any($1::uuid[]) and deleted_at is null", server_uuids
+        )
+        return [Server(**record) for record in records]
+
+    async def get_servers_by_user(
+        self,
+        user_id: str,
+        limit: int = 100,
+        offset: int = 0
+    ) -> list[Server]:
+        """Get all servers for a user"""
+        records = await self.pool.fetch(
+            f"select {COLUMNS} from servers where user_id = $1 and deleted_at is null limit $2 offset $3",
+            user_id, limit, offset
+        )
+        return [Server(**record) for record in records]
+
+    async def get_user_server_count(self, user_id: str) -> int:
+        """Get total number of servers for a user"""
+        return await self.pool.fetchval("select count(*) from servers where user_id = $1 and deleted_at is null", user_id)
+
+    async def update_last_seen(self, server_id: str) -> bool:
+        """Update server's last seen timestamp"""
+        result = await self.pool.execute("update servers set last_seen = now() where id = $1", server_id)
+        return result != "UPDATE 0"
+
+    async def sweep_status(self, warning_after: float, offline_after: float) -> list[dict]:
+        """Set every server's status from its heartbeat age in one statement"""
+        records = await self.pool.fetch("select * from sweep_server_status($1, $2)", warning_after, offline_after)
+        return [record_to_row(record) for record in records]
+    
+    async def get_server_by_api_key(self, api_key: str) -> Optional[Server]:
+        """Get server by API key (for agent authentication)"""
+        record = await self.pool.fetchrow(f"select {COLUMNS} from servers where api_key = $1 and deleted_at is null", api_key)
+        return Server(**record) if record else None
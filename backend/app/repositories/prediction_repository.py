@@ -1,7 +1,9 @@
 from typing import Optional, List
 from supabase import Client
+from app.database.supabase import run_query
 from app.models.prediction import Prediction
 from app.core.exceptions import NotFoundException
+from app.core.forecast import is_compact, slice_forecast
 import json
 
 
@@ -10,20 +12,28 @@ class PredictionRepository:
         self.supabase = supabase
         self.table = "predictions"
     
-    def _parse_forecast(self, forecast_data):
+    def _parse_forecast(
+        self,
+        forecast_data,
+        metrics: Optional[List[str]] = None,
+        horizon: Optional[int] = None,
+        decode: bool = True
+    ):
         """
         Parse forecast field - handles both string and dict
         Compatible avec anciennes données (string) et nouvelles (dict)
+        Compact forecasts are sliced to the requested metrics/horizon
         """
         if isinstance(forecast_data, str):
             try:
-                return json.loads(forecast_data)
+                forecast_data = json.loads(forecast_data)
             except (json.JSONDecodeError, TypeError):
                 return forecast_data
-        elif isinstance(forecast_data, dict):
-            return forecast_data
-        else:
-            return forecast_data
+        
+        if is_compact(forecast_data):
+            return slice_forecast(forecast_data, metrics, horizon, decode)
+        
+        return forecast_data
     
     async def create_prediction(
         self,
@@ -32,10 +42,10 @@ class PredictionRepository:
     ) -> Prediction:
         """Create a new prediction record"""
         # ✅ Envoyer directement le dict - Supabase/PostgreSQL gère JSONB
-        response = self.supabase.table(self.table).insert({
+        response = await run_query(self.supabase.table(self.table).insert({
             "server_id": server_id,
             "forecast": forecast  # ← PAS de json.dumps() !
-        }).execute()
+        }))
         
         if not response.data:
             raise Exception("Failed to create prediction")
@@ -46,9 +56,29 @@ class PredictionRepository:
         
         return Prediction(**prediction_data)
     
+    async def create_predictions(self, predictions: List[dict]) -> List[Prediction]:
+        """Create many predictions with a single multi-row insert ({server_id, forecast} dicts)"""
+        if not predictions:
+            return []
+        
+        response = await run_query(self.supabase.table(self.table).insert([
+            {"server_id": p["server_id"], "forecast": p["forecast"]}
+            for p in predictions
+        ]))
+        
+        if not response.data:
+            raise Exception("Failed to create predictions")
+        
+        created = []
+        for pred_data in response.data:
+            pred_data["forecast"] = self._parse_forecast(pred_data["forecast"])
+            created.append(Prediction(**pred_data))
+        
+        return created
+    
     async def get_prediction_by_id(self, prediction_id: str) -> Optional[Prediction]:
         """Get specific prediction by ID"""
-        response = self.supabase.table(self.table).select("*").eq("id", prediction_id).execute()
+        response = await run_query(self.supabase.table(self.table).select("*").eq("id", prediction_id))
         
         if not response.data:
             return None
@@ -59,18 +89,53 @@ class PredictionRepository:
         
         return Prediction(**prediction_data)
     
-    async def get_latest_prediction(self, server_id: str) -> Optional[Prediction]:
+    async def _select_predictions(
+        self,
+        server_id: str,
+        limit: int,
+        offset: int,
+        metrics: Optional[List[str]],
+        horizon: Optional[int]
+    ) -> List[dict]:
+        """
+        A page of prediction rows, newest first. When metrics or horizon is
+        given, the server_predictions RPC slices the forecasts in the
+        database so the rest of each forecast is never downloaded.
+        """
+        if metrics or horizon is not None:
+            response = await run_query(self.supabase.rpc("server_predictions", {
+                "p_server_id": server_id,
+                "p_metrics": metrics or None,
+                "p_horizon": horizon,
+                "p_limit": limit,
+                "p_offset": offset
+            }))
+        else:
+            response = await run_query(self.supabase.table(self.table).select("*").eq(
+                "server_id", server_id
+            ).order("created_at", desc=True).range(
+                offset, offset + limit - 1
+            ))
+        return response.data or []
+    
+    async def get_latest_prediction(
+        self,
+        server_id: str,
+        metrics: Optional[List[str]] = None,
+        horizon: Optional[int] = None,
+        decode: bool = True
+    ) -> Optional[Prediction]:
         """Get the most recent prediction for a server"""
-        response = self.supabase.table(self.table).select("*").eq(
-            "server_id", server_id
-        ).order("created_at", desc=True).limit(1).execute()
+        rows = await self._select_predictions(server_id, 1, 0, metrics, horizon)
         
-        if not response.data:
+        if not rows:
             return None
         
-        prediction_data = response.data[0]
+        prediction_data = rows[0]
         # ✅ Parse avec helper
-        prediction_data["forecast"] = self._parse_forecast(prediction_data["forecast"])
+        prediction_data["forecast"] = self._parse_forecast(
+            prediction_data["forecast"], metrics, horizon, decode
+        )
         
         return Prediction(**prediction_data)
     
@@ -78,30 +143,28 @@ class PredictionRepository:
         self,
         server_id: str,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        metrics: Optional[List[str]] = None,
+        horizon: Optional[int] = None,
+        decode: bool = True
     ) -> List[Prediction]:
         """Get prediction history for a server"""
-        response = self.supabase.table(self.table).select("*").eq(
-            "server_id", server_id
-        ).order("created_at", desc=True).range(
-            offset, offset + limit - 1
-        ).execute()
-        
-        if not response.data:
-            return []
+        rows = await self._select_predictions(server_id, limit, offset, metrics, horizon)
         
         predictions = []
-        for pred_data in response.data:
+        for pred_data in rows:
             # ✅ Parse avec helper
-            pred_data["forecast"] = self._parse_forecast(pred_data["forecast"])
+            pred_data["forecast"] = self._parse_forecast(
+                pred_data["forecast"], metrics, horizon, decode
+            )
             predictions.append(Prediction(**pred_data))
         
         return predictions
     
     async def get_prediction_count(self, server_id: str) -> int:
         """Get total number of predictions for a server"""
-        response = self.supabase.table(self.table).select(
+        response = await run_query(self.supabase.table(self.table).select(
             "id", count="exact"
-        ).eq("server_id", server_id).execute()
+        ).eq("server_id", server_id))
         
         return response.count if response.count else 0
\ No newline at end of file
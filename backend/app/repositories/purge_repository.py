@@ -0,0 +1,61 @@
+from typing import Optional, List
+from supabase import Client
+from app.database.supabase import run_query
+from app.models.purge_job import PurgeJob
+
+
+class PurgeRepository:
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+        self.table = "purge_jobs"
+    
+    async def schedule(self, entity_type: str, entity_id: str) -> Optional[PurgeJob]:
+        """
+        Soft-delete a server or user and create its purge job.
+        Returns None if it does not exist or is already deleted.
+        """
+        response = await run_query(self.supabase.rpc("schedule_purge", {
+            "p_entity_type": entity_type,
+            "p_entity_id": entity_id
+        }))
+        
+        if not response.data:
+            return None
+        
+        return PurgeJob(**response.data[0])
+    
+    async def get_job(self, entity_type: str, entity_id: str) -> Optional[PurgeJob]:
+        """Purge job of a deleted server or user"""
+        response = await run_query(self.supabase.table(self.table).select("*").eq(
+            "entity_type", entity_type
+        ).eq("entity_id", entity_id))
+        
+        if not response.data:
+            return None
+        
+        return PurgeJob(**response.data[0])
+    
+    async def get_open_jobs(self, limit: int = 100) -> List[PurgeJob]:
+        """Unfinished purge jobs, oldest first"""
+        response = await run_query(self.supabase.table(self.table).select("*").neq(
+            "status", "done"
+        ).order("created_at").limit(limit))
+        
+        return [PurgeJob(**row) for row in response.data or []]
+    
+    async def purge_step(self, job_id: str, limit: int) -> dict:
+        """
+        Remove at most `limit` rows of the job's data in one transaction.
+        Returns {"purged_table", "purged", "done"}.
+        """
+        response = await run_query(self.supabase.rpc("purge_step", {
+            "p_job_id": job_id,
+            "p_limit": limit
+        }))
+        return response.data[0]
+    
+    async def record_error(self, job_id: str, error: str) -> None:
+        """Keep the last failure on the job (cleared by the next successful step)"""
+        await run_query(self.supabase.table(self.table).update({
+            "last_error": error[:1000]
+        }).eq("id", job_id))
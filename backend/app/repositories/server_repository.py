@@ -1,9 +1,14 @@
 from typing import Optional
 from supabase import Client
+from app.database.supabase import run_query
 from app.models.server import Server
 from app.core.exceptions import ConflictException, NotFoundException
+from app.core.concurrency import gather_with_timeout
 import secrets
 
+# Ids per in_ filter: the list goes into the URL, which gateways cap at a few KB
+IN_FILTER_CHUNK = 200
+
 
 class ServerRepository:
     def __init__(self, supabase: Client):
@@ -24,13 +29,13 @@ class ServerRepository:
         try:
             api_key = self._generate_api_key()
             
-            response = self.supabase.table(self.table).insert({
+            response = await run_query(self.supabase.table(self.table).insert({
                 "user_id": user_id,
                 "name": name,
                 "ip": ip,
                 "api_key": api_key,
                 "status": "online"
-            }).execute()
+            }))
             
             if not response.data:
                 raise Exception("Failed to create server")
@@ -44,13 +49,32 @@ class ServerRepository:
     
     async def get_server_by_id(self, server_id: str) -> Optional[Server]:
         """Get server by ID"""
-        response = self.supabase.table(self.table).select("*").eq("id", server_id).execute()
+        response = await run_query(self.supabase.table(self.table).select("*").eq(
+            "id", server_id
+        ).is_("deleted_at", "null"))
         
         if not response.data:
             return None
         
         return Server(**response.data[0])
     
+    async def get_servers_by_ids(self, server_ids: list[str]) -> list[Server]:
+        """
+        Get several servers with in_ queries of at most IN_FILTER_CHUNK ids
+        each (run concurrently), so large batches don't exceed URL limits
+        """
+        if not server_ids:
+            return []
+        
+        responses = await gather_with_timeout(*(
+            run_query(self.supabase.table(self.table).select("*").in_(
+                "id", server_ids[i:i + IN_FILTER_CHUNK]
+            ).is_("deleted_at", "null"))
+            for i in range(0, len(server_ids), IN_FILTER_CHUNK)
+        ))
+        
+        return [Server(**server_data) for response in responses for server_data in response.data or []]
+    
     async def get_servers_by_user(
         self,
         user_id: str,
@@ -58,9 +82,9 @@ class ServerRepository:
         offset: int = 0
     ) -> list[Server]:
         """Get all servers for a user"""
-        response = self.supabase.table(self.table).select("*").eq(
+        response = await run_query(self.supabase.table(self.table).select("*").eq(
             "user_id", user_id
-        ).range(offset, offset + limit - 1).execute()
+        ).is_("deleted_at", "null").range(offset, offset + limit - 1))
         
         if not response.data:
             return []
@@ -69,9 +93,9 @@ class ServerRepository:
     
     async def get_user_server_count(self, user_id: str) -> int:
         """Get total number of servers for a user"""
-        response = self.supabase.table(self.table).select(
+        response = await run_query(self.supabase.table(self.table).select(
             "id", count="exact"
-        ).eq("user_id", user_id).execute()
+        ).eq("user_id", user_id).is_("deleted_at", "null"))
         
         return response.count if response.count else 0
     
@@ -96,9 +120,9 @@ class ServerRepository:
             # Nothing to update
             return await self.get_server_by_id(server_id)
         
-        response = self.supabase.table(self.table).update(
+        response = await run_query(self.supabase.table(self.table).update(
             update_data
-        ).eq("id", server_id).execute()
+        ).eq("id", server_id))
         
         if not response.data:
             raise NotFoundException(detail="Server not found")
@@ -109,24 +133,29 @@ class ServerRepository:
         """Update server's last seen timestamp"""
         from datetime import datetime
         
-        response = self.supabase.table(self.table).update({
+        response = await run_query(self.supabase.table(self.table).update({
             "last_seen": datetime.utcnow().isoformat()
-        }).eq("id", server_id).execute()
+        }).eq("id", server_id))
         
         return bool(response.data)
     
-    async def delete_server(self, server_id: str) -> bool:
-        """Delete server"""
-        response = self.supabase.table(self.table).delete().eq("id", server_id).execute()
-        
-        if not response.data:
-            raise NotFoundException(detail="Server not found")
-        
-        return True
+    async def sweep_status(self, warning_after: float, offline_after: float) -> list[dict]:
+        """
+        Set every server's status from its heartbeat age in one statement
+        (sweep_server_status RPC). Returns the servers whose status changed,
+        with previous_status and age_seconds.
+        """
+        response = await run_query(self.supabase.rpc("sweep_server_status", {
+            "p_warning_after": warning_after,
+            "p_offline_after": offline_after
+        }))
+        return response.data or []
     
     async def get_server_by_api_key(self, api_key: str) -> Optional[Server]:
         """Get server by API key (for agent authentication)"""
-        response = self.supabase.table(self.table).select("*").eq("api_key", api_key).execute()
+        response = await run_query(self.supabase.table(self.table).select("*").eq(
+            "api_key", api_key
+        ).is_("deleted_at", "null"))
         
         if not response.data:
             return None
@@ -1,5 +1,6 @@
 from typing import Optional
 from supabase import Client
+from app.database.supabase import run_query
 from app.models.user import User
 from app.core.exceptions import ConflictException, NotFoundException
 from datetime import date
@@ -20,13 +21,13 @@ class UserRepository:
     ) -> User:
         """Create a new user in the database"""
         try:
-            response = self.supabase.table(self.table).insert({
+            response = await run_query(self.supabase.table(self.table).insert({
                 "email": email,
                 "password_hash": password_hash,
                 "first_name": first_name,
                 "last_name": last_name,
                 "birth_date": birth_date.isoformat()
-            }).execute()
+            }))
             
             if not response.data:
                 raise Exception("Failed to create user")
@@ -42,7 +43,9 @@ class UserRepository:
     
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
-        response = self.supabase.table(self.table).select("*").eq("email", email).execute()
+        response = await run_query(self.supabase.table(self.table).select("*").eq(
+            "email", email
+        ).is_("deleted_at", "null"))
         
         if not response.data:
             return None
@@ -51,7 +54,9 @@ class UserRepository:
     
     async def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID"""
-        response = self.supabase.table(self.table).select("*").eq("id", user_id).execute()
+        response = await run_query(self.supabase.table(self.table).select("*").eq(
+            "id", user_id
+        ).is_("deleted_at", "null"))
         
         if not response.data:
             return None
@@ -59,9 +64,19 @@ class UserRepository:
         return User(**response.data[0])
     
     async def user_exists(self, email: str) -> bool:
-        """Check if user exists by email"""
-        response = self.supabase.table(self.table).select("id").eq("email", email).execute()
+        """Check if a (not deleted) user exists by email"""
+        response = await run_query(self.supabase.table(self.table).select("id").eq(
+            "email", email
+        ).is_("deleted_at", "null"))
         return len(response.data) > 0
+    
+    async def is_active(self, user_id: str) -> bool:
+        """Check that a user exists and is not deleted"""
+        response = await run_query(self.supabase.table(self.table).select("id").eq(
+            "id", user_id
+        ).is_("deleted_at", "null"))
+        return len(response.data) > 0
+    
     async def update_user(
         self,
         user_id: str,
@@ -84,9 +99,9 @@ class UserRepository:
             return await self.get_user_by_id(user_id)
         
         try:
-            response = self.supabase.table(self.table).update(
+            response = await run_query(self.supabase.table(self.table).update(
                 update_data
-            ).eq("id", user_id).execute()
+            ).eq("id", user_id))
             
             if not response.data:
                 raise NotFoundException(detail="User not found")
@@ -100,26 +115,20 @@ class UserRepository:
     
     async def update_password(self, user_id: str, new_password_hash: str) -> bool:
         """Update user password"""
-        response = self.supabase.table(self.table).update({
+        response = await run_query(self.supabase.table(self.table).update({
             "password_hash": new_password_hash
-        }).eq("id", user_id).execute()
+        }).eq("id", user_id))
         
         if not response.data:
             raise NotFoundException(detail="User not found")
         
         return True
     
-    async def delete_user(self, user_id: str) -> bool:
-        """Delete user account (soft delete or hard delete)"""
-        response = self.supabase.table(self.table).delete().eq("id", user_id).execute()
-        
-        if not response.data:
-            raise NotFoundException(detail="User not found")
-        
-        return True
     async def get_all_users(self, limit: int = 100, offset: int = 0) -> list[User]:
         """Get all users (for admin purposes)"""
-        response = self.supabase.table(self.table).select("*").range(offset, offset + limit - 1).execute()
+        response = await run_query(self.supabase.table(self.table).select("*").is_(
+            "deleted_at", "null"
+        ).range(offset, offset + limit - 1))
         
         if not response.data:
             return []
@@ -128,5 +137,7 @@ class UserRepository:
     
     async def get_user_count(self) -> int:
         """Get total number of users"""
-        response = self.supabase.table(self.table).select("id", count="exact").execute()
+        response = await run_query(self.supabase.table(self.table).select(
+            "id", count="exact"
+        ).is_("deleted_at", "null"))
         return response.count if response.count else 0
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from uuid import UUID
 from typing import Optional
@@ -13,6 +13,16 @@ class AnomalyCreate(BaseModel):
     explanation: str = Field(..., min_length=1, description="AI explanation of the anomaly")
     metrics: dict = Field(..., description="Metrics data at time of anomaly")
 
+    @field_validator('server_id')
+    @classmethod
+    def canonical_server_id(cls, v: str) -> str:
+        """Canonical UUID text, so batch lookups and incident keys match str(server.id)"""
+        try:
+            return str(UUID(v.strip()))
+        except ValueError:
+            # Not a UUID - left as is and reported as an unknown server
+            return v
+
 
 class AnomalyResponse(BaseModel):
     """Schema for anomaly in responses"""
@@ -24,11 +34,21 @@ class AnomalyResponse(BaseModel):
     explanation: str
     metrics: dict
     created_at: datetime
+    occurrence_count: int = 1
+    last_seen: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
 
+class AnomalyBatchResponse(BaseModel):
+    """Schema for the result of a batch anomaly submission"""
+    created: int
+    grouped: int
+    unknown_server_ids: list[str]
+    anomalies: list[AnomalyResponse]
+
+
 class AnomalyListResponse(BaseModel):
     """Schema for paginated list of anomalies"""
     anomalies: list[AnomalyResponse]
@@ -44,4 +64,22 @@ class AnomalyStats(BaseModel):
     high_count: int
     medium_count: int
     low_count: int
-    most_recent: Optional[datetime] = None
\ No newline at end of file
+    most_recent: Optional[datetime] = None
+
+
+class AnomalyHistogramBucket(BaseModel):
+    """Anomaly counts for one time bucket"""
+    bucket_start: datetime
+    critical: int = 0
+    high: int = 0
+    medium: int = 0
+    low: int = 0
+    total: int = 0
+
+
+class AnomalyHistogram(BaseModel):
+    """Schema for time-bucketed anomaly counts"""
+    server_id: UUID
+    bucket: str
+    from_time: datetime
+    buckets: list[AnomalyHistogramBucket]
@@ -15,6 +15,29 @@ class MetricsIngest(BaseModel):
     net_recv: int = Field(..., ge=0, description="Network received bytes")
 
 
+class MetricsSample(BaseModel):
+    """One sample in a batch submission (agents that buffer while offline)"""
+    timestamp: Optional[datetime] = Field(None, description="When the sample was taken (default: now)")
+    cpu_percent: float = Field(..., ge=0, le=100, description="CPU usage percentage")
+    ram_percent: float = Field(..., ge=0, le=100, description="RAM usage percentage")
+    disk_read: int = Field(..., ge=0, description="Disk read bytes")
+    disk_write: int = Field(..., ge=0, description="Disk write bytes")
+    net_sent: int = Field(..., ge=0, description="Network sent bytes")
+    net_recv: int = Field(..., ge=0, description="Network received bytes")
+
+
+class MetricsBatchIngest(BaseModel):
+    """Schema for an agent to send many samples at once"""
+    api_key: str = Field(..., description="Server API key for authentication")
+    samples: list[MetricsSample]
+
+
+class MetricsBatchResponse(BaseModel):
+    """Schema for the result of a batch metrics submission"""
+    server_id: UUID
+    inserted: int
+
+
 class MetricsResponse(BaseModel):
     """Schema for metrics in responses"""
     id: UUID
@@ -44,6 +44,11 @@ class NotificationMarkRead(BaseModel):
     is_read: bool = True
 
 
+class NotificationBulkIds(BaseModel):
+    """Schema for bulk operations on a list of notifications"""
+    ids: list[UUID] = Field(..., min_length=1)
+
+
 class NotificationStats(BaseModel):
     """Schema for notification statistics"""
     total: int
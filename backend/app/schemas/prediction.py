@@ -1,13 +1,54 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
 from uuid import UUID
-from typing import Optional
+from typing import Optional, Union
+
+
+class ForecastSeries(BaseModel):
+    """Forecast values for one metric"""
+    yhat: list[float] = Field(..., min_length=1)
+    lower: Optional[list[float]] = None
+    upper: Optional[list[float]] = None
+    
+    @model_validator(mode="after")
+    def validate_lengths(self) -> "ForecastSeries":
+        for bound in (self.lower, self.upper):
+            if bound is not None and len(bound) != len(self.yhat):
+                raise ValueError("lower/upper must have the same length as yhat")
+        return self
+
+
+class CompactForecast(BaseModel):
+    """
+    Typed forecast on a regular time grid.
+    Stored as float32 arrays (see app.core.forecast)
+    """
+    start: datetime = Field(..., description="Timestamp of the first point")
+    step: int = Field(..., gt=0, description="Seconds between points")
+    metrics: dict[str, ForecastSeries] = Field(..., min_length=1)
+    
+    class Config:
+        extra = "forbid"
 
 
 class PredictionCreate(BaseModel):
     """Schema for AI service to create prediction"""
     server_id: str = Field(..., description="Server ID for prediction")
-    forecast: dict = Field(..., description="Forecast data from ML model")
+    forecast: Union[CompactForecast, dict] = Field(
+        ...,
+        union_mode="left_to_right",
+        description="Forecast data from ML model (compact typed format or free-form JSON)"
+    )
+
+    @field_validator('server_id')
+    @classmethod
+    def canonical_server_id(cls, v: str) -> str:
+        """Canonical UUID text, so batch lookups and incident keys match str(server.id)"""
+        try:
+            return str(UUID(v.strip()))
+        except ValueError:
+            # Not a UUID - left as is and reported as an unknown server
+            return v
 
 
 class PredictionResponse(BaseModel):
@@ -25,4 +66,11 @@ class PredictionListResponse(BaseModel):
     """Schema for list of predictions"""
     predictions: list[PredictionResponse]
     total: int
-    server_id: UUID
\ No newline at end of file
+    server_id: UUID
+
+
+class PredictionBatchResponse(BaseModel):
+    """Schema for the result of a batch prediction submission"""
+    created: int
+    unknown_server_ids: list[str]
+    predictions: list[PredictionResponse]
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+
+class PurgeJobResponse(BaseModel):
+    """Schema for the progress of a server or account deletion"""
+    id: UUID
+    entity_type: str
+    entity_id: UUID
+    status: str = Field(..., description="pending, running or done")
+    progress: dict[str, int] = Field(..., description="Rows removed so far, per table")
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -2,6 +2,9 @@ from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
+from app.schemas.metrics import MetricsListResponse, MetricsResponse, MetricsSummary
+from app.schemas.anomaly import AnomalyListResponse, AnomalyStats
+from app.schemas.prediction import PredictionListResponse, PredictionResponse
 import re
 
 
@@ -81,4 +84,18 @@ class ServerResponse(BaseModel):
 class ServerListResponse(BaseModel):
     """Schema for list of servers"""
     servers: list[ServerResponse]
-    total: int
\ No newline at end of file
+    total: int
+
+class ServerDetailResponse(BaseModel):
+    """
+    Schema for the server details page in one response.
+    Sections not requested via `include` are omitted.
+    """
+    server: ServerResponse
+    metrics: Optional[MetricsListResponse] = None
+    latest_metrics: Optional[MetricsResponse] = None
+    metrics_summary: Optional[MetricsSummary] = None
+    anomalies: Optional[AnomalyListResponse] = None
+    anomaly_stats: Optional[AnomalyStats] = None
+    latest_prediction: Optional[PredictionResponse] = None
+    predictions: Optional[PredictionListResponse] = None
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from app.config import get_settings
+from app.services.email_service import email_service
+
+logger = logging.getLogger(__name__)
+
+
+class _UserDigest:
+    """Pending alerts and send history for one user"""
+
+    def __init__(self, to_email: str, user_name: str):
+        self.to_email = to_email
+        self.user_name = user_name
+        self.pending: list[Dict[str, Any]] = []
+        self.pending_total = 0
+        self.window_started: Optional[float] = None
+        self.sent_at: deque = deque()
+        self.last_critical_bypass: Optional[float] = None
+
+
+class AlertDigest:
+    """
+    Per-user alert email digesting and throttling.
+
+    Alerts for a user are collected over a window and sent as one summary
+    email. Each user is capped at a number of emails per hour; alerts that
+    exceed the cap stay pending until the next window. The first critical
+    alert of a window bypasses the digest and is sent immediately.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        window: float,
+        max_per_hour: int,
+        max_items: int
+    ):
+        self.enabled = enabled
+        self.window = window
+        self.max_per_hour = max_per_hour
+        self.max_items = max_items
+        self._users: Dict[str, _UserDigest] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "alerts": 0,
+            "immediate": 0,
+            "digests": 0,
+            "throttled": 0,
+        }
+
+    def start(self) -> None:
+        """Start the periodic flush loop (called from the app lifespan)"""
+        if self._task or not self.enabled:
+            return
+        self._task = asyncio.create_task(self._flush_loop(), name="alert-digest")
+
+    async def drain(self) -> None:
+        """Stop the flush loop and send every pending digest"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush(force=True)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._users),
+            "pending": sum(u.pending_total for u in self._users.values()),
+            **self._stats,
+        }
+
+    def _allowed(self, state: _UserDigest, now: float) -> bool:
+        """Per-user hourly rate cap"""
+        while state.sent_at and now - state.sent_at[0] > 3600:
+            state.sent_at.popleft()
+        return len(state.sent_at) < self.max_per_hour
+
+    async def add(
+        self,
+        user_id: str,
+        to_email: str,
+        user_name: str,
+        server_name: str,
+        anomaly_data: Dict[str, Any]
+    ) -> None:
+        """Register an alert for a user"""
+        self._stats["alerts"] += 1
+
+        if not self.enabled:
+            await email_service.send_anomaly_email(
+                to_email=to_email,
+                user_name=user_name,
+                server_name=server_name,
+                anomaly_data=anomaly_data
+            )
+            return
+
+        now = time.monotonic()
+        async with self._lock:
+            state = self._users.get(user_id)
+            if state is None:
+                state = self._users[user_id] = _UserDigest(to_email, user_name)
+
+            critical_bypass = (
+                anomaly_data.get("severity") == "critical"
+                and (state.last_critical_bypass is None or now - state.last_critical_bypass >= self.window)
+                and self._allowed(state, now)
+            )
+            if critical_bypass:
+                state.last_critical_bypass = now
+                state.sent_at.append(now)
+            else:
+                if state.window_started is None:
+                    state.window_started = now
+                state.pending_total += 1
+                if len(state.pending) < self.max_items:
+                    state.pending.append({"server_name": server_name, **anomaly_data})
+
+        if critical_bypass:
+            self._stats["immediate"] += 1
+            await email_service.send_anomaly_email(
+                to_email=to_email,
+                user_name=user_name,
+                server_name=server_name,
+                anomaly_data=anomaly_data
+            )
+
+    async def flush(self, force: bool = False) -> None:
+        """Send digests for users whose window has elapsed (or all of them if forced)"""
+        now = time.monotonic()
+        ready = []
+
+        async with self._lock:
+            for user_id, state in list(self._users.items()):
+                if state.window_started is None:
+                    # Nothing pending - forget idle users once their history expires
+                    self._allowed(state, now)
+                    bypass_expired = (
+                        state.last_critical_bypass is None
+                        or now - state.last_critical_bypass >= self.window
+                    )
+                    if not state.sent_at and bypass_expired:
+                        del self._users[user_id]
+                    continue
+
+                if not force and now - state.window_started < self.window:
+                    continue
+
+                if not force and not self._allowed(state, now):
+                    # Over the cap - keep collecting until a slot frees up
+                    self._stats["throttled"] += 1
+                    continue
+
+                ready.append((state.to_email, state.user_name, state.pending, state.pending_total))
+                state.sent_at.append(now)
+                state.pending = []
+                state.pending_total = 0
+                state.window_started = None
+
+        for to_email, user_name, alerts, total in ready:
+            self._stats["digests"] += 1
+            await email_service.send_digest_email(
+                to_email=to_email,
+                user_name=user_name,
+                alerts=alerts,
+                total=total
+            )
+
+    async def _flush_loop(self) -> None:
+        interval = min(self.window, 5.0)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Alert digest flush failed: %s", e)
+
+
+def _create_alert_digest() -> AlertDigest:
+    settings = get_settings()
+    return AlertDigest(
+        enabled=settings.EMAIL_DIGEST_ENABLED,
+        window=settings.EMAIL_DIGEST_WINDOW_SECONDS,
+        max_per_hour=settings.EMAIL_MAX_PER_USER_PER_HOUR,
+        max_items=settings.EMAIL_DIGEST_MAX_ITEMS
+    )
+
+
+# Global instance
+alert_digest = _create_alert_digest()
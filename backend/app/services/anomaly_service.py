@@ -1,18 +1,33 @@
-from app.repositories.anomaly_repository import AnomalyRepository
+from app.repositories.anomaly_repository import AnomalyRepository, HOURLY_HISTOGRAM_MAX_DAYS
 from app.repositories.server_repository import ServerRepository
 from app.repositories.user_repository import UserRepository  
-from app.services.email_service import email_service  
+from app.services.alert_digest import alert_digest
 from app.schemas.anomaly import (
     AnomalyCreate,
     AnomalyResponse,
     AnomalyListResponse,
-    AnomalyStats
+    AnomalyStats,
+    AnomalyHistogram,
+    AnomalyBatchResponse
 )
-from app.core.exceptions import NotFoundException, ForbiddenException
+from app.core.exceptions import NotFoundException, ForbiddenException, BadRequestException
+from app.config import get_settings
+from contextlib import AsyncExitStack
+from app.core.etag import version_store, server_scope
+from app.core.singleflight import single_flight
+from app.core.tasks import task_supervisor
 from datetime import datetime
 from typing import Optional
+from app.core.concurrency import gather_with_timeout
 from app.repositories.notification_repository import NotificationRepository
 from app.schemas.notification import NotificationCreate
+from app.services.notification_queue import notification_queue
+from app.services.incident_grouper import incident_grouper
+from app.models.anomaly import Anomaly
+from app.models.server import Server
+import logging
+
+logger = logging.getLogger(__name__)
 
 class AnomalyService:
     def __init__(self, anomaly_repo: AnomalyRepository, server_repo: ServerRepository, notification_repo: NotificationRepository,user_repo: UserRepository):
@@ -31,41 +46,155 @@ class AnomalyService:
         if not server:
             raise NotFoundException(detail="Server not found")
         
-        # Create anomaly
-        anomaly = await self.anomaly_repo.create_anomaly(
-            server_id=anomaly_data.server_id,
-            timestamp=anomaly_data.timestamp,
-            type=anomaly_data.type,
-            severity=anomaly_data.severity,
-            explanation=anomaly_data.explanation,
-            metrics=anomaly_data.metrics
+        # Repeated detections of the same type on the same server are folded
+        # into the open incident instead of creating a new row
+        key = (str(server.id), anomaly_data.type)
+        async with incident_grouper.lock(key):
+            grouped = incident_grouper.record(key, anomaly_data.timestamp, anomaly_data.severity)
+            if grouped is None:
+                anomaly = await self.anomaly_repo.create_anomaly(
+                    server_id=anomaly_data.server_id,
+                    timestamp=anomaly_data.timestamp,
+                    type=anomaly_data.type,
+                    severity=anomaly_data.severity,
+                    explanation=anomaly_data.explanation,
+                    metrics=anomaly_data.metrics
+                )
+                incident_grouper.open(key, anomaly)
+        
+        await task_supervisor.submit_or_run("cache", version_store.bump, server_scope(str(server.id)))
+        
+        if grouped is not None:
+            anomaly, escalated = grouped
+            # Only notify again when the incident got more severe
+            if escalated:
+                await self._notify_anomaly(server, anomaly, anomaly_data)
+        else:
+            await self._notify_anomaly(server, anomaly, anomaly_data)
+        
+        return AnomalyResponse.model_validate(anomaly)
+    
+    async def create_anomalies(self, anomalies: list[AnomalyCreate]) -> AnomalyBatchResponse:
+        """
+        Create many anomalies at once (called by AI service batch runs)
+        Anomalies for unknown servers are skipped and reported
+        """
+        if len(anomalies) > get_settings().BATCH_MAX_ITEMS:
+            raise BadRequestException(detail="Too many anomalies in one batch")
+        
+        # Verify all servers exist with one query
+        server_ids = list({a.server_id for a in anomalies})
+        servers = {str(s.id): s for s in await self.server_repo.get_servers_by_ids(server_ids)}
+        
+        remaining = sorted(
+            (a for a in anomalies if a.server_id in servers),
+            key=lambda a: a.timestamp.timestamp()
+        )
+        keys = sorted({(a.server_id, a.type) for a in remaining})
+        created = []
+        to_notify = []
+        grouped_count = 0
+        
+        async with AsyncExitStack() as stack:
+            for key in keys:
+                await stack.enter_async_context(incident_grouper.lock(key))
+            
+            # Detections that start an incident are inserted together; those
+            # that fold into an incident inserted in the same call are recorded
+            # once its row exists. Another round only runs if one of them did
+            # not fold after all.
+            window = incident_grouper.window.total_seconds()
+            while remaining:
+                to_insert, events, pending_last = [], [], {}
+                for anomaly_data in remaining:
+                    key = (anomaly_data.server_id, anomaly_data.type)
+                    timestamp = anomaly_data.timestamp.timestamp()
+                    last = pending_last.get(key)
+                    if incident_grouper.enabled and last is not None and timestamp - last <= window:
+                        pending_last[key] = max(last, timestamp)
+                        events.append((key, anomaly_data, None))
+                        continue
+                    if last is None:
+                        grouped = incident_grouper.record(key, anomaly_data.timestamp, anomaly_data.severity)
+                        if grouped is not None:
+                            grouped_count += 1
+                            anomaly, escalated = grouped
+                            if escalated:
+                                to_notify.append((anomaly, anomaly_data))
+                            continue
+                    pending_last[key] = timestamp
+                    events.append((key, anomaly_data, len(to_insert)))
+                    to_insert.append(anomaly_data)
+                
+                inserted = await self.anomaly_repo.create_anomalies(to_insert)
+                created.extend(inserted)
+                remaining = []
+                for key, anomaly_data, index in events:
+                    if index is not None:
+                        incident_grouper.open(key, inserted[index])
+                        to_notify.append((inserted[index], anomaly_data))
+                        continue
+                    grouped = incident_grouper.record(key, anomaly_data.timestamp, anomaly_data.severity)
+                    if grouped is None:
+                        remaining.append(anomaly_data)
+                        continue
+                    grouped_count += 1
+                    anomaly, escalated = grouped
+                    if escalated:
+                        to_notify.append((anomaly, anomaly_data))
+        
+        await task_supervisor.submit_or_run("cache", version_store.bump, *(server_scope(sid) for sid in servers))
+        
+        for anomaly, anomaly_data in to_notify:
+            await self._notify_anomaly(servers[anomaly_data.server_id], anomaly, anomaly_data)
+        
+        return AnomalyBatchResponse(
+            created=len(created),
+            grouped=grouped_count,
+            unknown_server_ids=[sid for sid in server_ids if sid not in servers],
+            anomalies=[AnomalyResponse.model_validate(a) for a in created]
         )
+    
+    async def _notify_anomaly(
+        self,
+        server: Server,
+        anomaly: Anomaly,
+        anomaly_data: AnomalyCreate
+    ):
+        """Notify the server owner about a new (or escalated) anomaly"""
         # 🔔 CREATE NOTIFICATION FOR USER
+        # The anomaly is durable at this point - the notification is written
+        # in the background by the notification queue workers
         notification_title = f"Anomaly Detected: {anomaly_data.type.replace('_', ' ').title()}"
         notification_message = f"Server '{server.name}': {anomaly_data.explanation[:200]}"
         
-        await self.notification_repo.create_notification(
+        notification = NotificationCreate(
             user_id=str(server.user_id),
-            title=notification_title,
+            title=notification_title[:200],
             message=notification_message,
             type="anomaly",
             severity=anomaly_data.severity,
             related_id=str(anomaly.id),
             related_type="anomaly"
         )
+        if not await notification_queue.enqueue(notification):
+            # Queue full or not running - write it from a supervised task,
+            # or inline when that queue is full too. The row (and its id) is
+            # built once, so a retried insert cannot write it twice.
+            rows = self.notification_repo.build_notification_rows([notification])
+            await task_supervisor.submit_or_run(
+                "notifications", self.notification_repo.insert_notification_rows, rows
+            )
         if anomaly_data.severity in ['critical', 'high']:
-    # Fire and forget - don't wait for email to complete
-         import asyncio
-         asyncio.create_task(
-         self._send_anomaly_email_async(
-            user_id=str(server.user_id),
-            server_name=server.name,
-            anomaly_data=anomaly_data
-         )
-    )
-        
-        
-        return AnomalyResponse.model_validate(anomaly)
+            # Sent by the supervised email workers; only sent inline when
+            # the email queue cannot take it, so the alert is never dropped
+            await task_supervisor.submit_or_run(
+                "email",
+                self._send_anomaly_email_async,
+                str(server.user_id),
+                server.name,
+                anomaly_data
+            )
     
     async def get_server_anomalies(
         self,
@@ -87,21 +216,22 @@ class AnomalyService:
         if str(server.user_id) != user_id:
             raise ForbiddenException(detail="You don't have access to this server")
         
-        # Get anomalies
-        anomalies = await self.anomaly_repo.get_anomalies_by_server(
-            server_id=server_id,
-            severity=severity,
-            from_time=from_time,
-            to_time=to_time,
-            limit=limit,
-            offset=offset
-        )
-        
-        total = await self.anomaly_repo.get_anomaly_count(
-            server_id=server_id,
-            severity=severity,
-            from_time=from_time,
-            to_time=to_time
+        # Get anomalies page and total count concurrently
+        anomalies, total = await gather_with_timeout(
+            self.anomaly_repo.get_anomalies_by_server(
+                server_id=server_id,
+                severity=severity,
+                from_time=from_time,
+                to_time=to_time,
+                limit=limit,
+                offset=offset
+            ),
+            self.anomaly_repo.get_anomaly_count(
+                server_id=server_id,
+                severity=severity,
+                from_time=from_time,
+                to_time=to_time
+            )
         )
         
         return AnomalyListResponse(
@@ -110,6 +240,48 @@ class AnomalyService:
             server_id=server_id
         )
     
+    async def get_server_anomaly_rows(
+        self,
+        server_id: str,
+        user_id: str,
+        severity: Optional[str] = None,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> dict:
+        """
+        Fast path of get_server_anomalies: returns the raw DB rows in the
+        AnomalyListResponse shape, for direct serialization with orjson
+        """
+        # Check authorization
+        server = await self.server_repo.get_server_by_id(server_id)
+        
+        if not server:
+            raise NotFoundException(detail="Server not found")
+        
+        if str(server.user_id) != user_id:
+            raise ForbiddenException(detail="You don't have access to this server")
+        
+        rows, total = await gather_with_timeout(
+            self.anomaly_repo.get_anomaly_rows(
+                server_id=server_id,
+                severity=severity,
+                from_time=from_time,
+                to_time=to_time,
+                limit=limit,
+                offset=offset
+            ),
+            self.anomaly_repo.get_anomaly_count(
+                server_id=server_id,
+                severity=severity,
+                from_time=from_time,
+                to_time=to_time
+            )
+        )
+        
+        return {"anomalies": rows, "total": total, "server_id": server_id}
+    
     async def get_anomaly(
         self,
         anomaly_id: str,
@@ -137,7 +309,9 @@ class AnomalyService:
     ) -> AnomalyStats:
         """Get anomaly statistics for a server"""
         # Check authorization
-        server = await self.server_repo.get_server_by_id(server_id)
+        server = await single_flight.do(
+            "servers.get_server_by_id", self.server_repo.get_server_by_id, server_id
+        )
         
         if not server:
             raise NotFoundException(detail="Server not found")
@@ -146,42 +320,61 @@ class AnomalyService:
             raise ForbiddenException(detail="You don't have access to this server")
         
         # Get stats
-        stats = await self.anomaly_repo.get_anomaly_stats(server_id, days)
+        stats = await single_flight.do(
+            "anomalies.get_anomaly_stats", self.anomaly_repo.get_anomaly_stats, server_id, days
+        )
         
         return AnomalyStats(**stats)
     
+    async def get_anomaly_histogram(
+        self,
+        server_id: str,
+        user_id: str,
+        bucket: str = "1h",
+        days: int = 7
+    ) -> AnomalyHistogram:
+        """Get anomaly counts per time bucket and severity for a server"""
+        if bucket == "1h" and days > HOURLY_HISTOGRAM_MAX_DAYS:
+            raise BadRequestException(
+                detail=f"Hourly buckets cover at most {HOURLY_HISTOGRAM_MAX_DAYS} days, use bucket=1d for longer ranges"
+            )
+        
+        # Check authorization
+        server = await self.server_repo.get_server_by_id(server_id)
+        
+        if not server:
+            raise NotFoundException(detail="Server not found")
+        
+        if str(server.user_id) != user_id:
+            raise ForbiddenException(detail="You don't have access to this server")
+        
+        histogram = await self.anomaly_repo.get_anomaly_histogram(server_id, bucket, days)
+        
+        return AnomalyHistogram(**histogram)
+    
     async def _send_anomaly_email_async(
         self,
         user_id: str,
         server_name: str,
         anomaly_data: AnomalyCreate
     ):
-        """Méthode privée pour envoyer l'email en arrière-plan"""
-        try:
-            # Récupère l'utilisateur
-            user = await self.user_repo.get_user_by_id(user_id)
-            if not user or not user.email:
-                print(f"⚠️  Utilisateur {user_id} non trouvé ou sans email")
-                return
-            
-            # Envoie l'email
-            success = await email_service.send_anomaly_email(
-                to_email=user.email,
-                user_name=user.first_name or user.email.split('@')[0],
-                server_name=server_name,
-                anomaly_data={
-                    'type': anomaly_data.type,
-                    'severity': anomaly_data.severity,
-                    'timestamp': anomaly_data.timestamp,
-                    'explanation': anomaly_data.explanation
-                }
-            )
-            
-            if success:
-                print(f"📧 Email envoyé avec succès à {user.email}")
-            else:
-                print(f"❌ Échec d'envoi d'email à {user.email}")
-                
-        except Exception as e:
-            # On catch toutes les exceptions pour ne pas bloquer la création d'anomalie
-            print(f"⚠️  Erreur lors de l'envoi d'email: {e}")
\ No newline at end of file
+        """Méthode privée pour envoyer l'email en arrière-plan (exécutée par task_supervisor, qui gère les erreurs et les reprises)"""
+        # Récupère l'utilisateur
+        user = await self.user_repo.get_user_by_id(user_id)
+        if not user or not user.email:
+            logger.warning("Utilisateur %s non trouvé ou sans email", user_id)
+            return
+        
+        # Ajoute l'alerte au digest de l'utilisateur (envoi groupé et limité)
+        await alert_digest.add(
+            user_id=user_id,
+            to_email=user.email,
+            user_name=user.first_name or user.email.split('@')[0],
+            server_name=server_name,
+            anomaly_data={
+                'type': anomaly_data.type,
+                'severity': anomaly_data.severity,
+                'timestamp': anomaly_data.timestamp,
+                'explanation': anomaly_data.explanation
+            }
+        )
@@ -1,16 +1,25 @@
 from datetime import timedelta
 from app.repositories.user_repository import UserRepository
+from app.repositories.purge_repository import PurgeRepository
+from app.repositories.server_repository import ServerRepository
 from app.schemas.user import UserCreate, UserLogin, TokenResponse, UserResponse, UserUpdate, PasswordChange
 from app.core.security import get_password_hash, verify_password, create_access_token
 from app.core.exceptions import UnauthorizedException, ConflictException, NotFoundException
+from app.core.concurrency import gather_with_timeout
+from app.core.etag import version_store, server_scope, user_scope
+from app.core.cache import shared_cache, api_key_cache_key, active_user_cache_key
+from app.schemas.purge import PurgeJobResponse
+from app.services.purge_worker import purge_worker
 from app.config import get_settings
 
 settings = get_settings()
 
 
 class AuthService:
-    def __init__(self, user_repo: UserRepository):
+    def __init__(self, user_repo: UserRepository, server_repo: ServerRepository, purge_repo: PurgeRepository):
         self.user_repo = user_repo
+        self.server_repo = server_repo
+        self.purge_repo = purge_repo
     
     async def register_user(self, user_data: UserCreate) -> TokenResponse:
         """Register a new user and return access token"""
@@ -110,7 +119,7 @@ class AuthService:
         # Update password
         return await self.user_repo.update_password(user_id, new_password_hash)
     
-    async def delete_account(self, user_id: str, password: str) -> bool:
+    async def delete_account(self, user_id: str, password: str) -> PurgeJobResponse:
         """Delete user account (requires password confirmation)"""
         # Get current user
         user = await self.user_repo.get_user_by_id(user_id)
@@ -121,12 +130,43 @@ class AuthService:
         if not verify_password(password, user.password_hash):
             raise UnauthorizedException(detail="Password is incorrect")
         
-        # Delete user
-        return await self.user_repo.delete_user(user_id)
+        # Load the servers first - once soft-deleted they are no longer listed
+        servers = []
+        while True:
+            page = await self.server_repo.get_servers_by_user(user_id, limit=1000, offset=len(servers))
+            servers += page
+            if len(page) < 1000:
+                break
+        
+        # Soft-delete user (and their servers) and schedule the purge of their data
+        job = await self.purge_repo.schedule("user", user_id)
+        if job is None:
+            raise NotFoundException(detail="User not found")
+        purge_worker.wake()
+        
+        # The account's tokens and the agents of its servers must stop authenticating right away
+        await version_store.bump(user_scope(user_id), *(server_scope(str(server.id)) for server in servers))
+        await shared_cache.invalidate(
+            active_user_cache_key(user_id),
+            *(api_key_cache_key(server.api_key) for server in servers if server.api_key)
+        )
+        return PurgeJobResponse.model_validate(job)
+    
+    async def get_account_purge(self, user_id: str) -> PurgeJobResponse:
+        """Progress of the purge of a deleted account"""
+        job = await self.purge_repo.get_job("user", user_id)
+        
+        if not job:
+            raise NotFoundException(detail="No deletion found for this account")
+        
+        return PurgeJobResponse.model_validate(job)
+    
     async def get_all_users(self, limit: int = 100, offset: int = 0) -> dict:
         """Get all users with pagination"""
-        users = await self.user_repo.get_all_users(limit=limit, offset=offset)
-        total = await self.user_repo.get_user_count()
+        users, total = await gather_with_timeout(
+            self.user_repo.get_all_users(limit=limit, offset=offset),
+            self.user_repo.get_user_count()
+        )
         
         return {
             "users": [UserResponse.model_validate(user) for user in users],
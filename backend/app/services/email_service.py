@@ -1,16 +1,183 @@
+import asyncio
+import logging
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 from app.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+
 class EmailService:
+    """
+    Outbound email dispatcher.
+
+    Messages are put on a bounded queue and sent by a single worker that keeps
+    one SMTP connection open and reuses it across messages. The blocking
+    smtplib calls run in a worker thread so the event loop is never blocked.
+    """
+
     def __init__(self):
         settings = get_settings()
         self.gmail_user = settings.GMAIL_USER
         self.gmail_password = settings.GMAIL_PASSWORD
-    
+        self.smtp_host = settings.SMTP_HOST
+        self.smtp_port = settings.SMTP_PORT
+        self.smtp_use_ssl = settings.SMTP_USE_SSL
+        self.smtp_starttls = settings.SMTP_STARTTLS
+        self.smtp_timeout = settings.SMTP_TIMEOUT_SECONDS
+        self.idle_timeout = settings.SMTP_IDLE_TIMEOUT_SECONDS
+        self.queue_size = settings.EMAIL_QUEUE_SIZE
+        self.max_retries = settings.EMAIL_MAX_RETRIES
+        self.retry_backoff = settings.EMAIL_RETRY_BACKOFF_SECONDS
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "failed": 0,
+            "rejected": 0,
+            "retries": 0,
+            "connections_opened": 0,
+        }
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self) -> None:
+        """Start the dispatcher worker (called from the app lifespan)"""
+        if self._task:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._worker(), name="email-dispatcher")
+
+    async def drain(self, timeout: float) -> None:
+        """Send what is queued, then stop the worker and close the connection"""
+        if not self._task:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Email queue drain timed out with %d messages left", self._queue.qsize())
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await asyncio.to_thread(self._close)
+
+    def stats(self) -> dict:
+        """Queue depth and delivery counters"""
+        return {
+            "depth": self._queue.qsize() if self._queue else 0,
+            "max_size": self.queue_size,
+            "connected": self._smtp is not None,
+            **self._stats,
+        }
+
+    # ==================== SMTP CONNECTION ====================
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.smtp_use_ssl:
+            smtp = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port, timeout=self.smtp_timeout)
+        else:
+            smtp = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=self.smtp_timeout)
+            if self.smtp_starttls:
+                smtp.starttls()
+
+        smtp.ehlo()
+        # Local stand-ins (e.g. aiosmtpd) don't advertise AUTH
+        if smtp.has_extn("auth") and self.gmail_password:
+            smtp.login(self.gmail_user, self.gmail_password)
+
+        self._stats["connections_opened"] += 1
+        return smtp
+
+    def _close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+    def _send_sync(self, msg: MIMEMultipart) -> None:
+        """Send over the persistent connection, opening it if needed (runs in a thread)"""
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Server dropped the idle connection - reconnect once and resend
+            self._smtp = self._connect()
+            self._smtp.send_message(msg)
+
+    # ==================== WORKER ====================
+
+    async def _deliver(self, msg: MIMEMultipart) -> bool:
+        """Send one message, retrying with exponential backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self._send_sync, msg)
+                self._stats["sent"] += 1
+                return True
+            except Exception as e:
+                await asyncio.to_thread(self._close)
+                if attempt == self.max_retries:
+                    self._stats["failed"] += 1
+                    logger.error("Email to %s failed after %d attempts: %s", msg["To"], attempt + 1, e)
+                    return False
+                self._stats["retries"] += 1
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+        return False
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                msg = await asyncio.wait_for(self._queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                # Nothing to send for a while - release the connection
+                await asyncio.to_thread(self._close)
+                continue
+
+            try:
+                await self._deliver(msg)
+            finally:
+                self._queue.task_done()
+
+    async def send_message(self, msg: MIMEMultipart) -> bool:
+        """
+        Queue a message for delivery.
+        Returns False if the queue is full. When the dispatcher is not running
+        (e.g. outside the app lifespan) the message is sent directly.
+        """
+        if self._task is None:
+            return await self._deliver(msg)
+
+        try:
+            self._queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            logger.warning("Email queue full, dropping email to %s", msg["To"])
+            return False
+
+        self._stats["enqueued"] += 1
+        return True
+
+    # ==================== MESSAGES ====================
+
+    def _build_message(self, to_email: str, subject: str, body: str) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg['From'] = f"Smart OPS <{self.gmail_user}>"
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
     async def send_anomaly_email(
         self,
         to_email: str,
@@ -18,15 +185,15 @@ class EmailService:
         server_name: str,
         anomaly_data: Dict[str, Any]
     ) -> bool:
-        """Send email for a new anomaly"""
-        
+        """Queue email for a new anomaly"""
+
         # Format date if it's a datetime object
         timestamp = anomaly_data.get('timestamp', '')
         if isinstance(timestamp, datetime):
             timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-        
+
         subject = f"[Smart OPS] {anomaly_data.get('severity', '').upper()} Anomaly on {server_name}"
-        
+
         body = f"""Hello {user_name},
 
 An anomaly has been detected on server {server_name}.
@@ -41,25 +208,44 @@ Explanation:
 Regards,
 Smart OPS Monitoring
 This is an automated email. Please do not reply."""
-        
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = f"Smart OPS <{self.gmail_user}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-                server.login(self.gmail_user, self.gmail_password)
-                server.send_message(msg)
-            
-            print(f"Email sent successfully to {to_email}")
-            return True
-            
-        except Exception as e:
-            print(f"Email sending error: {e}")
-            return False
+
+        return await self.send_message(self._build_message(to_email, subject, body))
+
+    async def send_digest_email(
+        self,
+        to_email: str,
+        user_name: str,
+        alerts: list,
+        total: int
+    ) -> bool:
+        """Queue one summary email covering several anomalies"""
+        servers = sorted({a.get('server_name', '') for a in alerts})
+        subject = f"[Smart OPS] {total} anomalies detected on {len(servers)} server(s)"
+
+        lines = []
+        for alert in alerts:
+            timestamp = alert.get('timestamp', '')
+            if isinstance(timestamp, datetime):
+                timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+            lines.append(
+                f"- [{alert.get('severity', '').upper()}] {timestamp} "
+                f"{alert.get('server_name', '')}: {alert.get('type', '')} - "
+                f"{str(alert.get('explanation', ''))[:200]}"
+            )
+        if total > len(alerts):
+            lines.append(f"... and {total - len(alerts)} more")
+
+        body = f"""Hello {user_name},
+
+{total} anomalies have been detected on your servers since the last summary.
+
+""" + "\n".join(lines) + """
+
+Regards,
+Smart OPS Monitoring
+This is an automated email. Please do not reply."""
+
+        return await self.send_message(self._build_message(to_email, subject, body))
 
 # Global instance
-email_service = EmailService()
\ No newline at end of file
+email_service = EmailService()
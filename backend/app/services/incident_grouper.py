@@ -0,0 +1,210 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from app.config import get_settings
+from app.database.supabase import SupabaseClient
+from app.models.anomaly import Anomaly
+from app.repositories.anomaly_repository import AnomalyRepository
+from app.repositories.factory import anomaly_repository
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+IncidentKey = Tuple[str, str]
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive UTC datetime, so DB (aware) and AI service (often naive) timestamps compare"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class _OpenIncident:
+    """In-memory state of an anomaly row that is still absorbing detections"""
+
+    def __init__(self, anomaly: Anomaly):
+        self.anomaly = anomaly
+        self.dirty = False
+
+    def snapshot(self) -> Anomaly:
+        return self.anomaly.model_copy()
+
+
+class IncidentGrouper:
+    """
+    Groups repeated detections of the same anomaly type on the same server.
+
+    The first detection for a (server_id, type) key is stored as a normal
+    anomaly row and opens an incident. Further detections within the window
+    only update the incident's occurrence count, last_seen and max severity
+    in memory; a periodic flush writes those changes back to the row.
+    Incidents close once no detection has arrived for a full window.
+
+    State is per process: with several workers each one groups the
+    detections it receives.
+    """
+
+    def __init__(self, enabled: bool, window: float, flush_interval: float):
+        self.enabled = enabled
+        self.window = timedelta(seconds=window)
+        self.flush_interval = flush_interval
+        self._open: Dict[IncidentKey, _OpenIncident] = {}
+        self._retired: list[_OpenIncident] = []  # Closed but not yet flushed
+        self._locks: Dict[IncidentKey, asyncio.Lock] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "opened": 0,
+            "grouped": 0,
+            "flushed": 0,
+            "closed": 0,
+        }
+
+    def _get_repo(self) -> AnomalyRepository:
+        return anomaly_repository(SupabaseClient.get_client())
+
+    def lock(self, key: IncidentKey) -> asyncio.Lock:
+        """Serialize match-or-create for one key"""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def record(
+        self,
+        key: IncidentKey,
+        timestamp: datetime,
+        severity: str
+    ) -> Optional[Tuple[Anomaly, bool]]:
+        """
+        Fold a detection into the open incident for this key.
+        Returns (incident snapshot, severity escalated) or None when a new
+        anomaly row must be created.
+        """
+        if not self.enabled:
+            return None
+
+        incident = self._open.get(key)
+        if incident is None:
+            return None
+
+        anomaly = incident.anomaly
+        timestamp = _utc(timestamp)
+        last_seen = anomaly.last_seen
+        if timestamp - last_seen > self.window:
+            # Too far apart - this starts a new incident
+            self._retire(key)
+            return None
+
+        escalated = SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(anomaly.severity, 0)
+        anomaly.occurrence_count += 1
+        anomaly.last_seen = max(last_seen, timestamp)
+        if escalated:
+            anomaly.severity = severity
+        incident.dirty = True
+        self._stats["grouped"] += 1
+
+        return incident.snapshot(), escalated
+
+    def _retire(self, key: IncidentKey) -> None:
+        incident = self._open.pop(key, None)
+        if incident is None:
+            return
+        if incident.dirty:
+            self._retired.append(incident)
+        self._stats["closed"] += 1
+
+    def open(self, key: IncidentKey, anomaly: Anomaly) -> None:
+        """Start tracking a freshly created anomaly row as an incident"""
+        if not self.enabled:
+            return
+        self._retire(key)
+        anomaly = anomaly.model_copy()
+        anomaly.last_seen = _utc(anomaly.last_seen or anomaly.timestamp)
+        self._open[key] = _OpenIncident(anomaly)
+        self._stats["opened"] += 1
+
+    async def _write(self, repo: AnomalyRepository, incident: _OpenIncident) -> bool:
+        anomaly = incident.snapshot()
+        incident.dirty = False
+        try:
+            await repo.update_incident(
+                anomaly_id=str(anomaly.id),
+                occurrence_count=anomaly.occurrence_count,
+                last_seen=anomaly.last_seen,
+                severity=anomaly.severity
+            )
+        except Exception as e:
+            incident.dirty = True
+            logger.error("Failed to flush incident %s: %s", anomaly.id, e)
+            return False
+        self._stats["flushed"] += 1
+        return True
+
+    async def flush(self, close_all: bool = False) -> None:
+        """Write pending incident updates and close incidents whose window has passed"""
+        repo = self._get_repo()
+        now = datetime.utcnow()
+
+        retired, self._retired = self._retired, []
+        for incident in retired:
+            if not await self._write(repo, incident):
+                self._retired.append(incident)
+
+        for key, incident in list(self._open.items()):
+            if incident.dirty and not await self._write(repo, incident):
+                continue
+
+            # open() may have replaced the incident while the write was awaited
+            if self._open.get(key) is not incident:
+                continue
+
+            if close_all or now - incident.anomaly.last_seen > self.window:
+                self._retire(key)
+                lock = self._locks.get(key)
+                if lock is not None and not lock.locked():
+                    self._locks.pop(key, None)
+
+    def start(self) -> None:
+        """Start the periodic flush loop (called from the app lifespan)"""
+        if self._task or not self.enabled:
+            return
+        self._task = asyncio.create_task(self._flush_loop(), name="incident-flush")
+
+    async def drain(self) -> None:
+        """Stop the flush loop and write every pending update"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush(close_all=True)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Incident flush failed: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "open": len(self._open),
+            "pending_updates": sum(1 for i in self._open.values() if i.dirty) + len(self._retired),
+            **self._stats,
+        }
+
+
+def _create_incident_grouper() -> IncidentGrouper:
+    settings = get_settings()
+    return IncidentGrouper(
+        enabled=settings.INCIDENT_GROUPING_ENABLED,
+        window=settings.INCIDENT_WINDOW_SECONDS,
+        flush_interval=settings.INCIDENT_FLUSH_INTERVAL_SECONDS
+    )
+
+
+# Global instance
+incident_grouper = _create_incident_grouper()
@@ -2,13 +2,42 @@ from app.repositories.metrics_repository import MetricsRepository
 from app.repositories.server_repository import ServerRepository
 from app.schemas.metrics import (
     MetricsIngest,
+    MetricsBatchIngest,
+    MetricsBatchResponse,
     MetricsResponse,
     MetricsListResponse,
     MetricsSummary
 )
-from app.core.exceptions import UnauthorizedException, NotFoundException, ForbiddenException
+from app.core.exceptions import UnauthorizedException, NotFoundException, ForbiddenException, BadRequestException
+from app.core.concurrency import gather_with_timeout
+from app.core.etag import version_store, server_scope, user_scope
+from app.core.singleflight import single_flight
+from app.core.tasks import task_supervisor
+from app.core.cache import shared_cache, api_key_cache_key
+from app.config import get_settings
+from app.models.server import Server
+from app.core.export import EXPORT_FORMATS, encode_csv, encode_ndjson, encode_parquet, require_parquet
+from app.repositories.metrics_repository import ROW_COLUMNS
 from datetime import datetime
-from typing import Optional
+from typing import Optional, AsyncIterator, Tuple
+
+settings = get_settings()
+
+
+def _metrics_parquet_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.string()),
+        ("server_id", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("cpu_percent", pa.float64()),
+        ("ram_percent", pa.float64()),
+        ("disk_read", pa.int64()),
+        ("disk_write", pa.int64()),
+        ("net_sent", pa.int64()),
+        ("net_recv", pa.int64()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+    ])
 
 
 class MetricsService:
@@ -21,11 +50,7 @@ class MetricsService:
         Ingest metrics from monitoring agent
         Authenticates using server API key
         """
-        # Verify API key and get server
-        server = await self.server_repo.get_server_by_api_key(metrics_data.api_key)
-        
-        if not server:
-            raise UnauthorizedException(detail="Invalid API key")
+        server = await self._authenticate(metrics_data.api_key)
         
         # Insert metrics
         metrics = await self.metrics_repo.insert_metrics(
@@ -41,8 +66,49 @@ class MetricsService:
         # Update server's last_seen timestamp
         await self.server_repo.update_last_seen(str(server.id))
         
+        # Invalidate cached reads (latest metrics, server list last_seen)
+        await task_supervisor.submit_or_run(
+            "cache", version_store.bump, server_scope(str(server.id)), user_scope(str(server.user_id))
+        )
+        
         return MetricsResponse.model_validate(metrics)
     
+    async def ingest_metrics_batch(self, batch: MetricsBatchIngest) -> MetricsBatchResponse:
+        """
+        Ingest many samples from one agent with a single bulk insert
+        Authenticates using server API key
+        """
+        if len(batch.samples) > settings.BATCH_MAX_ITEMS:
+            raise BadRequestException(detail="Too many samples in one batch")
+        
+        server = await self._authenticate(batch.api_key)
+        
+        inserted = await self.metrics_repo.insert_metrics_many(str(server.id), batch.samples)
+        
+        await self.server_repo.update_last_seen(str(server.id))
+        
+        await task_supervisor.submit_or_run(
+            "cache", version_store.bump, server_scope(str(server.id)), user_scope(str(server.user_id))
+        )
+        
+        return MetricsBatchResponse(server_id=server.id, inserted=inserted)
+    
+    async def _authenticate(self, api_key: str) -> Server:
+        """Server behind an agent API key (cached, agents push every few seconds)"""
+        async def load_server():
+            server = await self.server_repo.get_server_by_api_key(api_key)
+            return server.model_dump(mode="json") if server else None
+        
+        server = await shared_cache.get_or_load(
+            api_key_cache_key(api_key),
+            load_server,
+            ttl=settings.API_KEY_CACHE_TTL_SECONDS
+        )
+        
+        if not server:
+            raise UnauthorizedException(detail="Invalid API key")
+        return Server.model_validate(server)
+    
     async def get_server_metrics(
         self,
         server_id: str,
@@ -62,19 +128,20 @@ class MetricsService:
         if str(server.user_id) != user_id:
             raise ForbiddenException(detail="You don't have access to this server")
         
-        # Get metrics
-        metrics = await self.metrics_repo.get_metrics_by_server(
-            server_id=server_id,
-            from_time=from_time,
-            to_time=to_time,
-            limit=limit,
-            offset=offset
-        )
-        
-        total = await self.metrics_repo.get_metrics_count(
-            server_id=server_id,
-            from_time=from_time,
-            to_time=to_time
+        # Get metrics page and total count concurrently
+        metrics, total = await gather_with_timeout(
+            self.metrics_repo.get_metrics_by_server(
+                server_id=server_id,
+                from_time=from_time,
+                to_time=to_time,
+                limit=limit,
+                offset=offset
+            ),
+            self.metrics_repo.get_metrics_count(
+                server_id=server_id,
+                from_time=from_time,
+                to_time=to_time
+            )
         )
         
         return MetricsListResponse(
@@ -83,6 +150,84 @@ class MetricsService:
             server_id=server_id
         )
     
+    async def get_server_metrics_rows(
+        self,
+        server_id: str,
+        user_id: str,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> dict:
+        """
+        Fast path of get_server_metrics: returns the raw DB rows in the
+        MetricsListResponse shape, for direct serialization with orjson
+        """
+        # Check if server exists and user owns it
+        server = await self.server_repo.get_server_by_id(server_id)
+        
+        if not server:
+            raise NotFoundException(detail="Server not found")
+        
+        if str(server.user_id) != user_id:
+            raise ForbiddenException(detail="You don't have access to this server")
+        
+        rows, total = await gather_with_timeout(
+            self.metrics_repo.get_metrics_rows(
+                server_id=server_id,
+                from_time=from_time,
+                to_time=to_time,
+                limit=limit,
+                offset=offset
+            ),
+            self.metrics_repo.get_metrics_count(
+                server_id=server_id,
+                from_time=from_time,
+                to_time=to_time
+            )
+        )
+        
+        return {"metrics": rows, "total": total, "server_id": server_id}
+    
+    async def export_metrics(
+        self,
+        server_id: str,
+        user_id: str,
+        format: str,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None
+    ) -> Tuple[AsyncIterator[bytes], str, str]:
+        """
+        Stream a server's metrics history as csv, ndjson or parquet
+        Returns (byte stream, media type, file name); authorization is checked
+        before streaming starts
+        """
+        # Check if server exists and user owns it
+        server = await self.server_repo.get_server_by_id(server_id)
+        
+        if not server:
+            raise NotFoundException(detail="Server not found")
+        
+        if str(server.user_id) != user_id:
+            raise ForbiddenException(detail="You don't have access to this server")
+        
+        media_type, extension = EXPORT_FORMATS[format]
+        pages = self.metrics_repo.iter_metrics_pages(
+            server_id=server_id,
+            from_time=from_time,
+            to_time=to_time
+        )
+        
+        if format == "csv":
+            stream = encode_csv(pages, ROW_COLUMNS.split(","))
+        elif format == "ndjson":
+            stream = encode_ndjson(pages, ROW_COLUMNS.split(","))
+        else:
+            require_parquet()
+            stream = encode_parquet(pages, _metrics_parquet_schema())
+        
+        return stream, media_type, f"metrics-{server_id}.{extension}"
+    
     async def get_latest_metrics(
         self,
         server_id: str,
@@ -90,7 +235,9 @@ class MetricsService:
     ) -> Optional[MetricsResponse]:
         """Get latest metrics for a server"""
         # Check authorization
-        server = await self.server_repo.get_server_by_id(server_id)
+        server = await single_flight.do(
+            "servers.get_server_by_id", self.server_repo.get_server_by_id, server_id
+        )
         
         if not server:
             raise NotFoundException(detail="Server not found")
@@ -99,7 +246,9 @@ class MetricsService:
             raise ForbiddenException(detail="You don't have access to this server")
         
         # Get latest metrics
-        metrics = await self.metrics_repo.get_latest_metrics(server_id)
+        metrics = await single_flight.do(
+            "metrics.get_latest_metrics", self.metrics_repo.get_latest_metrics, server_id
+        )
         
         if not metrics:
             return None
@@ -114,7 +263,9 @@ class MetricsService:
     ) -> Optional[MetricsSummary]:
         """Get aggregated metrics summary"""
         # Check authorization
-        server = await self.server_repo.get_server_by_id(server_id)
+        server = await single_flight.do(
+            "servers.get_server_by_id", self.server_repo.get_server_by_id, server_id
+        )
         
         if not server:
             raise NotFoundException(detail="Server not found")
@@ -123,7 +274,9 @@ class MetricsService:
             raise ForbiddenException(detail="You don't have access to this server")
         
         # Get summary
-        summary = await self.metrics_repo.get_metrics_summary(server_id, hours)
+        summary = await single_flight.do(
+            "metrics.get_metrics_summary", self.metrics_repo.get_metrics_summary, server_id, hours
+        )
         
         if not summary:
             return None
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from typing import Optional
+from app.config import get_settings
+from app.core.tasks import task_supervisor
+from app.database.supabase import SupabaseClient
+from app.repositories.notification_repository import NotificationRepository
+from app.schemas.notification import NotificationCreate
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationQueue:
+    """
+    In-process job queue for notification fan-out.
+
+    Producers enqueue notifications and return immediately; a small pool of
+    workers drains the queue and collects notifications into batches. Each
+    batch is written with one multi-row insert on the task supervisor's
+    "notifications" queue, which bounds, retries and times the writes.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        workers: int,
+        batch_size: int,
+        batch_wait: float
+    ):
+        self.max_size = max_size
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._accepting = False
+        self._stats = {
+            "enqueued": 0,
+            "submitted": 0,  # Notifications handed to the supervisor in batches
+            "failed": 0,
+            "rejected": 0,
+            "batches": 0,
+        }
+
+    def _get_repo(self) -> NotificationRepository:
+        return NotificationRepository(SupabaseClient.get_client())
+
+    def start(self) -> None:
+        """Start the worker pool (called from the app lifespan)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"notification-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._accepting = True
+
+    async def enqueue(self, notification: NotificationCreate) -> bool:
+        """
+        Queue a notification for batched insertion.
+        Returns False if the queue is not running or full; the caller
+        should then write the notification itself.
+        """
+        if not self._accepting:
+            return False
+
+        try:
+            self._queue.put_nowait(notification)
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            return False
+
+        self._stats["enqueued"] += 1
+        return True
+
+    async def _next_batch(self) -> list[NotificationCreate]:
+        """Wait for one item, give producers batch_wait to add more, then take up to a full batch"""
+        batch = [await self._queue.get()]
+        if self._queue.qsize() < self.batch_size - 1:
+            await asyncio.sleep(self.batch_wait)
+
+        # get_nowait() never blocks, so no item can be lost to a timeout
+        # firing just as a blocking get() completes
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+        return batch
+
+    async def _worker(self) -> None:
+        repo = self._get_repo()
+        while True:
+            batch = await self._next_batch()
+            # Rows (and their ids) are built once, so a retried insert cannot duplicate them
+            rows = repo.build_notification_rows(batch)
+            try:
+                await task_supervisor.submit_or_run("notifications", repo.insert_notification_rows, rows)
+                self._stats["submitted"] += len(rows)
+                self._stats["batches"] += 1
+            except Exception as e:
+                # Written inline (supervisor full or stopped) and failed -
+                # fall back to one row at a time so one bad row or a
+                # transient error does not lose the whole batch
+                logger.warning("Failed to write %d notifications, retrying one by one: %s", len(rows), e)
+                await self._write_one_by_one(repo, rows)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_one_by_one(self, repo: NotificationRepository, rows: list[dict]) -> None:
+        for row in rows:
+            try:
+                await repo.insert_notification_rows([row])
+                self._stats["submitted"] += 1
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.error("Failed to write notification for user %s: %s", row["user_id"], e)
+
+    async def drain(self, timeout: float) -> None:
+        """Stop accepting work, flush what is queued, then stop the workers"""
+        if not self._tasks:
+            return
+
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Notification queue drain timed out with %d items left",
+                self._queue.qsize()
+            )
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        """Queue depth and throughput counters"""
+        return {
+            "depth": self._queue.qsize() if self._queue else 0,
+            "max_size": self.max_size,
+            "workers": len(self._tasks),
+            **self._stats,
+        }
+
+
+def _create_notification_queue() -> NotificationQueue:
+    settings = get_settings()
+    return NotificationQueue(
+        max_size=settings.NOTIFICATION_QUEUE_SIZE,
+        workers=settings.NOTIFICATION_WORKERS,
+        batch_size=settings.NOTIFICATION_BATCH_SIZE,
+        batch_wait=settings.NOTIFICATION_BATCH_WAIT_SECONDS
+    )
+
+
+# Global instance
+notification_queue = _create_notification_queue()
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from app.config import get_settings
+from app.database.supabase import SupabaseClient
+from app.repositories.notification_repository import NotificationRepository
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationRetention:
+    """
+    Applies the notification retention policy in the background.
+
+    Every interval it removes read notifications older than `read_ttl_days`,
+    then trims each user over the cap (listed once per run) to their
+    newest `max_per_user` notifications.
+    Removed rows are deleted, or moved to notifications_archive when
+    `archive` is set. Each database call handles at most `chunk_size` rows
+    in its own short transaction, so a large backlog never holds locks on
+    the table for long; calls repeat until a chunk comes back short.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        interval: float,
+        read_ttl_days: int,
+        max_per_user: int,
+        archive: bool,
+        chunk_size: int
+    ):
+        self.enabled = enabled
+        self.interval = interval
+        self.read_ttl_days = read_ttl_days
+        self.max_per_user = max_per_user
+        self.archive = archive
+        self.chunk_size = chunk_size
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "runs": 0,
+            "expired": 0,
+            "capped": 0,
+            "chunks": 0,
+            "failed": 0,
+            "last_run_ms": 0.0,
+        }
+
+    def _get_repo(self) -> NotificationRepository:
+        return NotificationRepository(SupabaseClient.get_client())
+
+    async def run(self) -> dict:
+        """Apply the policy once; returns the rows removed by each rule"""
+        started = time.perf_counter()
+        repo = self._get_repo()
+        removed = {"expired": 0, "capped": 0}
+
+        if self.read_ttl_days > 0:
+            before = datetime.utcnow() - timedelta(days=self.read_ttl_days)
+            removed["expired"] = await self._in_chunks(
+                lambda: repo.expire_read(before, self.archive, self.chunk_size)
+            )
+
+        if self.max_per_user > 0:
+            # Over-cap users are found once per run, then trimmed one by one
+            for user_id in await repo.get_over_cap_users(self.max_per_user):
+                removed["capped"] += await self._in_chunks(
+                    lambda user_id=user_id: repo.cap_user(user_id, self.max_per_user, self.archive, self.chunk_size)
+                )
+
+        if removed["expired"] or removed["capped"]:
+            logger.info(
+                "Notification retention removed %d expired and %d over-cap notifications",
+                removed["expired"], removed["capped"]
+            )
+        self._stats["expired"] += removed["expired"]
+        self._stats["capped"] += removed["capped"]
+        self._stats["runs"] += 1
+        self._stats["last_run_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return removed
+
+    async def _in_chunks(self, remove_chunk: Callable[[], Awaitable[int]]) -> int:
+        total = 0
+        while True:
+            removed = await remove_chunk()
+            self._stats["chunks"] += 1
+            total += removed
+            if removed < self.chunk_size:
+                return total
+            # Let request handlers in between chunks
+            await asyncio.sleep(0)
+
+    def start(self) -> None:
+        """Start the retention loop (called from the app lifespan)"""
+        if self._task or not self.enabled:
+            return
+        self._task = asyncio.create_task(self._retention_loop(), name="notification-retention")
+
+    async def drain(self) -> None:
+        """Stop the retention loop"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _retention_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run()
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.error("Notification retention failed: %s", e)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self._stats}
+
+
+def _create_notification_retention() -> NotificationRetention:
+    settings = get_settings()
+    return NotificationRetention(
+        enabled=settings.NOTIFICATION_RETENTION_ENABLED,
+        interval=settings.NOTIFICATION_RETENTION_INTERVAL_SECONDS,
+        read_ttl_days=settings.NOTIFICATION_READ_TTL_DAYS,
+        max_per_user=settings.NOTIFICATION_MAX_PER_USER,
+        archive=settings.NOTIFICATION_RETENTION_ARCHIVE,
+        chunk_size=settings.NOTIFICATION_RETENTION_CHUNK_SIZE
+    )
+
+
+# Global instance
+notification_retention = _create_notification_retention()
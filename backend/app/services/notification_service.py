@@ -5,8 +5,11 @@ from app.schemas.notification import (
     NotificationListResponse,
     NotificationStats
 )
-from app.core.exceptions import NotFoundException, ForbiddenException
+from app.core.exceptions import NotFoundException, ForbiddenException, BadRequestException
+from app.core.concurrency import gather_with_timeout
+from app.config import get_settings
 from typing import Optional
+from uuid import UUID
 
 
 class NotificationService:
@@ -39,23 +42,24 @@ class NotificationService:
         offset: int = 0
     ) -> NotificationListResponse:
         """Get user's notifications"""
-        notifications = await self.notification_repo.get_user_notifications(
-            user_id=user_id,
-            is_read=is_read,
-            type=type,
-            limit=limit,
-            offset=offset
-        )
-        
-        total = await self.notification_repo.get_notification_count(
-            user_id=user_id,
-            is_read=is_read,
-            type=type
-        )
-        
-        unread_count = await self.notification_repo.get_notification_count(
-            user_id=user_id,
-            is_read=False
+        # List, total and unread count are independent - run them concurrently
+        notifications, total, unread_count = await gather_with_timeout(
+            self.notification_repo.get_user_notifications(
+                user_id=user_id,
+                is_read=is_read,
+                type=type,
+                limit=limit,
+                offset=offset
+            ),
+            self.notification_repo.get_notification_count(
+                user_id=user_id,
+                is_read=is_read,
+                type=type
+            ),
+            self.notification_repo.get_notification_count(
+                user_id=user_id,
+                is_read=False
+            )
         )
         
         return NotificationListResponse(
@@ -64,6 +68,10 @@ class NotificationService:
             unread_count=unread_count
         )
     
+    async def get_unread_count(self, user_id: str) -> int:
+        """Number of unread notifications (badge)"""
+        return await self.notification_repo.get_notification_count(user_id=user_id, is_read=False)
+    
     async def mark_as_read(
         self,
         notification_id: str,
@@ -78,6 +86,30 @@ class NotificationService:
         count = await self.notification_repo.mark_all_as_read(user_id)
         return {"marked_as_read": count}
     
+    async def mark_many_as_read(self, notification_ids: list[UUID], user_id: str) -> dict:
+        """Mark a list of the user's notifications as read"""
+        ids = self._bulk_ids(notification_ids)
+        count = await self.notification_repo.mark_many_as_read(ids, user_id)
+        return {"marked_as_read": count}
+    
+    async def delete_many(self, notification_ids: list[UUID], user_id: str) -> dict:
+        """Delete a list of the user's notifications"""
+        ids = self._bulk_ids(notification_ids)
+        count = await self.notification_repo.delete_many(ids, user_id)
+        return {"deleted": count}
+    
+    async def delete_read_older_than(self, user_id: str, days: int) -> dict:
+        """Delete the user's read notifications older than N days"""
+        count = await self.notification_repo.delete_read_older_than(user_id, days)
+        return {"deleted": count}
+    
+    def _bulk_ids(self, notification_ids: list[UUID]) -> list[str]:
+        # The ids go into the PostgREST request URL, so their number is capped
+        max_ids = get_settings().NOTIFICATION_BULK_MAX_IDS
+        if len(notification_ids) > max_ids:
+            raise BadRequestException(detail=f"At most {max_ids} notifications per request")
+        return list(dict.fromkeys(str(i) for i in notification_ids))
+    
     async def delete_notification(
         self,
         notification_id: str,
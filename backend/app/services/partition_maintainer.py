@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from typing import Optional
+from app.config import get_settings
+from app.database.supabase import SupabaseClient
+from app.repositories.metrics_repository import MetricsRepository
+from app.repositories.factory import metrics_repository
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintainer:
+    """
+    Keeps the daily metrics partitions ahead of time and applies retention.
+
+    Runs once at startup and then every interval: creates the partitions
+    for the next `days_ahead` days, moves whatever is left of the
+    pre-partitioning table (metrics_legacy) into them one day per call,
+    newest first, and drops partitions older than `retention_days` (a DROP
+    TABLE per day instead of a DELETE of its rows). The database functions
+    take an advisory lock, so every worker can run the job.
+    """
+
+    def __init__(self, enabled: bool, interval: float, days_ahead: int, retention_days: int):
+        self.enabled = enabled
+        self.interval = interval
+        self.days_ahead = days_ahead
+        self.retention_days = retention_days
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "runs": 0,
+            "created": 0,
+            "backfilled": 0,
+            "dropped": 0,
+            "failed": 0,
+        }
+
+    def _get_repo(self) -> MetricsRepository:
+        return metrics_repository(SupabaseClient.get_client())
+
+    async def run(self) -> None:
+        """Create upcoming partitions, backfill legacy rows, then drop expired partitions"""
+        repo = self._get_repo()
+
+        created = await repo.create_partitions(self.days_ahead)
+        if created:
+            logger.info("Created metrics partitions: %s", ", ".join(created))
+        self._stats["created"] += len(created)
+
+        # One short transaction per day; a no-op once metrics_legacy is gone
+        while (backfilled := await repo.backfill_legacy_day()) is not None:
+            logger.info("Backfilled metrics for %s (%d rows)", backfilled["day"], backfilled["moved"])
+            self._stats["backfilled"] += 1
+
+        if self.retention_days > 0:
+            dropped = await repo.drop_partitions(self.retention_days)
+            if dropped:
+                logger.info("Dropped metrics partitions: %s", ", ".join(dropped))
+            self._stats["dropped"] += len(dropped)
+
+        self._stats["runs"] += 1
+
+    def start(self) -> None:
+        """Start the maintenance loop (called from the app lifespan)"""
+        if self._task or not self.enabled:
+            return
+        self._task = asyncio.create_task(self._maintenance_loop(), name="metrics-partitions")
+
+    async def drain(self) -> None:
+        """Stop the maintenance loop"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.error("Metrics partition maintenance failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self._stats}
+
+
+def _create_partition_maintainer() -> PartitionMaintainer:
+    settings = get_settings()
+    return PartitionMaintainer(
+        enabled=settings.METRICS_PARTITION_MAINTENANCE_ENABLED,
+        interval=settings.METRICS_PARTITION_INTERVAL_SECONDS,
+        days_ahead=settings.METRICS_PARTITION_DAYS_AHEAD,
+        retention_days=settings.METRICS_RETENTION_DAYS
+    )
+
+
+# Global instance
+partition_maintainer = _create_partition_maintainer()
@@ -2,13 +2,38 @@ from app.repositories.prediction_repository import PredictionRepository
 from app.repositories.server_repository import ServerRepository
 from app.schemas.prediction import (
     PredictionCreate,
+    CompactForecast,
     PredictionResponse,
-    PredictionListResponse
+    PredictionListResponse,
+    PredictionBatchResponse
 )
-from app.core.exceptions import NotFoundException, ForbiddenException
+from app.core.exceptions import NotFoundException, ForbiddenException, BadRequestException
+from app.config import get_settings
+from app.core.concurrency import gather_with_timeout
+from app.core.forecast import encode_forecast
+from app.core.etag import version_store, server_scope
+from app.core.tasks import task_supervisor
 from typing import Optional
 
 
+def _stored_forecast(forecast) -> dict:
+    """Pack typed forecasts into float32 arrays; free-form dicts are stored as-is"""
+    if isinstance(forecast, CompactForecast):
+        return encode_forecast(
+            start=forecast.start,
+            step=forecast.step,
+            metrics={name: series.model_dump() for name, series in forecast.metrics.items()}
+        )
+    return forecast
+
+
+def _parse_metrics(metrics: Optional[str]) -> Optional[list[str]]:
+    """Comma-separated metric names from a query parameter"""
+    if not metrics:
+        return None
+    return [m.strip() for m in metrics.split(",") if m.strip()]
+
+
 class PredictionService:
     def __init__(self, prediction_repo: PredictionRepository, server_repo: ServerRepository):
         self.prediction_repo = prediction_repo
@@ -27,17 +52,49 @@ class PredictionService:
         # Create prediction
         prediction = await self.prediction_repo.create_prediction(
             server_id=prediction_data.server_id,
-            forecast=prediction_data.forecast
+            forecast=_stored_forecast(prediction_data.forecast)
         )
+        await task_supervisor.submit_or_run("cache", version_store.bump, server_scope(str(server.id)))
         
         return PredictionResponse.model_validate(prediction)
     
+    async def create_predictions(self, predictions: list[PredictionCreate]) -> PredictionBatchResponse:
+        """
+        Create many predictions at once (called by AI service batch runs)
+        Predictions for unknown servers are skipped and reported
+        """
+        if len(predictions) > get_settings().BATCH_MAX_ITEMS:
+            raise BadRequestException(detail="Too many predictions in one batch")
+        
+        # Verify all servers exist with one query
+        server_ids = list({p.server_id for p in predictions})
+        servers = await self.server_repo.get_servers_by_ids(server_ids)
+        known = {str(s.id) for s in servers}
+        
+        created = await self.prediction_repo.create_predictions([
+            {"server_id": p.server_id, "forecast": _stored_forecast(p.forecast)}
+            for p in predictions if p.server_id in known
+        ])
+        await task_supervisor.submit_or_run("cache", version_store.bump, *(server_scope(sid) for sid in known))
+        
+        return PredictionBatchResponse(
+            created=len(created),
+            unknown_server_ids=[sid for sid in server_ids if sid not in known],
+            predictions=[PredictionResponse.model_validate(p) for p in created]
+        )
+    
     async def get_latest_prediction(
         self,
         server_id: str,
-        user_id: str
+        user_id: str,
+        metrics: Optional[str] = None,
+        horizon: Optional[int] = None,
+        packed: bool = False
     ) -> Optional[PredictionResponse]:
-        """Get latest prediction for a server"""
+        """
+        Get latest prediction for a server
+        metrics/horizon/packed only apply to compact forecasts
+        """
         # Check authorization
         server = await self.server_repo.get_server_by_id(server_id)
         
@@ -48,7 +105,12 @@ class PredictionService:
             raise ForbiddenException(detail="You don't have access to this server")
         
         # Get latest prediction
-        prediction = await self.prediction_repo.get_latest_prediction(server_id)
+        prediction = await self.prediction_repo.get_latest_prediction(
+            server_id,
+            metrics=_parse_metrics(metrics),
+            horizon=horizon,
+            decode=not packed
+        )
         
         if not prediction:
             return None
@@ -60,7 +122,10 @@ class PredictionService:
         server_id: str,
         user_id: str,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        metrics: Optional[str] = None,
+        horizon: Optional[int] = None,
+        packed: bool = False
     ) -> PredictionListResponse:
         """Get prediction history for a server"""
         # Check authorization
@@ -72,15 +137,19 @@ class PredictionService:
         if str(server.user_id) != user_id:
             raise ForbiddenException(detail="You don't have access to this server")
         
-        # Get predictions
-        predictions = await self.prediction_repo.get_predictions_by_server(
-            server_id=server_id,
-            limit=limit,
-            offset=offset
+        # Get predictions page and total count concurrently
+        predictions, total = await gather_with_timeout(
+            self.prediction_repo.get_predictions_by_server(
+                server_id=server_id,
+                limit=limit,
+                offset=offset,
+                metrics=_parse_metrics(metrics),
+                horizon=horizon,
+                decode=not packed
+            ),
+            self.prediction_repo.get_prediction_count(server_id)
         )
         
-        total = await self.prediction_repo.get_prediction_count(server_id)
-        
         return PredictionListResponse(
             predictions=[PredictionResponse.model_validate(p) for p in predictions],
             total=total,
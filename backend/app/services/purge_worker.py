@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+from app.config import get_settings
+from app.database.supabase import SupabaseClient
+from app.models.purge_job import PurgeJob
+from app.repositories.purge_repository import PurgeRepository
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeWorker:
+    """
+    Removes the data of soft-deleted servers and users in the background.
+
+    Deleting a server or an account only marks it deleted and creates a
+    purge job. This worker runs the open jobs: each purge_step() call
+    removes at most `chunk_size` rows (metrics, anomalies, predictions,
+    notifications, then the server or user row) in its own short
+    transaction and records the progress on the job, so deletion never
+    blocks ingest behind one long cascading DELETE. Jobs are polled every
+    interval; wake() starts a pass right away after a deletion here.
+    """
+
+    def __init__(self, enabled: bool, interval: float, chunk_size: int, chunk_pause: float):
+        self.enabled = enabled
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stats = {
+            "runs": 0,
+            "jobs_done": 0,
+            "chunks": 0,
+            "rows": 0,
+            "failed": 0,
+            "last_run_ms": 0.0,
+        }
+
+    def _get_repo(self) -> PurgeRepository:
+        return PurgeRepository(SupabaseClient.get_client())
+
+    async def run(self) -> int:
+        """Run every open job to completion; returns the number of jobs finished"""
+        started = time.perf_counter()
+        repo = self._get_repo()
+        finished = 0
+
+        for job in await repo.get_open_jobs():
+            try:
+                await self._purge(repo, job)
+                finished += 1
+            except Exception as e:
+                # Left open - the next pass resumes where this one stopped
+                self._stats["failed"] += 1
+                logger.error("Purge of %s %s failed: %s", job.entity_type, job.entity_id, e)
+                await repo.record_error(str(job.id), str(e))
+
+        self._stats["jobs_done"] += finished
+        self._stats["runs"] += 1
+        self._stats["last_run_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return finished
+
+    async def _purge(self, repo: PurgeRepository, job: PurgeJob) -> None:
+        while True:
+            step = await repo.purge_step(str(job.id), self.chunk_size)
+            self._stats["chunks"] += 1
+            self._stats["rows"] += step["purged"]
+            if step["done"]:
+                logger.info("Purged %s %s", job.entity_type, job.entity_id)
+                return
+            # Let request handlers (and ingest) in between chunks
+            await asyncio.sleep(self.chunk_pause)
+
+    def wake(self) -> None:
+        """Start a pass now instead of at the next interval"""
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the purge loop (called from the app lifespan)"""
+        if self._task or not self.enabled:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._purge_loop(), name="purge-worker")
+
+    async def drain(self) -> None:
+        """Stop the purge loop (an interrupted job resumes on the next start)"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _purge_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.run()
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.error("Purge pass failed: %s", e)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self._stats}
+
+
+def _create_purge_worker() -> PurgeWorker:
+    settings = get_settings()
+    return PurgeWorker(
+        enabled=settings.PURGE_ENABLED,
+        interval=settings.PURGE_INTERVAL_SECONDS,
+        chunk_size=settings.PURGE_CHUNK_SIZE,
+        chunk_pause=settings.PURGE_CHUNK_PAUSE_SECONDS
+    )
+
+
+# Global instance
+purge_worker = _create_purge_worker()
@@ -0,0 +1,147 @@
+from app.repositories.server_repository import ServerRepository
+from app.repositories.metrics_repository import MetricsRepository
+from app.repositories.anomaly_repository import AnomalyRepository
+from app.repositories.prediction_repository import PredictionRepository
+from app.schemas.server import ServerResponse
+from app.schemas.metrics import MetricsResponse, MetricsSummary
+from app.schemas.anomaly import AnomalyStats
+from app.schemas.prediction import PredictionResponse
+from app.core.exceptions import NotFoundException, ForbiddenException, BadRequestException
+from app.core.concurrency import gather_with_timeout
+from app.core.singleflight import single_flight
+from typing import Optional
+
+DETAIL_SECTIONS = (
+    "metrics",
+    "latest_metrics",
+    "metrics_summary",
+    "anomalies",
+    "anomaly_stats",
+    "latest_prediction",
+    "predictions",
+)
+
+
+def parse_include(include: Optional[str]) -> list[str]:
+    """Comma-separated section names; all sections when not given"""
+    if not include:
+        return list(DETAIL_SECTIONS)
+    sections = [s.strip() for s in include.split(",") if s.strip()]
+    unknown = [s for s in sections if s not in DETAIL_SECTIONS]
+    if unknown:
+        raise BadRequestException(
+            detail=f"Unknown sections: {', '.join(unknown)} (allowed: {', '.join(DETAIL_SECTIONS)})"
+        )
+    return sections
+
+
+class ServerDetailService:
+    """
+    Everything the server details page shows, in one call: ownership is
+    checked once and the requested sections are fetched concurrently.
+    """
+
+    def __init__(
+        self,
+        server_repo: ServerRepository,
+        metrics_repo: MetricsRepository,
+        anomaly_repo: AnomalyRepository,
+        prediction_repo: PredictionRepository
+    ):
+        self.server_repo = server_repo
+        self.metrics_repo = metrics_repo
+        self.anomaly_repo = anomaly_repo
+        self.prediction_repo = prediction_repo
+
+    async def get_server_detail(
+        self,
+        server_id: str,
+        user_id: str,
+        sections: list[str],
+        metrics_limit: int = 100,
+        anomalies_limit: int = 20,
+        predictions_limit: int = 10,
+        summary_hours: int = 24,
+        stats_days: int = 7,
+        horizon: Optional[int] = None
+    ) -> dict:
+        """
+        Returns the ServerDetailResponse shape as JSON-ready data; list
+        sections are raw DB rows, for direct serialization with orjson
+        """
+        # Check authorization (once for all sections)
+        server = await single_flight.do(
+            "servers.get_server_by_id", self.server_repo.get_server_by_id, server_id
+        )
+
+        if not server:
+            raise NotFoundException(detail="Server not found")
+
+        if str(server.user_id) != user_id:
+            raise ForbiddenException(detail="You don't have access to this server")
+
+        fetchers = {
+            "metrics": lambda: self._metrics(server_id, metrics_limit),
+            "latest_metrics": lambda: self._latest_metrics(server_id),
+            "metrics_summary": lambda: self._metrics_summary(server_id, summary_hours),
+            "anomalies": lambda: self._anomalies(server_id, anomalies_limit),
+            "anomaly_stats": lambda: self._anomaly_stats(server_id, stats_days),
+            "latest_prediction": lambda: self._latest_prediction(server_id, horizon),
+            "predictions": lambda: self._predictions(server_id, predictions_limit, horizon),
+        }
+        results = await gather_with_timeout(*(fetchers[name]() for name in sections))
+
+        detail = {"server": ServerResponse.model_validate(server).model_dump(mode="json")}
+        detail.update(zip(sections, results))
+        return detail
+
+    async def _metrics(self, server_id: str, limit: int) -> dict:
+        rows, total = await gather_with_timeout(
+            self.metrics_repo.get_metrics_rows(server_id=server_id, limit=limit),
+            self.metrics_repo.get_metrics_count(server_id=server_id)
+        )
+        return {"metrics": rows, "total": total, "server_id": server_id}
+
+    async def _latest_metrics(self, server_id: str) -> Optional[dict]:
+        metrics = await single_flight.do(
+            "metrics.get_latest_metrics", self.metrics_repo.get_latest_metrics, server_id
+        )
+        return MetricsResponse.model_validate(metrics).model_dump(mode="json") if metrics else None
+
+    async def _metrics_summary(self, server_id: str, hours: int) -> Optional[dict]:
+        summary = await single_flight.do(
+            "metrics.get_metrics_summary", self.metrics_repo.get_metrics_summary, server_id, hours
+        )
+        return MetricsSummary(**summary).model_dump(mode="json") if summary else None
+
+    async def _anomalies(self, server_id: str, limit: int) -> dict:
+        rows, total = await gather_with_timeout(
+            self.anomaly_repo.get_anomaly_rows(server_id=server_id, limit=limit),
+            self.anomaly_repo.get_anomaly_count(server_id=server_id)
+        )
+        return {"anomalies": rows, "total": total, "server_id": server_id}
+
+    async def _anomaly_stats(self, server_id: str, days: int) -> dict:
+        stats = await single_flight.do(
+            "anomalies.get_anomaly_stats", self.anomaly_repo.get_anomaly_stats, server_id, days
+        )
+        return AnomalyStats(**stats).model_dump(mode="json")
+
+    async def _latest_prediction(self, server_id: str, horizon: Optional[int]) -> Optional[dict]:
+        prediction = await self.prediction_repo.get_latest_prediction(server_id, horizon=horizon)
+        return PredictionResponse.model_validate(prediction).model_dump(mode="json") if prediction else None
+
+    async def _predictions(self, server_id: str, limit: int, horizon: Optional[int]) -> dict:
+        predictions, total = await gather_with_timeout(
+            self.prediction_repo.get_predictions_by_server(
+                server_id=server_id,
+                limit=limit,
+                horizon=horizon
+            ),
+            self.prediction_repo.get_prediction_count(server_id)
+        )
+        return {
+            "predictions": [PredictionResponse.model_validate(p).model_dump(mode="json") for p in predictions],
+            "total": total,
+            "server_id": server_id
+        }
@@ -1,11 +1,18 @@
 from app.repositories.server_repository import ServerRepository
+from app.repositories.purge_repository import PurgeRepository
 from app.schemas.server import ServerCreate, ServerUpdate, ServerResponse, ServerListResponse
+from app.schemas.purge import PurgeJobResponse
 from app.core.exceptions import NotFoundException, ForbiddenException
+from app.core.concurrency import gather_with_timeout
+from app.core.etag import version_store, server_scope, user_scope
+from app.core.cache import shared_cache, api_key_cache_key
+from app.services.purge_worker import purge_worker
 
 
 class ServerService:
-    def __init__(self, server_repo: ServerRepository):
+    def __init__(self, server_repo: ServerRepository, purge_repo: PurgeRepository):
         self.server_repo = server_repo
+        self.purge_repo = purge_repo
     
     async def create_server(self, user_id: str, server_data: ServerCreate) -> ServerResponse:
         """Create a new server for the user"""
@@ -14,6 +21,7 @@ class ServerService:
             name=server_data.name,
             ip=server_data.ip
         )
+        await version_store.bump(user_scope(user_id))
         
         return ServerResponse.model_validate(server)
     
@@ -24,12 +32,14 @@ class ServerService:
         offset: int = 0
     ) -> ServerListResponse:
         """Get all servers for a user"""
-        servers = await self.server_repo.get_servers_by_user(
-            user_id=user_id,
-            limit=limit,
-            offset=offset
+        servers, total = await gather_with_timeout(
+            self.server_repo.get_servers_by_user(
+                user_id=user_id,
+                limit=limit,
+                offset=offset
+            ),
+            self.server_repo.get_user_server_count(user_id)
         )
-        total = await self.server_repo.get_user_server_count(user_id)
         
         return ServerListResponse(
             servers=[ServerResponse.model_validate(server) for server in servers],
@@ -72,11 +82,17 @@ class ServerService:
             ip=update_data.ip,
             status=update_data.status
         )
+        await version_store.bump(user_scope(user_id), server_scope(server_id))
+        if server.api_key:
+            await shared_cache.invalidate(api_key_cache_key(server.api_key))
         
         return ServerResponse.model_validate(updated_server)
     
-    async def delete_server(self, server_id: str, user_id: str) -> bool:
-        """Delete a server"""
+    async def delete_server(self, server_id: str, user_id: str) -> PurgeJobResponse:
+        """
+        Delete a server: it disappears immediately, its data is purged in
+        the background (see get_server_purge for progress)
+        """
         # Check if server exists and user owns it
         server = await self.server_repo.get_server_by_id(server_id)
         
@@ -86,5 +102,21 @@ class ServerService:
         if str(server.user_id) != user_id:
             raise ForbiddenException(detail="You don't have access to this server")
         
-        # Delete server
-        return await self.server_repo.delete_server(server_id)
\ No newline at end of file
+        # Soft-delete server and schedule the purge
+        job = await self.purge_repo.schedule("server", server_id)
+        if job is None:
+            raise NotFoundException(detail="Server not found")
+        purge_worker.wake()
+        await version_store.bump(user_scope(user_id), server_scope(server_id))
+        if server.api_key:
+            await shared_cache.invalidate(api_key_cache_key(server.api_key))
+        return PurgeJobResponse.model_validate(job)
+    
+    async def get_server_purge(self, server_id: str, user_id: str) -> PurgeJobResponse:
+        """Progress of the purge of a deleted server"""
+        job = await self.purge_repo.get_job("server", server_id)
+        
+        if not job or str(job.owner_id) != user_id:
+            raise NotFoundException(detail="No deletion found for this server")
+        
+        return PurgeJobResponse.model_validate(job)
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+from app.config import get_settings
+from app.core.etag import version_store, server_scope, user_scope
+from app.database.supabase import SupabaseClient
+from app.repositories.notification_repository import NotificationRepository
+from app.repositories.factory import server_repository
+from app.schemas.notification import NotificationCreate
+from app.services.notification_queue import notification_queue
+
+logger = logging.getLogger(__name__)
+
+# title, severity of the notification sent when a server enters each status
+TRANSITION_NOTIFICATIONS = {
+    "warning": ("Server Not Responding", "medium"),
+    "offline": ("Server Offline", "high"),
+    "online": ("Server Back Online", "low"),
+}
+
+
+def _format_age(seconds: float) -> str:
+    if seconds < 120:
+        return f"{int(seconds)} seconds"
+    if seconds < 7200:
+        return f"{int(seconds // 60)} minutes"
+    return f"{int(seconds // 3600)} hours"
+
+
+class ServerSweeper:
+    """
+    Derives Server.status from heartbeats.
+
+    Every interval one pass runs a single SQL update (sweep_server_status)
+    that classifies all servers by heartbeat age and sets the status of
+    those that changed. The update is conditional on the old status, so
+    with several workers only one of them reports a transition. The owner
+    is notified only when the status actually changes.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        interval: float,
+        warning_after: float,
+        offline_after: float
+    ):
+        self.enabled = enabled
+        self.interval = interval
+        self.warning_after = warning_after
+        self.offline_after = offline_after
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "sweeps": 0,
+            "transitions": 0,
+            "notifications": 0,
+            "failed": 0,
+            "last_sweep_ms": 0.0,
+        }
+
+    def _get_client(self):
+        return SupabaseClient.get_client()
+
+    async def sweep(self) -> int:
+        """Run one pass; returns the number of servers whose status changed"""
+        started = time.perf_counter()
+        client = self._get_client()
+        server_repo = server_repository(client)
+
+        changed = await server_repo.sweep_status(self.warning_after, self.offline_after)
+
+        notifications = []
+        scopes = []
+        for server in changed:
+            scopes += [server_scope(str(server["id"])), user_scope(str(server["user_id"]))]
+            notifications.append(self._notification(server, server["status"]))
+
+        if scopes:
+            await version_store.bump(*set(scopes))
+        await self._notify(client, notifications)
+
+        self._stats["sweeps"] += 1
+        self._stats["transitions"] += len(notifications)
+        self._stats["last_sweep_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return len(notifications)
+
+    def _notification(self, server: dict, status: str) -> NotificationCreate:
+        title, severity = TRANSITION_NOTIFICATIONS[status]
+        if status == "online":
+            message = f"Server '{server['name']}' is reporting metrics again"
+        elif server["age_seconds"] is None:
+            message = f"Server '{server['name']}' has never reported metrics"
+        else:
+            message = f"Server '{server['name']}' has not reported metrics for {_format_age(server['age_seconds'])}"
+        return NotificationCreate(
+            user_id=str(server["user_id"]),
+            title=title,
+            message=message[:1000],
+            type="server",
+            severity=severity,
+            related_id=str(server["id"]),
+            related_type="server"
+        )
+
+    async def _notify(self, client, notifications: list[NotificationCreate]) -> None:
+        rejected = [n for n in notifications if not await notification_queue.enqueue(n)]
+        if rejected:
+            # Queue full or not running - write the rest inline
+            await NotificationRepository(client).create_notifications(rejected)
+        self._stats["notifications"] += len(notifications)
+
+    def start(self) -> None:
+        """Start the periodic sweep loop (called from the app lifespan)"""
+        if self._task or not self.enabled:
+            return
+        self._task = asyncio.create_task(self._sweep_loop(), name="server-sweeper")
+
+    async def drain(self) -> None:
+        """Stop the sweep loop"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.error("Server status sweep failed: %s", e)
+
+    def stats(self) -> dict:
+        return dict(self._stats)
+
+
+def _create_server_sweeper() -> ServerSweeper:
+    settings = get_settings()
+    return ServerSweeper(
+        enabled=settings.SERVER_SWEEP_ENABLED,
+        interval=settings.SERVER_SWEEP_INTERVAL_SECONDS,
+        warning_after=settings.SERVER_WARNING_AFTER_SECONDS,
+        offline_after=settings.SERVER_OFFLINE_AFTER_SECONDS
+    )
+
+
+# Global instance
+server_sweeper = _create_server_sweeper()
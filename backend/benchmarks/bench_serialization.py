@@ -0,0 +1,85 @@
+"""
+Microbenchmark: per-row cost of serializing a metrics list page.
+
+Compares the three paths a 1000-row page of `metrics` can take:
+- models:  Metrics(**row) -> MetricsResponse.model_validate -> FastAPI's
+           jsonable_encoder + json.dumps (the default response path)
+- adapter: one TypeAdapter(list[MetricsResponse]) pass, dumped to JSON bytes
+- orjson:  the raw PostgREST rows dumped with orjson (fast path)
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization [rows] [repeat]
+"""
+import json
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models.metrics import Metrics
+from app.schemas.metrics import MetricsListResponse, MetricsResponse
+
+
+def make_rows(count: int) -> list[dict]:
+    """Rows shaped like PostgREST output (timestamps as ISO strings)"""
+    server_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "server_id": server_id,
+            "timestamp": (now - timedelta(seconds=30 * i)).isoformat() + "+00:00",
+            "cpu_percent": 12.5 + i % 80,
+            "ram_percent": 40.25 + i % 50,
+            "disk_read": 1024 * i,
+            "disk_write": 2048 * i,
+            "net_sent": 4096 * i,
+            "net_recv": 8192 * i,
+            "created_at": now.isoformat() + "+00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def via_models(rows: list[dict]) -> bytes:
+    metrics = [Metrics(**row) for row in rows]
+    response = MetricsListResponse(
+        metrics=[MetricsResponse.model_validate(m) for m in metrics],
+        total=len(rows),
+        server_id=rows[0]["server_id"]
+    )
+    return json.dumps(jsonable_encoder(response)).encode()
+
+
+LIST_ADAPTER = TypeAdapter(list[MetricsResponse])
+
+
+def via_adapter(rows: list[dict]) -> bytes:
+    metrics = LIST_ADAPTER.validate_python(rows)
+    return LIST_ADAPTER.dump_json(metrics)
+
+
+def via_orjson(rows: list[dict]) -> bytes:
+    return orjson.dumps({"metrics": rows, "total": len(rows), "server_id": rows[0]["server_id"]})
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rows = make_rows(count)
+
+    print(f"{count} rows, best of {repeat} runs")
+    baseline = None
+    for name, fn in (("models", via_models), ("adapter", via_adapter), ("orjson", via_orjson)):
+        best = min(timeit.repeat(lambda: fn(rows), number=1, repeat=repeat))
+        per_row_us = best / count * 1e6
+        baseline = baseline or per_row_us
+        print(f"{name:>8}: {best * 1e3:8.2f} ms/page  {per_row_us:7.2f} us/row  x{baseline / per_row_us:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Query plan report for the repository access paths.
+
+Runs EXPLAIN for the SQL that each repository method sends through
+PostgREST, against a local Postgres, and reports which index (if any)
+serves it. Requires asyncpg.
+
+Run from the backend directory:
+    python -m benchmarks.explain_queries postgresql://localhost/smartops [options]
+
+Options:
+    --migrate          apply supabase/migrations/*.sql first (tracked in schema_migrations)
+    --seed SERVERS     insert synthetic data for SERVERS servers, then ANALYZE
+    --rows N           metrics rows per seeded server (default 2000)
+    --analyze          EXPLAIN ANALYZE (each statement runs in a rolled-back transaction)
+    --verbose          print the full plan of every query
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from string import Template
+
+try:
+    import asyncpg
+except ImportError:
+    raise SystemExit("explain_queries requires asyncpg (pip install asyncpg)")
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "supabase" / "migrations"
+
+METRICS_COLUMNS = "id,server_id,timestamp,cpu_percent,ram_percent,disk_read,disk_write,net_sent,net_recv,created_at"
+
+# (repository method, SQL, parameter names). Parameters come from sample rows.
+QUERIES = [
+    ("metrics.get_metrics_rows",
+     f'select {METRICS_COLUMNS} from metrics where server_id = $1 and "timestamp" >= $2 '
+     'order by "timestamp" desc limit 100 offset 0',
+     ["server_id", "from_time"]),
+    ("metrics.get_latest_metrics",
+     'select * from metrics where server_id = $1 order by "timestamp" desc limit 1',
+     ["server_id"]),
+    ("metrics.get_metrics_count",
+     'select count(*) from metrics where server_id = $1 and "timestamp" >= $2',
+     ["server_id", "from_time"]),
+    ("metrics.get_metrics_summary",
+     'select * from metrics where server_id = $1 and "timestamp" >= $2 '
+     'order by "timestamp" desc limit 10000',
+     ["server_id", "from_time"]),
+    ("metrics.iter_metrics_pages",
+     f'select {METRICS_COLUMNS} from metrics where server_id = $1 '
+     'and ("timestamp" > $2 or ("timestamp" = $2 and id > $3)) order by "timestamp", id limit 1000',
+     ["server_id", "from_time", "zero_id"]),
+    ("anomalies.get_anomaly_rows",
+     'select * from anomalies where server_id = $1 order by "timestamp" desc limit 100 offset 0',
+     ["server_id"]),
+    ("anomalies.get_anomaly_rows (severity)",
+     'select * from anomalies where server_id = $1 and severity = $2 '
+     'order by "timestamp" desc limit 100 offset 0',
+     ["server_id", "severity"]),
+    ("anomalies.get_anomaly_count (severity)",
+     'select count(*) from anomalies where server_id = $1 and severity = $2',
+     ["server_id", "severity"]),
+    ("anomalies.get_anomaly_stats",
+     'select severity, count, last_at from anomaly_daily_counts where server_id = $1 and day >= $2',
+     ["server_id", "from_day"]),
+    ("anomalies.anomaly_histogram (rpc body)",
+     'select date_trunc(\'hour\', "timestamp", \'UTC\'), severity, count(*) from anomalies '
+     'where server_id = $1 and "timestamp" >= $2 group by 1, 2 order by 1',
+     ["server_id", "from_time"]),
+    ("notifications.get_user_notifications",
+     'select * from notifications where user_id = $1 order by created_at desc limit 50 offset 0',
+     ["user_id"]),
+    ("notifications.get_user_notifications (unread)",
+     'select * from notifications where user_id = $1 and is_read = false '
+     'order by created_at desc limit 50 offset 0',
+     ["user_id"]),
+    ("notifications.get_notification_count (unread)",
+     'select count(*) from notifications where user_id = $1 and is_read = false',
+     ["user_id"]),
+    ("notifications.mark_all_as_read",
+     'update notifications set is_read = true where user_id = $1 and is_read = false',
+     ["user_id"]),
+    ("notifications.expire_read_notifications (rpc body)",
+     'select id from notifications where is_read and created_at < $1 '
+     'order by created_at limit 1000 for update skip locked',
+     ["expire_before"]),
+    ("servers.get_server_by_api_key",
+     'select * from servers where api_key = $1 and deleted_at is null',
+     ["api_key"]),
+    ("servers.get_servers_by_user",
+     'select * from servers where user_id = $1 and deleted_at is null limit 100 offset 0',
+     ["user_id"]),
+    ("servers.sweep_status (rpc body)",
+     "update servers s set status = c.new_status from ("
+     "select id, status, case when now() - last_seen >= interval '300 seconds' then 'offline' "
+     "when now() - last_seen >= interval '90 seconds' then 'warning' else 'online' end as new_status "
+     "from servers where deleted_at is null) c "
+     "where s.id = c.id and c.new_status <> c.status and s.status = c.status returning s.id",
+     []),
+    ("predictions.get_latest_prediction",
+     'select * from predictions where server_id = $1 order by created_at desc limit 1',
+     ["server_id"]),
+    ("predictions.get_predictions_by_server",
+     'select * from predictions where server_id = $1 order by created_at desc limit 10 offset 0',
+     ["server_id"]),
+    ("users.get_user_by_email",
+     'select * from users where email = $1 and deleted_at is null',
+     ["email"]),
+    ("purge.purge_server_chunk (rpc body)",
+     'select id, "timestamp" from metrics where server_id = $1 limit 5000 for update skip locked',
+     ["server_id"]),
+    ("purge.get_open_jobs",
+     "select * from purge_jobs where status <> 'done' order by created_at limit 100",
+     []),
+]
+
+SEED_SQL = Template("""
+insert into users (email, password_hash, first_name, last_name, birth_date)
+select 'user' || u || '@example.com', 'x', 'User', 'Number' || u, date '1990-01-01'
+from generate_series(1, greatest($servers / 10, 1)) as u;
+
+insert into servers (user_id, name, ip, api_key, last_seen)
+select u.id, 'server-' || s, '10.0.' || (s / 250) || '.' || (s % 250), 'sk_seed_' || s, now()
+from generate_series(1, $servers) as s
+join lateral (select id from users order by email offset (s % greatest($servers / 10, 1)) limit 1) u on true;
+
+insert into metrics (server_id, "timestamp", cpu_percent, ram_percent, disk_read, disk_write, net_sent, net_recv)
+select s.id, now() - make_interval(secs => 30 * i), random() * 100, random() * 100,
+       (random() * 1e6)::bigint, (random() * 1e6)::bigint, (random() * 1e6)::bigint, (random() * 1e6)::bigint
+from servers s, generate_series(1, $rows) as i;
+
+insert into anomalies (server_id, "timestamp", type, severity, explanation)
+select s.id, now() - make_interval(secs => 600 * i), 'cpu_spike',
+       (array['low', 'medium', 'high', 'critical'])[1 + i % 4], 'seeded'
+from servers s, generate_series(1, greatest($rows / 20, 1)) as i;
+
+insert into predictions (server_id, forecast, created_at)
+select s.id, '{}'::jsonb, now() - make_interval(hours => i)
+from servers s, generate_series(1, 24) as i;
+
+insert into notifications (user_id, title, message, type, is_read, created_at)
+select u.id, 'Seeded', 'Seeded notification', 'system', i % 10 <> 0, now() - make_interval(mins => i)
+from users u, generate_series(1, 500) as i;
+""")
+
+
+async def migrate(conn) -> None:
+    await conn.execute(
+        "create table if not exists schema_migrations ("
+        "version text primary key, applied_at timestamptz not null default now())"
+    )
+    applied = {r["version"] for r in await conn.fetch("select version from schema_migrations")}
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        version = path.stem
+        if version in applied:
+            continue
+        print(f"applying {path.name}")
+        async with conn.transaction():
+            await conn.execute(path.read_text())
+            await conn.execute("insert into schema_migrations (version) values ($1)", version)
+
+
+async def seed(conn, servers: int, rows: int) -> None:
+    print(f"seeding {servers} servers x {rows} metrics rows")
+    async with conn.transaction():
+        await conn.execute(SEED_SQL.substitute(servers=int(servers), rows=int(rows)))
+    await conn.execute("analyze")
+
+
+async def sample_params(conn) -> dict:
+    server = await conn.fetchrow(
+        "select s.id, s.user_id, s.api_key, u.email from servers s join users u on u.id = s.user_id limit 1"
+    )
+    if server is None:
+        raise SystemExit("No servers in the database; run with --seed")
+    now = datetime.now(timezone.utc)
+    return {
+        "server_id": server["id"],
+        "user_id": server["user_id"],
+        "api_key": server["api_key"],
+        "email": server["email"],
+        "from_time": now - timedelta(hours=24),
+        "from_day": (now - timedelta(days=7)).date(),
+        "expire_before": now - timedelta(days=30),
+        "severity": "critical",
+        "zero_id": "00000000-0000-0000-0000-000000000000",
+    }
+
+
+def _walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def summarize(plan: dict) -> str:
+    nodes = list(_walk(plan["Plan"]))
+    indexes = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+    seq_scans = sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"})
+    parts = []
+    if len(indexes) > 3:
+        # One index scan per partition
+        parts.append(f"index: {indexes[0]} (+{len(indexes) - 1} more)")
+    elif indexes:
+        parts.append("index: " + ", ".join(indexes))
+    if seq_scans:
+        parts.append("SEQ SCAN: " + ", ".join(seq_scans))
+    if "Execution Time" in plan:
+        parts.append(f"{plan['Execution Time']:.2f} ms")
+    else:
+        parts.append(f"cost {plan['Plan']['Total Cost']:.1f}")
+    return "; ".join(parts)
+
+
+async def explain(conn, analyze: bool, verbose: bool) -> None:
+    params = await sample_params(conn)
+    options = "analyze, buffers, format json" if analyze else "format json"
+    width = max(len(name) for name, _, _ in QUERIES)
+
+    for name, sql, names in QUERIES:
+        args = [params[n] for n in names]
+        tx = conn.transaction()
+        await tx.start()
+        try:
+            result = await conn.fetchval(f"explain ({options}) {sql}", *args)
+        finally:
+            await tx.rollback()
+        plan = (json.loads(result) if isinstance(result, str) else result)[0]
+        print(f"{name:<{width}}  {summarize(plan)}")
+        if verbose:
+            text = await conn.fetch(f"explain {sql}", *args)
+            for row in text:
+                print("    " + row[0])
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("dsn")
+    parser.add_argument("--migrate", action="store_true")
+    parser.add_argument("--seed", type=int, metavar="SERVERS")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--analyze", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        if args.migrate:
+            await migrate(conn)
+        if args.seed:
+            await seed(conn, args.seed, args.rows)
+        await explain(conn, args.analyze, args.verbose)
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
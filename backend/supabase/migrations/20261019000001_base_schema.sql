@@ -0,0 +1,67 @@
+-- Base schema: the tables read and written by app/repositories.
+-- Column names and types follow app/models.
+
+create table if not exists users (
+    id            uuid primary key default gen_random_uuid(),
+    email         text not null unique,
+    password_hash text not null,
+    first_name    text not null,
+    last_name     text not null,
+    birth_date    date not null,
+    created_at    timestamptz not null default now()
+);
+
+create table if not exists servers (
+    id         uuid primary key default gen_random_uuid(),
+    user_id    uuid not null references users (id) on delete cascade,
+    name       text not null,
+    ip         text not null,
+    status     text not null default 'online' check (status in ('online', 'offline', 'warning')),
+    api_key    text unique,
+    created_at timestamptz not null default now(),
+    last_seen  timestamptz not null default now()
+);
+
+create table if not exists metrics (
+    id          uuid primary key default gen_random_uuid(),
+    server_id   uuid not null references servers (id) on delete cascade,
+    "timestamp" timestamptz not null default now(),
+    cpu_percent double precision not null,
+    ram_percent double precision not null,
+    disk_read   bigint not null default 0,
+    disk_write  bigint not null default 0,
+    net_sent    bigint not null default 0,
+    net_recv    bigint not null default 0,
+    created_at  timestamptz not null default now()
+);
+
+create table if not exists anomalies (
+    id          uuid primary key default gen_random_uuid(),
+    server_id   uuid not null references servers (id) on delete cascade,
+    "timestamp" timestamptz not null,
+    type        text not null,
+    severity    text not null check (severity in ('low', 'medium', 'high', 'critical')),
+    explanation text not null,
+    metrics     jsonb not null default '{}'::jsonb,
+    created_at  timestamptz not null default now()
+);
+
+create table if not exists predictions (
+    id         uuid primary key default gen_random_uuid(),
+    server_id  uuid not null references servers (id) on delete cascade,
+    forecast   jsonb not null,
+    created_at timestamptz not null default now()
+);
+
+create table if not exists notifications (
+    id           uuid primary key default gen_random_uuid(),
+    user_id      uuid not null references users (id) on delete cascade,
+    title        text not null,
+    message      text not null,
+    type         text not null check (type in ('anomaly', 'prediction', 'server', 'system')),
+    severity     text check (severity in ('low', 'medium', 'high', 'critical')),
+    related_id   uuid,
+    related_type text check (related_type in ('anomaly', 'prediction', 'server')),
+    is_read      boolean not null default false,
+    created_at   timestamptz not null default now()
+);
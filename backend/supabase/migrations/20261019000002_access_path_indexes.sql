@@ -0,0 +1,37 @@
+-- Indexes matching the filter + sort of each repository query.
+-- On a large live table, create them by hand with CREATE INDEX CONCURRENTLY
+-- first; these statements are then no-ops.
+
+-- metrics: get_metrics_rows / get_latest_metrics / get_metrics_count /
+-- get_metrics_summary / iter_metrics_pages filter on server_id and a
+-- timestamp range, newest first (or oldest first, scanned backwards)
+create index if not exists metrics_server_timestamp_idx
+    on metrics (server_id, "timestamp" desc);
+
+-- anomalies: get_anomaly_rows / get_anomaly_count without a severity
+-- filter, and the anomaly_histogram RPC
+create index if not exists anomalies_server_timestamp_idx
+    on anomalies (server_id, "timestamp" desc);
+
+-- anomalies: the same queries filtered by severity
+create index if not exists anomalies_server_severity_timestamp_idx
+    on anomalies (server_id, severity, "timestamp" desc);
+
+-- notifications: get_user_notifications / get_notification_count, all types
+create index if not exists notifications_user_created_idx
+    on notifications (user_id, created_at desc);
+
+-- notifications: unread list, unread count and mark_all_as_read touch only
+-- unread rows, which stay a small fraction of the table
+create index if not exists notifications_user_unread_idx
+    on notifications (user_id, created_at desc)
+    where not is_read;
+
+-- servers: get_servers_by_user / get_user_server_count
+-- (api_key lookups use the unique constraint's index)
+create index if not exists servers_user_idx
+    on servers (user_id);
+
+-- predictions: get_latest_prediction / get_predictions_by_server / count
+create index if not exists predictions_server_created_idx
+    on predictions (server_id, created_at desc);
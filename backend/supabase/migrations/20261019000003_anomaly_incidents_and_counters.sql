@@ -0,0 +1,152 @@
+-- Incident grouping columns and the per-day severity counters used by
+-- AnomalyRepository (get_anomaly_stats, get_anomaly_histogram). Triggers
+-- keep the counters in step with the anomalies table, in the same
+-- transaction as every insert, severity change and delete.
+
+alter table anomalies
+    add column if not exists occurrence_count integer not null default 1,
+    add column if not exists last_seen timestamptz;
+
+create table if not exists anomaly_daily_counts (
+    server_id uuid not null references servers (id) on delete cascade,
+    day       date not null,
+    severity  text not null,
+    count     integer not null default 0,
+    last_at   timestamptz,
+    primary key (server_id, day, severity)
+);
+
+-- Backfill the counters from the anomalies recorded before this migration;
+-- stats and histograms read only the counters from now on
+insert into anomaly_daily_counts (server_id, day, severity, count, last_at)
+select server_id, ("timestamp" at time zone 'UTC')::date, severity, count(*), max("timestamp")
+from anomalies
+group by 1, 2, 3
+on conflict do nothing;
+
+-- Adds a batch of {server_id, day, severity, count, last_at} rows to the
+-- counters in one statement (count may be negative)
+create or replace function increment_anomaly_counts(p_rows jsonb)
+returns void
+language sql
+as $$
+    insert into anomaly_daily_counts as c (server_id, day, severity, count, last_at)
+    select
+        (r ->> 'server_id')::uuid,
+        (r ->> 'day')::date,
+        r ->> 'severity',
+        (r ->> 'count')::integer,
+        (r ->> 'last_at')::timestamptz
+    from jsonb_array_elements(p_rows) as r
+    on conflict (server_id, day, severity) do update
+    set count = c.count + excluded.count,
+        last_at = greatest(c.last_at, excluded.last_at);
+$$;
+
+-- Statement-level triggers: one counter upsert per insert/update/delete
+-- statement, however many rows it touched. An escalated incident (its
+-- severity raised by the incident grouper) moves from the old severity's
+-- counter to the new one.
+create or replace function sync_anomaly_daily_counts()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op = 'INSERT' then
+        perform increment_anomaly_counts(coalesce((
+            select jsonb_agg(r) from (
+                select server_id, ("timestamp" at time zone 'UTC')::date as day, severity,
+                       count(*) as count, max("timestamp") as last_at
+                from new_rows
+                group by 1, 2, 3
+            ) r
+        ), '[]'::jsonb));
+    elsif tg_op = 'DELETE' then
+        perform increment_anomaly_counts(coalesce((
+            select jsonb_agg(r) from (
+                select server_id, ("timestamp" at time zone 'UTC')::date as day, severity,
+                       -count(*) as count, null::timestamptz as last_at
+                from old_rows o
+                -- Rows cascaded from a deleted server take its counters with them
+                where exists (select 1 from servers s where s.id = o.server_id)
+                group by 1, 2, 3
+            ) r
+        ), '[]'::jsonb));
+    else
+        perform increment_anomaly_counts(coalesce((
+            select jsonb_agg(r) from (
+                select d.server_id, (d."timestamp" at time zone 'UTC')::date as day, d.severity,
+                       sum(d.delta) as count, max(d."timestamp") as last_at
+                from (
+                    select o.server_id, o."timestamp", o.severity, -1 as delta
+                    from old_rows o join new_rows n on n.id = o.id
+                    where n.severity is distinct from o.severity
+                    union all
+                    select n.server_id, n."timestamp", n.severity, 1
+                    from old_rows o join new_rows n on n.id = o.id
+                    where n.severity is distinct from o.severity
+                ) d
+                group by 1, 2, 3
+            ) r
+        ), '[]'::jsonb));
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists anomalies_counts_insert on anomalies;
+create trigger anomalies_counts_insert
+    after insert on anomalies
+    referencing new table as new_rows
+    for each statement execute function sync_anomaly_daily_counts();
+
+drop trigger if exists anomalies_counts_update on anomalies;
+create trigger anomalies_counts_update
+    after update on anomalies
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function sync_anomaly_daily_counts();
+
+drop trigger if exists anomalies_counts_delete on anomalies;
+create trigger anomalies_counts_delete
+    after delete on anomalies
+    referencing old table as old_rows
+    for each statement execute function sync_anomaly_daily_counts();
+
+-- Anomaly counts per time bucket and severity (hourly histogram)
+create or replace function anomaly_histogram(p_server_id uuid, p_bucket text, p_from timestamptz)
+returns table (bucket_start timestamptz, severity text, count bigint)
+language sql
+stable
+as $$
+    select date_trunc(p_bucket, a."timestamp", 'UTC') as bucket_start, a.severity, count(*)
+    from anomalies a
+    where a.server_id = p_server_id
+      and a."timestamp" >= p_from
+    group by 1, 2
+    order by 1;
+$$;
+
+-- Only the backend (service role) may update counters or read histograms
+revoke all on function increment_anomaly_counts(jsonb) from public;
+revoke all on function sync_anomaly_daily_counts() from public;
+revoke all on function anomaly_histogram(uuid, text, timestamptz) from public;
+
+do $$
+declare
+    v_role text;
+begin
+    foreach v_role in array array['anon', 'authenticated'] loop
+        if exists (select 1 from pg_roles where rolname = v_role) then
+            execute format('revoke all on function increment_anomaly_counts(jsonb) from %I', v_role);
+            execute format('revoke all on function sync_anomaly_daily_counts() from %I', v_role);
+            execute format('revoke all on function anomaly_histogram(uuid, text, timestamptz) from %I', v_role);
+        end if;
+    end loop;
+    if exists (select 1 from pg_roles where rolname = 'service_role') then
+        grant execute on function increment_anomaly_counts(jsonb) to service_role;
+        grant execute on function anomaly_histogram(uuid, text, timestamptz) to service_role;
+    end if;
+end;
+$$;
@@ -0,0 +1,195 @@
+-- Turn metrics into a table range-partitioned by day on "timestamp".
+-- Range filters (get_metrics_rows, get_metrics_summary, exports) are pruned
+-- to the matching partitions, and retention drops whole partitions.
+-- Partitions are created ahead of time and dropped after retention by the
+-- backend's partition maintenance job (METRICS_PARTITION_MAINTENANCE_ENABLED),
+-- which calls the functions below.
+--
+-- Existing rows are not copied here: the old table is kept as metrics_legacy
+-- and backfill_legacy_metrics() moves it over one day (one partition) per
+-- call, each in its own short transaction. The maintenance job runs it until
+-- metrics_legacy is gone; until then the oldest history is missing from reads.
+
+-- Creates the daily partitions from p_from_day through today + p_days_ahead.
+-- Rows that already landed in metrics_default for a new day are moved into
+-- its partition. Returns the names of the partitions created.
+create or replace function create_metrics_partitions(p_days_ahead integer, p_from_day date default null)
+returns setof text
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_day date := coalesce(p_from_day, (now() at time zone 'UTC')::date);
+    v_last date := (now() at time zone 'UTC')::date + p_days_ahead;
+    v_name text;
+    v_from timestamptz;
+    v_to timestamptz;
+begin
+    -- Several workers run the job; one at a time
+    perform pg_advisory_xact_lock(hashtext('metrics_partitions'));
+
+    while v_day <= v_last loop
+        v_name := 'metrics_p' || to_char(v_day, 'YYYYMMDD');
+        v_from := v_day::timestamp at time zone 'UTC';
+        v_to := (v_day + 1)::timestamp at time zone 'UTC';
+
+        if to_regclass(v_name) is null then
+            if exists (select 1 from metrics_default where "timestamp" >= v_from and "timestamp" < v_to) then
+                execute format('create table %I (like metrics including defaults)', v_name);
+                execute format(
+                    'with moved as (delete from metrics_default where "timestamp" >= %L and "timestamp" < %L returning *) '
+                    'insert into %I select * from moved', v_from, v_to, v_name
+                );
+                execute format('alter table metrics attach partition %I for values from (%L) to (%L)', v_name, v_from, v_to);
+            else
+                execute format('create table %I partition of metrics for values from (%L) to (%L)', v_name, v_from, v_to);
+            end if;
+            return next v_name;
+        end if;
+
+        v_day := v_day + 1;
+    end loop;
+end;
+$$;
+
+-- Drops the daily partitions that end before today - p_retain_days.
+-- Returns the names of the partitions dropped.
+create or replace function drop_metrics_partitions(p_retain_days integer)
+returns setof text
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_cutoff text := 'metrics_p' || to_char((now() at time zone 'UTC')::date - p_retain_days, 'YYYYMMDD');
+    v_name text;
+begin
+    if p_retain_days < 1 then
+        raise exception 'p_retain_days must be at least 1';
+    end if;
+
+    perform pg_advisory_xact_lock(hashtext('metrics_partitions'));
+
+    for v_name in
+        select c.relname
+        from pg_inherits i
+        join pg_class c on c.oid = i.inhrelid
+        where i.inhparent = 'metrics'::regclass
+          and c.relname ~ '^metrics_p[0-9]{8}$'
+          and c.relname < v_cutoff
+        order by c.relname
+    loop
+        execute format('drop table %I', v_name);
+        return next v_name;
+    end loop;
+end;
+$$;
+
+-- Moves the newest day left in metrics_legacy into metrics (its partition
+-- already exists, see below). Returns that day and the rows moved, or no
+-- row once metrics_legacy is empty, in which case it is dropped.
+create or replace function backfill_legacy_metrics()
+returns table (day date, moved bigint)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_last timestamptz;
+    v_from timestamptz;
+    v_to timestamptz;
+begin
+    if to_regclass('metrics_legacy') is null then
+        return;
+    end if;
+
+    perform pg_advisory_xact_lock(hashtext('metrics_partitions'));
+
+    -- metrics_legacy_timestamp_idx
+    select max(l."timestamp") into v_last from metrics_legacy l;
+    if v_last is null then
+        drop table metrics_legacy;
+        return;
+    end if;
+
+    day := (v_last at time zone 'UTC')::date;
+    v_from := day::timestamp at time zone 'UTC';
+    v_to := (day + 1)::timestamp at time zone 'UTC';
+
+    with moved_rows as (
+        delete from metrics_legacy l
+        where l."timestamp" >= v_from and l."timestamp" < v_to
+        returning l.*
+    )
+    insert into metrics select * from moved_rows;
+    get diagnostics moved = row_count;
+
+    return next;
+end;
+$$;
+
+-- Swap in the partitioned table; existing rows stay in metrics_legacy
+alter table metrics rename to metrics_legacy;
+alter index if exists metrics_server_timestamp_idx rename to metrics_legacy_server_timestamp_idx;
+-- Serves the backfill's day ranges and the first day below
+create index metrics_legacy_timestamp_idx on metrics_legacy ("timestamp");
+
+create table metrics (
+    id          uuid not null default gen_random_uuid(),
+    server_id   uuid not null references servers (id) on delete cascade,
+    "timestamp" timestamptz not null default now(),
+    cpu_percent double precision not null,
+    ram_percent double precision not null,
+    disk_read   bigint not null default 0,
+    disk_write  bigint not null default 0,
+    net_sent    bigint not null default 0,
+    net_recv    bigint not null default 0,
+    created_at  timestamptz not null default now(),
+    primary key (id, "timestamp")
+) partition by range ("timestamp");
+
+-- Catches rows outside every daily partition (e.g. if the job stopped)
+create table metrics_default partition of metrics default;
+
+select create_metrics_partitions(
+    7,
+    coalesce((select min(("timestamp" at time zone 'UTC')::date) from metrics_legacy), (now() at time zone 'UTC')::date)
+);
+
+-- Nothing to copy on a fresh database
+do $$
+begin
+    if not exists (select 1 from metrics_legacy) then
+        drop table metrics_legacy;
+    end if;
+end;
+$$;
+
+-- Created on the parent, so every partition gets it
+create index if not exists metrics_server_timestamp_idx
+    on metrics (server_id, "timestamp" desc);
+
+-- Only the backend (service role) may create, drop or backfill partitions
+revoke all on function create_metrics_partitions(integer, date) from public;
+revoke all on function drop_metrics_partitions(integer) from public;
+revoke all on function backfill_legacy_metrics() from public;
+
+do $$
+declare
+    v_role text;
+begin
+    foreach v_role in array array['anon', 'authenticated'] loop
+        if exists (select 1 from pg_roles where rolname = v_role) then
+            execute format('revoke all on function create_metrics_partitions(integer, date) from %I', v_role);
+            execute format('revoke all on function drop_metrics_partitions(integer) from %I', v_role);
+            execute format('revoke all on function backfill_legacy_metrics() from %I', v_role);
+        end if;
+    end loop;
+    if exists (select 1 from pg_roles where rolname = 'service_role') then
+        grant execute on function create_metrics_partitions(integer, date) to service_role;
+        grant execute on function drop_metrics_partitions(integer) to service_role;
+        grant execute on function backfill_legacy_metrics() to service_role;
+    end if;
+end;
+$$;
@@ -0,0 +1,138 @@
+-- Notification retention: read notifications expire after an age, and each
+-- user keeps at most a fixed number of notifications. Removed rows are
+-- deleted or moved to notifications_archive. The backend's retention job
+-- (NOTIFICATION_RETENTION_ENABLED) calls the two functions below in chunks
+-- until they report less than a full chunk.
+
+create table if not exists notifications_archive (
+    like notifications,
+    archived_at timestamptz not null default now()
+);
+
+create index if not exists notifications_archive_user_created_idx
+    on notifications_archive (user_id, created_at desc);
+
+-- expire_read_notifications: oldest read notifications first
+create index if not exists notifications_read_created_idx
+    on notifications (created_at)
+    where is_read;
+
+-- Deletes (or archives) up to p_limit read notifications created before
+-- p_before. Returns one row with the number of rows removed.
+create or replace function expire_read_notifications(p_before timestamptz, p_archive boolean, p_limit integer)
+returns table (removed integer)
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    with doomed as (
+        delete from notifications
+        where id in (
+            select id from notifications
+            where is_read and created_at < p_before
+            order by created_at
+            limit p_limit
+            for update skip locked
+        )
+        returning *
+    ), archived as (
+        insert into notifications_archive
+            (id, user_id, title, message, type, severity, related_id, related_type, is_read, created_at)
+        select id, user_id, title, message, type, severity, related_id, related_type, is_read, created_at
+        from doomed
+        where p_archive
+    )
+    select count(*) into removed from doomed;
+    return next;
+end;
+$$;
+
+-- Users with more than p_max_per_user notifications, by user_id. The
+-- retention job reads them once per run (one scan of the table), then
+-- caps them one at a time with cap_user_notifications().
+create or replace function over_cap_notification_users(p_max_per_user integer)
+returns table (user_id uuid)
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select n.user_id
+    from notifications n
+    group by n.user_id
+    having count(*) > p_max_per_user
+    order by n.user_id;
+$$;
+
+-- Deletes (or archives) up to p_limit of one user's notifications beyond
+-- their newest p_max_per_user, walking notifications_user_created_idx.
+-- Returns one row with the number of rows removed.
+create or replace function cap_user_notifications(
+    p_user_id uuid,
+    p_max_per_user integer,
+    p_archive boolean,
+    p_limit integer
+)
+returns table (removed integer)
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if p_max_per_user < 1 then
+        raise exception 'p_max_per_user must be at least 1';
+    end if;
+
+    -- One capping pass per user at a time; the offset scan is not row-locked
+    if not pg_try_advisory_xact_lock(hashtext('cap_user_notifications'), hashtext(p_user_id::text)) then
+        removed := 0;
+        return next;
+        return;
+    end if;
+
+    with doomed as (
+        delete from notifications
+        where id in (
+            select id from notifications
+            where user_id = p_user_id
+            order by created_at desc
+            offset p_max_per_user
+            limit p_limit
+        )
+        returning *
+    ), archived as (
+        insert into notifications_archive
+            (id, user_id, title, message, type, severity, related_id, related_type, is_read, created_at)
+        select id, user_id, title, message, type, severity, related_id, related_type, is_read, created_at
+        from doomed
+        where p_archive
+    )
+    select count(*) into removed from doomed;
+    return next;
+end;
+$$;
+
+-- Only the backend (service role) may run retention
+revoke all on function expire_read_notifications(timestamptz, boolean, integer) from public;
+revoke all on function over_cap_notification_users(integer) from public;
+revoke all on function cap_user_notifications(uuid, integer, boolean, integer) from public;
+
+do $$
+declare
+    v_role text;
+begin
+    foreach v_role in array array['anon', 'authenticated'] loop
+        if exists (select 1 from pg_roles where rolname = v_role) then
+            execute format('revoke all on function expire_read_notifications(timestamptz, boolean, integer) from %I', v_role);
+            execute format('revoke all on function over_cap_notification_users(integer) from %I', v_role);
+            execute format('revoke all on function cap_user_notifications(uuid, integer, boolean, integer) from %I', v_role);
+        end if;
+    end loop;
+    if exists (select 1 from pg_roles where rolname = 'service_role') then
+        grant execute on function expire_read_notifications(timestamptz, boolean, integer) to service_role;
+        grant execute on function over_cap_notification_users(integer) to service_role;
+        grant execute on function cap_user_notifications(uuid, integer, boolean, integer) to service_role;
+    end if;
+end;
+$$;
@@ -0,0 +1,249 @@
+-- Deleting a server or a user is a soft delete (deleted_at) plus a purge
+-- job. The backend's purge worker (PURGE_ENABLED) calls purge_step()
+-- until the job is done; each call removes at most one chunk of dependent
+-- rows in its own short transaction, so a server with months of metrics
+-- never holds locks in one long cascading DELETE.
+
+alter table users add column if not exists deleted_at timestamptz;
+alter table servers add column if not exists deleted_at timestamptz;
+
+-- A deleted account's email can be registered again before its purge runs
+alter table users drop constraint if exists users_email_key;
+create unique index if not exists users_email_live_idx
+    on users (email)
+    where deleted_at is null;
+
+create table if not exists purge_jobs (
+    id          uuid primary key default gen_random_uuid(),
+    entity_type text not null check (entity_type in ('server', 'user')),
+    entity_id   uuid not null,
+    owner_id    uuid not null,  -- user that requested the deletion (no FK: the job outlives it)
+    status      text not null default 'pending' check (status in ('pending', 'running', 'done')),
+    progress    jsonb not null default '{}'::jsonb,  -- rows removed so far, per table
+    last_error  text,
+    created_at  timestamptz not null default now(),
+    updated_at  timestamptz not null default now(),
+    finished_at timestamptz,
+    unique (entity_type, entity_id)
+);
+
+-- Purge worker: unfinished jobs, oldest first
+create index if not exists purge_jobs_open_idx
+    on purge_jobs (created_at)
+    where status <> 'done';
+
+-- Soft-deletes the entity (a user's servers with it) and creates its purge
+-- job. Returns the job, or no row if the entity is missing or already deleted.
+create or replace function schedule_purge(p_entity_type text, p_entity_id uuid)
+returns setof purge_jobs
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_owner uuid;
+begin
+    if p_entity_type = 'server' then
+        update servers set deleted_at = now()
+        where id = p_entity_id and deleted_at is null
+        returning user_id into v_owner;
+    elsif p_entity_type = 'user' then
+        update users set deleted_at = now()
+        where id = p_entity_id and deleted_at is null
+        returning id into v_owner;
+        update servers set deleted_at = now()
+        where user_id = p_entity_id and deleted_at is null;
+    else
+        raise exception 'unknown entity type %', p_entity_type;
+    end if;
+
+    if v_owner is null then
+        return;
+    end if;
+
+    return query
+        insert into purge_jobs (entity_type, entity_id, owner_id)
+        values (p_entity_type, p_entity_id, v_owner)
+        returning *;
+end;
+$$;
+
+-- Removes up to p_limit rows of one server, children first: metrics,
+-- anomalies, anomaly_daily_counts, predictions, then the server row
+-- itself (which cascades whatever an agent wrote in the meantime).
+-- Returns the table worked on and the rows removed.
+create or replace function purge_server_chunk(
+    p_server_id uuid,
+    p_limit integer,
+    out purged_table text,
+    out purged integer
+)
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    purged_table := 'metrics';
+    delete from metrics
+    where (id, "timestamp") in (
+        select id, "timestamp" from metrics
+        where server_id = p_server_id
+        limit p_limit
+        for update skip locked
+    );
+    get diagnostics purged = row_count;
+    if purged > 0 then
+        return;
+    end if;
+
+    purged_table := 'anomalies';
+    delete from anomalies
+    where id in (
+        select id from anomalies
+        where server_id = p_server_id
+        limit p_limit
+        for update skip locked
+    );
+    get diagnostics purged = row_count;
+    if purged > 0 then
+        return;
+    end if;
+
+    purged_table := 'anomaly_daily_counts';
+    delete from anomaly_daily_counts
+    where (server_id, day, severity) in (
+        select server_id, day, severity from anomaly_daily_counts
+        where server_id = p_server_id
+        limit p_limit
+        for update skip locked
+    );
+    get diagnostics purged = row_count;
+    if purged > 0 then
+        return;
+    end if;
+
+    purged_table := 'predictions';
+    delete from predictions
+    where id in (
+        select id from predictions
+        where server_id = p_server_id
+        limit p_limit
+        for update skip locked
+    );
+    get diagnostics purged = row_count;
+    if purged > 0 then
+        return;
+    end if;
+
+    purged_table := 'servers';
+    delete from servers where id = p_server_id;
+    get diagnostics purged = row_count;
+end;
+$$;
+
+-- Runs one chunk of a purge job and records it in purge_jobs.progress.
+-- A user's servers are purged one after the other, then their
+-- notifications (and archived ones), then the user row. Returns the table
+-- worked on, the rows removed and whether the job is now done.
+create or replace function purge_step(p_job_id uuid, p_limit integer)
+returns table (purged_table text, purged integer, done boolean)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_job purge_jobs;
+    v_server_id uuid;
+begin
+    select * into v_job from purge_jobs where id = p_job_id;
+    if not found or v_job.status = 'done' then
+        purged := 0;
+        done := true;
+        return next;
+        return;
+    end if;
+
+    done := false;
+    if v_job.entity_type = 'server' then
+        select c.purged_table, c.purged into purged_table, purged
+        from purge_server_chunk(v_job.entity_id, p_limit) c;
+        done := purged_table = 'servers';
+    else
+        select id into v_server_id from servers
+        where user_id = v_job.entity_id
+        order by id
+        limit 1;
+
+        if v_server_id is not null then
+            select c.purged_table, c.purged into purged_table, purged
+            from purge_server_chunk(v_server_id, p_limit) c;
+        else
+            purged_table := 'notifications';
+            delete from notifications
+            where id in (
+                select id from notifications
+                where user_id = v_job.entity_id
+                limit p_limit
+                for update skip locked
+            );
+            get diagnostics purged = row_count;
+
+            if purged = 0 then
+                purged_table := 'notifications_archive';
+                delete from notifications_archive
+                where ctid = any(array(
+                    select ctid from notifications_archive
+                    where user_id = v_job.entity_id
+                    limit p_limit
+                    for update skip locked
+                ));
+                get diagnostics purged = row_count;
+            end if;
+
+            if purged = 0 then
+                purged_table := 'users';
+                delete from users where id = v_job.entity_id;
+                get diagnostics purged = row_count;
+                done := true;
+            end if;
+        end if;
+    end if;
+
+    update purge_jobs j set
+        status = case when done then 'done' else 'running' end,
+        progress = jsonb_set(
+            j.progress,
+            array[purged_table],
+            to_jsonb(coalesce((j.progress ->> purged_table)::bigint, 0) + purged)
+        ),
+        last_error = null,
+        updated_at = now(),
+        finished_at = case when done then now() end
+    where j.id = p_job_id;
+
+    return next;
+end;
+$$;
+
+-- Only the backend (service role) may schedule or run purges
+revoke all on function schedule_purge(text, uuid) from public;
+revoke all on function purge_server_chunk(uuid, integer) from public;
+revoke all on function purge_step(uuid, integer) from public;
+
+do $$
+declare
+    v_role text;
+begin
+    foreach v_role in array array['anon', 'authenticated'] loop
+        if exists (select 1 from pg_roles where rolname = v_role) then
+            execute format('revoke all on function schedule_purge(text, uuid) from %I', v_role);
+            execute format('revoke all on function purge_server_chunk(uuid, integer) from %I', v_role);
+            execute format('revoke all on function purge_step(uuid, integer) from %I', v_role);
+        end if;
+    end loop;
+    if exists (select 1 from pg_roles where rolname = 'service_role') then
+        grant execute on function schedule_purge(text, uuid) to service_role;
+        grant execute on function purge_step(uuid, integer) to service_role;
+    end if;
+end;
+$$;
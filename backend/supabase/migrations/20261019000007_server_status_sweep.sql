@@ -0,0 +1,55 @@
+-- Server status from heartbeats in one statement. The backend's status
+-- sweeper (SERVER_SWEEP_ENABLED) calls sweep_server_status() every
+-- interval instead of reading every server and sending the changed ids
+-- back in an in_ filter, which grows past URL limits when many servers
+-- change at once (mass outage, first deploy).
+
+-- Classifies every live server by heartbeat age, sets the status of those
+-- whose status changed and returns them. The update re-checks the old
+-- status, so with several workers sweeping at once only one of them
+-- reports each transition. age_seconds is null for servers never seen.
+create or replace function sweep_server_status(p_warning_after double precision, p_offline_after double precision)
+returns table (id uuid, user_id uuid, name text, previous_status text, status text, age_seconds double precision)
+language sql
+security definer
+set search_path = public
+as $$
+    with classified as (
+        select
+            s.id,
+            s.status as previous_status,
+            extract(epoch from now() - s.last_seen)::double precision as age_seconds,
+            case
+                when s.last_seen is null or now() - s.last_seen >= make_interval(secs => p_offline_after) then 'offline'
+                when now() - s.last_seen >= make_interval(secs => p_warning_after) then 'warning'
+                else 'online'
+            end as new_status
+        from servers s
+        where s.deleted_at is null
+    )
+    update servers s
+    set status = c.new_status
+    from classified c
+    where s.id = c.id
+      and c.new_status <> c.previous_status
+      and s.status = c.previous_status
+    returning s.id, s.user_id, s.name, c.previous_status, s.status, c.age_seconds;
+$$;
+
+-- Only the backend (service role) may run the sweep
+revoke all on function sweep_server_status(double precision, double precision) from public;
+
+do $$
+declare
+    v_role text;
+begin
+    foreach v_role in array array['anon', 'authenticated'] loop
+        if exists (select 1 from pg_roles where rolname = v_role) then
+            execute format('revoke all on function sweep_server_status(double precision, double precision) from %I', v_role);
+        end if;
+    end loop;
+    if exists (select 1 from pg_roles where rolname = 'service_role') then
+        grant execute on function sweep_server_status(double precision, double precision) to service_role;
+    end if;
+end;
+$$;
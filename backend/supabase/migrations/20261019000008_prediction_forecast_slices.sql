@@ -0,0 +1,76 @@
+-- Partial forecast retrieval. GET .../predictions/latest and the history
+-- endpoint accept metrics= and horizon=; the backend reads those through
+-- server_predictions(), which cuts compact forecasts down in the database
+-- so only the requested series and points are sent over the wire.
+
+-- A compact/v1 forecast with only p_metrics (all when null) and the first
+-- p_horizon points of each series (all when null). Series are base64
+-- float32: 3 values are 16 characters, so a prefix of whole 16-character
+-- chunks decodes to the first values. Other forecasts are returned as is.
+create or replace function forecast_slice(p_forecast jsonb, p_metrics text[], p_horizon integer)
+returns jsonb
+language sql
+immutable
+set search_path = public
+as $$
+    select case
+        when p_forecast ->> 'format' is distinct from 'compact/v1' then p_forecast
+        else jsonb_set(p_forecast, '{metrics}', coalesce((
+            select jsonb_object_agg(m.key, (
+                select jsonb_object_agg(
+                    f.key,
+                    case
+                        when p_horizon is null then f.value
+                        else to_jsonb(left(f.value #>> '{}', ((p_horizon + 2) / 3) * 16))
+                    end
+                )
+                from jsonb_each(m.value) f
+            ))
+            from jsonb_each(p_forecast -> 'metrics') m
+            where p_metrics is null or m.key = any(p_metrics)
+        ), '{}'::jsonb))
+    end;
+$$;
+
+-- A page of a server's predictions, newest first, with sliced forecasts
+-- (predictions_server_created_idx)
+create or replace function server_predictions(
+    p_server_id uuid,
+    p_metrics text[],
+    p_horizon integer,
+    p_limit integer,
+    p_offset integer
+)
+returns table (id uuid, server_id uuid, forecast jsonb, created_at timestamptz)
+language sql
+stable
+set search_path = public
+as $$
+    select p.id, p.server_id, forecast_slice(p.forecast, p_metrics, p_horizon), p.created_at
+    from predictions p
+    where p.server_id = p_server_id
+    order by p.created_at desc
+    limit p_limit
+    offset p_offset;
+$$;
+
+-- Only the backend (service role) reads predictions through these
+revoke all on function forecast_slice(jsonb, text[], integer) from public;
+revoke all on function server_predictions(uuid, text[], integer, integer, integer) from public;
+
+do $$
+declare
+    v_role text;
+begin
+    foreach v_role in array array['anon', 'authenticated'] loop
+        if exists (select 1 from pg_roles where rolname = v_role) then
+            execute format('revoke all on function forecast_slice(jsonb, text[], integer) from %I', v_role);
+            execute format('revoke all on function server_predictions(uuid, text[], integer, integer, integer) from %I', v_role);
+        end if;
+    end loop;
+    if exists (select 1 from pg_roles where rolname = 'service_role') then
+        grant execute on function forecast_slice(jsonb, text[], integer) to service_role;
+        grant execute on function server_predictions(uuid, text[], integer, integer, integer) to service_role;
+    end if;
+end;
+$$;
@@ -0,0 +1,12 @@
+import os
+
+# Settings are validated on import; the tests never reach these services
+for name, value in {
+    "SUPABASE_URL": "http://localhost:54321",
+    "SUPABASE_KEY": "test",
+    "SUPABASE_JWT_SECRET": "test",
+    "SECRET_KEY": "test",
+    "GMAIL_USER": "alerts@example.com",
+    "GMAIL_PASSWORD": "",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,104 @@
+import asyncio
+import socket
+import pytest
+from aiosmtpd.controller import Controller
+from app.services.email_service import EmailService
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Inbox:
+    """aiosmtpd handler that keeps messages and can fail the next DATA commands"""
+
+    def __init__(self):
+        self.messages = []
+        self.fail_next = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_next:
+            self.fail_next -= 1
+            return "451 Temporary failure, try again"
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    inbox = Inbox()
+    controller = Controller(inbox, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller, inbox
+    controller.stop()
+
+
+def _service(controller: Controller) -> EmailService:
+    service = EmailService()
+    service.smtp_host = controller.hostname
+    service.smtp_port = controller.port
+    service.smtp_use_ssl = False
+    service.smtp_starttls = False
+    service.max_retries = 2
+    service.retry_backoff = 0.01
+    return service
+
+
+def _message(service: EmailService, n: int):
+    return service._build_message("user@example.com", f"Alert {n}", "body")
+
+
+def test_reuses_one_connection(smtp_server):
+    controller, inbox = smtp_server
+    service = _service(controller)
+
+    async def run():
+        service.start()
+        for n in range(3):
+            assert await service.send_message(_message(service, n))
+        await service.drain(timeout=5)
+
+    asyncio.run(run())
+    assert len(inbox.messages) == 3
+    assert service.stats()["connections_opened"] == 1
+    assert service.stats()["sent"] == 3
+
+
+def test_reconnects_when_server_dropped_connection(smtp_server):
+    controller, inbox = smtp_server
+    service = _service(controller)
+
+    async def run():
+        assert await service._deliver(_message(service, 1))
+        # The server closes the idle connection between messages
+        service._smtp.close()
+        assert await service._deliver(_message(service, 2))
+
+    asyncio.run(run())
+    assert len(inbox.messages) == 2
+    assert service.stats()["connections_opened"] == 2
+    assert service.stats()["retries"] == 0
+
+
+def test_retries_temporary_failures(smtp_server):
+    controller, inbox = smtp_server
+    inbox.fail_next = 1
+    service = _service(controller)
+
+    assert asyncio.run(service._deliver(_message(service, 1)))
+    assert len(inbox.messages) == 1
+    assert service.stats()["retries"] == 1
+    assert service.stats()["failed"] == 0
+
+
+def test_gives_up_after_max_retries(smtp_server):
+    controller, inbox = smtp_server
+    inbox.fail_next = 10
+    service = _service(controller)
+
+    assert not asyncio.run(service._deliver(_message(service, 1)))
+    assert inbox.messages == []
+    assert service.stats()["retries"] == 2
+    assert service.stats()["failed"] == 1
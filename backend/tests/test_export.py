@@ -0,0 +1,33 @@
+import asyncio
+import csv
+import io
+import orjson
+from app.core.export import encode_csv, encode_ndjson
+
+COLUMNS = ["timestamp", "cpu_percent", "ram_percent"]
+
+
+async def _pages(*pages: list[dict]):
+    for page in pages:
+        yield page
+
+
+async def _encode(encoder, *pages: list[dict]) -> str:
+    return b"".join([chunk async for chunk in encoder(_pages(*pages), COLUMNS)]).decode()
+
+
+def test_csv_and_ndjson_export_the_same_columns():
+    rows = [
+        {"cpu_percent": 12.5, "timestamp": "2026-10-19T10:00:00+00:00", "ram_percent": 40.0, "server_id": "s1"},
+        {"timestamp": "2026-10-19T10:01:00+00:00", "cpu_percent": 13.0, "extra": True},
+    ]
+    ndjson = asyncio.run(_encode(encode_ndjson, rows[:1], rows[1:]))
+    csv_text = asyncio.run(_encode(encode_csv, rows[:1], rows[1:]))
+
+    lines = [orjson.loads(line) for line in ndjson.splitlines()]
+    assert [list(line) for line in lines] == [COLUMNS, COLUMNS]
+    assert lines[1]["ram_percent"] is None
+
+    records = list(csv.DictReader(io.StringIO(csv_text)))
+    assert [list(record) for record in records] == [COLUMNS, COLUMNS]
+    assert [record["timestamp"] for record in records] == [line["timestamp"] for line in lines]
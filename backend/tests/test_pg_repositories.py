@@ -0,0 +1,258 @@
+"""
+DATA_BACKEND=postgres repositories against a real database.
+
+Needs TEST_DATABASE_URL, a Postgres with supabase/migrations applied (e.g.
+`python -m benchmarks.explain_queries <dsn> --migrate`). The parity tests
+also need TEST_SUPABASE_URL and TEST_SUPABASE_KEY for a PostgREST in front
+of the same database (e.g. `supabase start`), and compare every Pg*
+method with the PostgREST implementation it replaces.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID, uuid4
+import pytest
+from pydantic import BaseModel
+from app.repositories.anomaly_repository import AnomalyRepository
+from app.repositories.metrics_repository import MetricsRepository
+from app.repositories.server_repository import ServerRepository
+from app.repositories.postgres.anomaly_repository import PgAnomalyRepository
+from app.repositories.postgres.metrics_repository import PgMetricsRepository
+from app.repositories.postgres.server_repository import PgServerRepository
+from app.schemas.anomaly import AnomalyCreate
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+SUPABASE_URL = os.environ.get("TEST_SUPABASE_URL")
+SUPABASE_KEY = os.environ.get("TEST_SUPABASE_KEY")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+needs_postgrest = pytest.mark.skipif(
+    not (SUPABASE_URL and SUPABASE_KEY), reason="TEST_SUPABASE_URL / TEST_SUPABASE_KEY are not set"
+)
+
+SEVERITIES = ["low", "medium", "high", "critical"]
+
+
+class Seeded:
+    """One user with one server, 30 metric samples and 12 anomalies over the last two hours"""
+
+    def __init__(self, pool, supabase):
+        self.pool = pool
+        self.supabase = supabase
+        self.user_id = str(uuid4())
+        self.server_id = str(uuid4())
+        self.start = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(hours=2)
+        self.metric_times = [self.start + timedelta(minutes=4 * i) for i in range(30)]
+        self.anomaly_times = [self.start + timedelta(minutes=10 * i) for i in range(12)]
+
+    async def seed(self) -> None:
+        await self.pool.execute(
+            "insert into users (id, email, password_hash, first_name, last_name, birth_date) "
+            "values ($1, $2, 'x', 'Test', 'User', '1990-01-01')",
+            UUID(self.user_id), f"{self.user_id}@example.com"
+        )
+        await self.pool.execute(
+            "insert into servers (id, user_id, name, ip, api_key) values ($1, $2, 'test', '10.0.0.1', $3)",
+            UUID(self.server_id), UUID(self.user_id), f"key-{self.server_id}"
+        )
+        await self.pool.executemany(
+            'insert into metrics (server_id, "timestamp", cpu_percent, ram_percent, '
+            "disk_read, disk_write, net_sent, net_recv) values ($1, $2, $3, $4, $5, $6, $7, $8)",
+            [
+                (UUID(self.server_id), t, 10.0 + i * 2.5, 40.0 + i, i * 100, i * 50, i * 10, i * 20)
+                for i, t in enumerate(self.metric_times)
+            ]
+        )
+        # Through the repository, as in production (the counters follow by trigger)
+        await PgAnomalyRepository(self.supabase, self.pool).create_anomalies([
+            AnomalyCreate(
+                server_id=self.server_id,
+                timestamp=t,
+                type="cpu_spike",
+                severity=SEVERITIES[i % len(SEVERITIES)],
+                explanation=f"anomaly {i}",
+                metrics={"cpu_percent": 90 + i}
+            )
+            for i, t in enumerate(self.anomaly_times)
+        ])
+
+    async def cleanup(self) -> None:
+        server_uuid = UUID(self.server_id)
+        await self.pool.execute("delete from metrics where server_id = $1", server_uuid)
+        await self.pool.execute("delete from anomalies where server_id = $1", server_uuid)
+        await self.pool.execute("delete from anomaly_daily_counts where server_id = $1", server_uuid)
+        await self.pool.execute("delete from servers where id = $1", server_uuid)
+        await self.pool.execute("delete from users where id = $1", UUID(self.user_id))
+
+
+def run_seeded(test):
+    """Run test(seeded) on a fresh pool with its own seed data"""
+    asyncpg = pytest.importorskip("asyncpg")
+    from app.database.postgres import _init_connection
+
+    async def run():
+        pool = await asyncpg.create_pool(DATABASE_URL, min_size=1, max_size=2, init=_init_connection)
+        supabase = None
+        if SUPABASE_URL and SUPABASE_KEY:
+            from supabase import create_client
+            supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        seeded = Seeded(pool, supabase)
+        try:
+            await seeded.seed()
+            await test(seeded)
+        finally:
+            await seeded.cleanup()
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def normalize(value):
+    """Compare PostgREST JSON and asyncpg values: parsed timestamps, str ids, rounded floats"""
+    if isinstance(value, BaseModel):
+        return normalize(value.model_dump())
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, (float, Decimal)):
+        return round(float(value), 6)
+    if isinstance(value, str):
+        try:
+            return normalize(datetime.fromisoformat(value))
+        except ValueError:
+            return value
+    return value
+
+
+# ==================== Pg* ONLY ====================
+
+def test_metrics_rows_and_count_use_utc_for_naive_filters():
+    async def test(seeded: Seeded):
+        repo = PgMetricsRepository(None, seeded.pool)
+        aware = seeded.metric_times[10]
+        naive = aware.replace(tzinfo=None)
+
+        previous_tz = os.environ.get("TZ")
+        os.environ["TZ"] = "America/New_York"
+        time.tzset()
+        try:
+            assert await repo.get_metrics_count(seeded.server_id, from_time=naive) == 20
+            assert await repo.get_metrics_count(seeded.server_id, from_time=aware) == 20
+            rows = await repo.get_metrics_rows(seeded.server_id, to_time=naive, limit=100)
+        finally:
+            if previous_tz is None:
+                del os.environ["TZ"]
+            else:
+                os.environ["TZ"] = previous_tz
+            time.tzset()
+
+        assert len(rows) == 11
+        assert normalize(rows[0]["timestamp"]) == aware
+
+    run_seeded(test)
+
+
+def test_anomaly_filters_and_stats_match_the_rows():
+    async def test(seeded: Seeded):
+        repo = PgAnomalyRepository(None, seeded.pool)
+
+        high = await repo.get_anomaly_rows(seeded.server_id, severity="high")
+        assert len(high) == 3
+        assert await repo.get_anomaly_count(seeded.server_id, severity="high") == 3
+        from_time = seeded.anomaly_times[6].replace(tzinfo=None)
+        assert await repo.get_anomaly_count(seeded.server_id, from_time=from_time) == 6
+
+        stats = await repo.get_anomaly_stats(seeded.server_id, days=7)
+        assert stats["total_anomalies"] == 12
+        assert [stats[f"{s}_count"] for s in SEVERITIES] == [3, 3, 3, 3]
+        assert normalize(stats["most_recent"]) == seeded.anomaly_times[-1]
+
+    run_seeded(test)
+
+
+def test_metrics_summary_matches_the_rows():
+    async def test(seeded: Seeded):
+        repo = PgMetricsRepository(None, seeded.pool)
+        rows = await repo.get_metrics_rows(seeded.server_id, limit=100)
+        summary = await repo.get_metrics_summary(seeded.server_id, hours=24)
+
+        assert normalize(summary["avg_cpu"]) == normalize(sum(r["cpu_percent"] for r in rows) / len(rows))
+        assert summary["max_ram"] == max(r["ram_percent"] for r in rows)
+        assert summary["total_disk_read"] == sum(r["disk_read"] for r in rows)
+        assert summary["total_net_recv"] == sum(r["net_recv"] for r in rows)
+
+    run_seeded(test)
+
+
+# ==================== PARITY WITH POSTGREST ====================
+
+@needs_postgrest
+def test_metrics_repository_parity():
+    async def test(seeded: Seeded):
+        rest = MetricsRepository(seeded.supabase)
+        pg = PgMetricsRepository(seeded.supabase, seeded.pool)
+        sid = seeded.server_id
+        window = {"from_time": seeded.metric_times[5], "to_time": seeded.metric_times[20].replace(tzinfo=None)}
+
+        assert normalize(await pg.get_metrics_rows(sid, limit=7, offset=3)) == \
+            normalize(await rest.get_metrics_rows(sid, limit=7, offset=3))
+        assert normalize(await pg.get_metrics_rows(sid, **window)) == \
+            normalize(await rest.get_metrics_rows(sid, **window))
+        assert await pg.get_metrics_count(sid, **window) == await rest.get_metrics_count(sid, **window)
+        assert normalize(await pg.get_latest_metrics(sid)) == normalize(await rest.get_latest_metrics(sid))
+
+        pg_summary = await pg.get_metrics_summary(sid, hours=24)
+        rest_summary = await rest.get_metrics_summary(sid, hours=24)
+        for key in ("period_start", "period_end"):
+            pg_summary.pop(key)
+            rest_summary.pop(key)
+        assert normalize(pg_summary) == normalize(rest_summary)
+
+    run_seeded(test)
+
+
+@needs_postgrest
+def test_anomaly_repository_parity():
+    async def test(seeded: Seeded):
+        rest = AnomalyRepository(seeded.supabase)
+        pg = PgAnomalyRepository(seeded.supabase, seeded.pool)
+        sid = seeded.server_id
+        window = {"from_time": seeded.anomaly_times[2], "to_time": seeded.anomaly_times[9].replace(tzinfo=None)}
+
+        for filters in ({}, {"severity": "critical"}, window):
+            assert normalize(await pg.get_anomaly_rows(sid, **filters)) == \
+                normalize(await rest.get_anomaly_rows(sid, **filters))
+            assert await pg.get_anomaly_count(sid, **filters) == await rest.get_anomaly_count(sid, **filters)
+
+        first = (await pg.get_anomaly_rows(sid, limit=1))[0]["id"]
+        assert normalize(await pg.get_anomaly_by_id(first)) == normalize(await rest.get_anomaly_by_id(first))
+        assert normalize(await pg.get_anomaly_stats(sid, days=7)) == normalize(await rest.get_anomaly_stats(sid, days=7))
+
+    run_seeded(test)
+
+
+@needs_postgrest
+def test_server_repository_parity():
+    async def test(seeded: Seeded):
+        rest = ServerRepository(seeded.supabase)
+        pg = PgServerRepository(seeded.supabase, seeded.pool)
+
+        assert normalize(await pg.get_server_by_id(seeded.server_id)) == \
+            normalize(await rest.get_server_by_id(seeded.server_id))
+        assert normalize(await pg.get_servers_by_user(seeded.user_id)) == \
+            normalize(await rest.get_servers_by_user(seeded.user_id))
+        assert normalize(await pg.get_servers_by_ids([seeded.server_id])) == \
+            normalize(await rest.get_servers_by_ids([seeded.server_id]))
+        assert await pg.get_user_server_count(seeded.user_id) == await rest.get_user_server_count(seeded.user_id)
+        api_key = f"key-{seeded.server_id}"
+        assert normalize(await pg.get_server_by_api_key(api_key)) == \
+            normalize(await rest.get_server_by_api_key(api_key))
+
+    run_seeded(test)
@@ -0,0 +1,95 @@
+import asyncio
+import fakeredis
+from app.core.cache import RedisBackend, SharedCache
+
+
+class FakeRedisBackend(RedisBackend):
+    """RedisBackend on an in-process fake server shared by several workers"""
+
+    def __init__(self, server: fakeredis.FakeServer):
+        super().__init__("redis://fake")
+        self.server = server
+
+    async def connect(self) -> None:
+        self._redis = fakeredis.FakeAsyncRedis(server=self.server)
+
+
+async def _workers(count: int) -> list[SharedCache]:
+    server = fakeredis.FakeServer()
+    workers = [SharedCache(FakeRedisBackend(server), "test:", local_ttl=60) for _ in range(count)]
+    for worker in workers:
+        await worker.start()
+    # Let the pub/sub listeners subscribe
+    await asyncio.sleep(0.05)
+    return workers
+
+
+async def _eventually(condition, timeout: float = 2.0) -> bool:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+def test_value_is_shared_between_workers():
+    async def run():
+        a, b = await _workers(2)
+        await a.set("server:1", {"name": "web"})
+        assert await b.get("server:1") == {"name": "web"}
+        assert b.stats()["hits"] == 1
+        for worker in (a, b):
+            await worker.close()
+
+    asyncio.run(run())
+
+
+def test_invalidate_drops_other_workers_local_copy():
+    async def run():
+        a, b = await _workers(2)
+        await a.set("server:1", {"name": "web"})
+        # b now holds a local copy that would be served for local_ttl
+        assert await b.get("server:1") == {"name": "web"}
+        assert "server:1" in b._local
+
+        await a.invalidate("server:1")
+        assert await _eventually(lambda: "server:1" not in b._local)
+        assert await b.get("server:1") is None
+        for worker in (a, b):
+            await worker.close()
+
+    asyncio.run(run())
+
+
+def test_incr_drops_other_workers_local_copy():
+    async def run():
+        a, b = await _workers(2)
+        assert await a.incr("version:server:1") == 1
+        assert await b.get("version:server:1") == 1
+
+        assert await a.incr("version:server:1") == 2
+        assert await _eventually(lambda: "version:server:1" not in b._local)
+        assert await b.get("version:server:1") == 2
+        for worker in (a, b):
+            await worker.close()
+
+    asyncio.run(run())
+
+
+def test_publish_reaches_every_worker():
+    async def run():
+        workers = await _workers(3)
+        received = []
+        for n, worker in enumerate(workers):
+            await worker.subscribe("events", lambda message, n=n: received.append((n, message)))
+        await asyncio.sleep(0.05)
+
+        assert await workers[0].publish("events", {"user": "u1"})
+        assert await _eventually(lambda: len(received) == 3)
+        assert sorted(received) == [(n, {"user": "u1"}) for n in range(3)]
+        for worker in workers:
+            await worker.close()
+
+    asyncio.run(run())